@@ -10,8 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
+import tempfile
+from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack (petstoreapp/profiling.py)
+    'petstoreapp.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     # 'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -60,6 +68,49 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
 
+REST_FRAMEWORK = {
+    # Every router collection is keyset paginated; add ?stream=1 for the full set
+    'DEFAULT_PAGINATION_CLASS': 'petstoreapp.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Bearer access tokens first (petstoreapp/authentication.py), then DRF's defaults
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'petstoreapp.authentication.ClaimsJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    # Token buckets (petstoreapp/throttling.py): 'user'/'anon' for every request,
+    # '<scope>' per client and '<scope>.route' across clients for costly views
+    'DEFAULT_THROTTLE_CLASSES': [
+        'petstoreapp.throttling.ClientRateThrottle',
+        'petstoreapp.throttling.RouteRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '300/min',
+        'user': '1200/min',
+        'login': '10/min',
+        'login.route': '300/min',
+        'dashboard': '30/min',
+        'dashboard.route': '120/min',
+        'stream': '6/min',
+        'stream.route': '60/min',
+        'catalog_io': '5/min',
+        'catalog_io.route': '20/min',
+    },
+    # Proxies in front of the app that append to X-Forwarded-For. With 0, anonymous
+    # clients are throttled by REMOTE_ADDR and a client-sent header is ignored.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+}
+
+THROTTLE_ENABLED = os.environ.get('THROTTLE', 'on') != 'off'
+
+# Access tokens carry the user's claims, re-read from the database on refresh;
+# read-only endpoints trust them for up to ACCESS_TOKEN_LIFETIME
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('ACCESS_TOKEN_MINUTES', '5'))),
+    'TOKEN_OBTAIN_SERIALIZER': 'petstoreapp.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'petstoreapp.authentication.ClaimsTokenRefreshSerializer',
+}
+
 
 ROOT_URLCONF = 'petstore.urls'
 
@@ -83,12 +134,214 @@ WSGI_APPLICATION = 'petstore.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# PETSTORE_DB_MODE picks the backend:
+#   sqlite      SQLite at PETSTORE_DB_PATH with the default rollback journal
+#   sqlite-wal  the same file in WAL mode with concurrency pragmas: readers no
+#               longer wait for the writer. WAL is a property of the file, so
+#               it sticks once a database has been opened this way.
+#   postgres    PostgreSQL from PETSTORE_PG_* through psycopg's connection pool
+#               (PETSTORE_PG_POOL=off uses persistent connections instead)
+# PETSTORE_DB_REPLICAS lists read replicas (SQLite paths or PostgreSQL hosts,
+# comma separated); petstoreapp/db_router.py sends catalog reads to them.
+
+DB_MODE = os.environ.get('PETSTORE_DB_MODE', 'sqlite')
+DB_REPLICAS = [r for r in os.environ.get('PETSTORE_DB_REPLICAS', '').split(',') if r]
+
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # durable at checkpoints; safe with WAL
+    'PRAGMA mmap_size=268435456',  # 256 MiB of the file read through mmap
+    'PRAGMA cache_size=-32000',  # 32 MiB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+]
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+
+def sqlite_database(name):
+    options = {
+        # Take the write lock when a transaction starts, so concurrent
+        # checkouts wait their turn instead of failing with "database is locked"
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+    }
+    if DB_MODE == 'sqlite-wal':
+        options['init_command'] = ';'.join(SQLITE_PRAGMAS)
+    return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name, 'OPTIONS': options}
+
+
+def postgres_database(host):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('PETSTORE_PG_NAME', 'petstore'),
+        'USER': os.environ.get('PETSTORE_PG_USER', 'petstore'),
+        'PASSWORD': os.environ.get('PETSTORE_PG_PASSWORD', ''),
+        'HOST': host,
+        'PORT': os.environ.get('PETSTORE_PG_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
+    if os.environ.get('PETSTORE_PG_POOL', 'on') != 'off':
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('PETSTORE_PG_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('PETSTORE_PG_POOL_MAX', 20)),
+            'timeout': 10,
+        }
+    else:
+        database['CONN_MAX_AGE'] = 600
+    return database
+
+
+if DB_MODE == 'postgres':
+    DATABASES = {'default': postgres_database(os.environ.get('PETSTORE_PG_HOST', 'localhost'))}
+    replica_database = postgres_database
+elif DB_MODE in ('sqlite', 'sqlite-wal'):
+    DATABASES = {'default': sqlite_database(os.environ.get('PETSTORE_DB_PATH', BASE_DIR / 'db.sqlite3'))}
+    replica_database = sqlite_database
+else:
+    raise ImproperlyConfigured(f"Unknown PETSTORE_DB_MODE {DB_MODE!r}")
+
+for index, location in enumerate(DB_REPLICAS, start=1):
+    # Tests and benchmarks read replicas through the default connection
+    DATABASES[f'replica{index}'] = dict(replica_database(location), TEST={'MIRROR': 'default'})
+if DB_REPLICAS:
+    DATABASE_ROUTERS = ['petstoreapp.db_router.ReadReplicaRouter']
+# After a write, reads stay on the primary for the rest of the request, and
+# for this long in jobs and commands, so they are not served from a replica
+# that has not caught up yet
+REPLICA_PIN_SECONDS = float(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The catalog alias backs the response cache in petstoreapp/cache.py. Changes
+# bump version keys in it, which only reaches processes sharing the backend:
+# with more than one worker, point it at FileBasedCache or RedisCache via the
+# environment, or other workers serve stale responses for up to TIMEOUT.
+
+CATALOG_CACHE_BACKEND = os.environ.get('CATALOG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': CATALOG_CACHE_BACKEND,
+        'LOCATION': os.environ.get('CATALOG_CACHE_LOCATION', 'petstore-catalog'),
+        'TIMEOUT': 600,
+    },
+}
+
+if CATALOG_CACHE_BACKEND.endswith(('LocMemCache', 'FileBasedCache')):
+    # Local backends cull the least recently used entries past this size
+    CACHES['catalog']['OPTIONS'] = {'MAX_ENTRIES': 2000}
+
+# Facet counts (petstoreapp/facets.py) come from a per-process index that
+# follows a generation counter in the catalog cache. Unless that cache is
+# shared, another process's changes only show once the index is this old.
+FACET_INDEX_MAX_AGE = int(os.environ.get('FACET_INDEX_MAX_AGE', '300'))
+
+# Per-owner cart summaries (petstoreapp/carts.py). They are written through on
+# every cart change, so with several web processes this must be a shared
+# backend (Redis, Memcached), or processes will serve each other stale carts.
+CART_CACHE_BACKEND = os.environ.get('CART_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES['carts'] = {
+    'BACKEND': CART_CACHE_BACKEND,
+    'LOCATION': os.environ.get('CART_CACHE_LOCATION', 'petstore-carts'),
+    'TIMEOUT': 1800,
+}
+
+# Users and profiles behind authenticated requests (petstoreapp/authentication.py).
+# With LocMem, saves clear only the local copy and the timeout bounds how stale
+# another process can be; point USER_CACHE_BACKEND at Redis or Memcached to
+# have every process see the change at once.
+USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES['users'] = {
+    'BACKEND': USER_CACHE_BACKEND,
+    'LOCATION': os.environ.get('USER_CACHE_LOCATION', 'petstore-users'),
+    'TIMEOUT': int(os.environ.get('USER_CACHE_TIMEOUT', '60')),
+}
+if USER_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['users']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+# Throttle buckets (petstoreapp/throttling.py). LocMem limits each process on
+# its own; point THROTTLE_CACHE_BACKEND at RedisCache or a Memcached backend to
+# share them (not FileBasedCache, whose incr is not atomic). Processes lease
+# this fraction of a bucket at a time from it.
+THROTTLE_CACHE_BACKEND = os.environ.get('THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES['throttle'] = {
+    'BACKEND': THROTTLE_CACHE_BACKEND,
+    'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'petstore-throttle'),
+}
+if THROTTLE_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['throttle']['OPTIONS'] = {'MAX_ENTRIES': 50000}
+THROTTLE_LEASE_FRACTION = float(os.environ.get('THROTTLE_LEASE_FRACTION', '0.1'))
+
+
+# Product search backend (petstoreapp/search.py). Unset picks FTS5 on SQLite
+# and the portable DatabaseSearchEngine elsewhere.
+# PRODUCT_SEARCH_ENGINE = 'petstoreapp.search.DatabaseSearchEngine'
+# Hits ranked per query; responses flag more with search_truncated
+PRODUCT_SEARCH_RESULT_LIMIT = int(os.environ.get('PRODUCT_SEARCH_RESULT_LIMIT', '200'))
+
+
+# Background jobs (petstoreapp/tasks.py), run by `manage.py run_worker`
+# processes. TASKS_INPROCESS_WORKER=on makes each web process drain the queue
+# itself after commit instead, which is handy for a development server but
+# competes with requests for SQLite's write lock. TASKS_EAGER runs every job
+# inline at commit, which suits tests.
+
+TASKS_INPROCESS_WORKER = os.environ.get('TASKS_INPROCESS_WORKER', 'off') == 'on'
+TASKS_EAGER = os.environ.get('TASKS_EAGER', 'off') == 'on'
+# Periodic tasks queued by the workers: {dotted path: seconds between runs}
+TASKS_PERIODIC = {
+    'petstoreapp.checkout.release_expired_reservations': 60,
+    'petstoreapp.order_archive.archive_old_orders': 24 * 60 * 60,
+    'petstoreapp.analytics.refresh_sales_rollups': 5 * 60,
+}
+
+# Delivered and cancelled orders older than this move to the archive tables
+# (petstoreapp/order_archive.py). Empty ORDER_ARCHIVE_AFTER_DAYS turns it off.
+ORDER_ARCHIVE_AFTER_DAYS = os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', '365')
+ORDER_ARCHIVE_AFTER_DAYS = int(ORDER_ARCHIVE_AFTER_DAYS) if ORDER_ARCHIVE_AFTER_DAYS else None
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Pet Store <no-reply@petstore.local>')
+
+
+# Request profiling (petstoreapp/profiling.py). Each request's timings go to
+# an in-process ring buffer (GET /api/admin/perf/) and to PERF_LOG_FILE, which
+# `manage.py perf_report` summarizes across processes. PERF_PROFILING=off
+# removes the middleware.
+
+PERF_PROFILING = os.environ.get('PERF_PROFILING', 'on') != 'off'
+PERF_LOG_FILE = os.environ.get('PERF_LOG_FILE', str(BASE_DIR / 'perf.log'))
+# `manage.py test` keeps its timings out of the project's log unless told otherwise
+if sys.argv[1:2] == ['test'] and 'PERF_LOG_FILE' not in os.environ:
+    PERF_LOG_FILE = os.path.join(tempfile.gettempdir(), 'petstore-test-perf.log')
+PERF_RING_SIZE = 5000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'bare': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'perf_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': PERF_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'bare',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'petstoreapp.perf': {
+            'handlers': ['perf_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -131,6 +384,16 @@ AUTH_USER_MODEL = 'petstoreapp.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media and built frontend assets are served by petstoreapp/media.py. Names
+# without a content hash are cached this long, then revalidated by ETag.
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', '3600'))
+# Hand file bodies to the front server: 'X-Accel-Redirect' (nginx, with an
+# internal location at MEDIA_SENDFILE_PREFIX aliased to /) or 'X-Sendfile'.
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER') or None
+MEDIA_SENDFILE_PREFIX = os.environ.get('MEDIA_SENDFILE_PREFIX', '/_sendfile')
+# `npm run build` output; `manage.py compress_assets` pre-compresses it
+FRONTEND_DIST_DIR = Path(os.environ.get('FRONTEND_DIST_DIR', BASE_DIR.parent.parent / 'FRONTEND' / 'dist'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
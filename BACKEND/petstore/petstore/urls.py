@@ -16,18 +16,22 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
-from django.conf.urls.static import static
 from django.conf import settings
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
+from petstoreapp import media
+from petstoreapp.views import CartMergingTokenView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('petstoreapp.urls')),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # login endpoint
+    path('api/token/', CartMergingTokenView.as_view(), name='token_obtain_pair'),  # login endpoint
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('petstoreapp.urls')),  # include your current router URLs
+    # Uploads and the built frontend's assets, with ETags, ranges and cache headers
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media.serve,
+         {'document_root': settings.MEDIA_ROOT, 'immutable': media.HASHED_MEDIA}),
+    path('assets/<path:path>', media.serve,
+         {'document_root': settings.FRONTEND_DIST_DIR / 'assets', 'immutable': media.HASHED_ASSET,
+          'precompressed': True}),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
      
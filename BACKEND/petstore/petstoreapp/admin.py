@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import (User,Product, PhoneNumber, Address, Category,Brand, ProductCategory,ProductImage,ProductAttribute,Variant,Cart,CartItem,Order, OrderItem, Payment,Review, BannerImage,UserProfile)
+from .models import (User,Product, PhoneNumber, Address, Category,Brand, ProductCategory,ProductImage,ProductAttribute,Variant,Cart,CartItem,Order, OrderItem, Payment,Review, BannerImage,UserProfile,
+                     DashboardSummary, ProductSales, StockReservation, CatalogImport,
+                     ProductRating, ReviewVote, Job, ArchivedOrder, ArchivedOrderItem,
+                     SalesRollup, SalesRollupDirtyDay)
 
 admin.site.register(User)
 admin.site.register(Product)
@@ -18,4 +21,15 @@ admin.site.register(OrderItem)
 admin.site.register(Payment)
 admin.site.register(Review)
 admin.site.register(BannerImage)  # Registering BannerImage model
-admin.site.register(UserProfile)  # Registering UserProfile model if it exists
\ No newline at end of file
+admin.site.register(UserProfile)  # Registering UserProfile model if it exists
+admin.site.register(DashboardSummary)
+admin.site.register(ProductSales)
+admin.site.register(ProductRating)
+admin.site.register(ReviewVote)
+admin.site.register(StockReservation)
+admin.site.register(CatalogImport)
+admin.site.register(Job)
+admin.site.register(ArchivedOrder)
+admin.site.register(ArchivedOrderItem)
+admin.site.register(SalesRollup)
+admin.site.register(SalesRollupDirtyDay)
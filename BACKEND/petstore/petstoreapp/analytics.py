@@ -0,0 +1,225 @@
+"""
+Sales analytics. SalesRollup holds each day's orders, units and revenue for
+the whole store and per product, brand, category and payment method, built
+from the live and archived order tables. Order, OrderItem and Payment
+signals mark the day they touch as dirty, and refresh_dirty_days() (run by
+`manage.py rollup_sales` and a periodic job) rebuilds only those days, with
+one GROUP BY query per dimension over all of them at once. A range query
+then sums at most one row per day and key.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .metrics import line_total
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, Brand, Category, Order, OrderItem, Payment, Product,
+    SalesRollup, SalesRollupDirtyDay,
+)
+from .tasks import task
+
+Dimension = SalesRollup.Dimension
+
+# ?bucket= value: truncation applied to the rollup day
+BUCKETS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+# Days rebuilt per transaction
+REFRESH_CHUNK_DAYS = 31
+
+# (orders, items, product path from an item, payment method path from an order)
+SOURCES = [
+    (Order, OrderItem, 'variant__product', 'payment__method'),
+    (ArchivedOrder, ArchivedOrderItem, 'product', 'payment_method'),
+]
+
+
+def _counted(days, prefix=''):
+    """Orders placed on `days` that count as sales; cancelled ones do not."""
+    start = timezone.make_aware(datetime.combine(min(days), time.min))
+    end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), time.min))
+    # The range keeps the placed_at index usable; the date list drops gaps
+    return Q(**{
+        f'{prefix}placed_at__gte': start,
+        f'{prefix}placed_at__lt': end,
+        f'{prefix}placed_at__date__in': list(days),
+    }) & ~Q(**{f'{prefix}status': Order.Status.CANCELLED})
+
+
+# ---------- Building ---------- #
+def compute_rollups(days):
+    """{(day, dimension, key): [orders, units, revenue]} for `days`, from both order tables."""
+    totals = defaultdict(lambda: [0, 0, Decimal('0')])
+
+    def add(rows, dimension, key_field=None, orders='orders', units=None, revenue='revenue'):
+        for row in rows:
+            key = row[key_field] if key_field else ''
+            if key is None:
+                continue
+            entry = totals[(row['day'], dimension, str(key))]
+            entry[0] += row[orders] if orders else 0
+            entry[1] += row[units] or 0 if units else 0
+            entry[2] += row[revenue] or Decimal('0') if revenue else Decimal('0')
+
+    for order_model, item_model, product, payment in SOURCES:
+        orders = order_model.objects.filter(_counted(days)).annotate(day=TruncDate('placed_at')).order_by()
+        items = item_model.objects.filter(_counted(days, 'order__')).annotate(
+            day=TruncDate('order__placed_at')
+        ).order_by()
+
+        # Store and payment method: order counts and totals from orders, units from items
+        add(orders.values('day').annotate(orders=Count('pk'), revenue=Sum('total_amount')), Dimension.TOTAL)
+        add(items.values('day').annotate(units=Sum('quantity')), Dimension.TOTAL,
+            orders=None, units='units', revenue=None)
+        add(orders.values('day', method=F(payment)).annotate(orders=Count('pk'), revenue=Sum('total_amount')),
+            Dimension.PAYMENT, 'method')
+        add(items.values('day', method=F(f'order__{payment}')).annotate(units=Sum('quantity')),
+            Dimension.PAYMENT, 'method', orders=None, units='units', revenue=None)
+
+        # Catalog dimensions: everything from the lines
+        for dimension, path in (
+            (Dimension.PRODUCT, product),
+            (Dimension.BRAND, f'{product}__brand'),
+            (Dimension.CATEGORY, f'{product}__categories'),
+        ):
+            rows = items.values('day', key=F(path)).annotate(
+                orders=Count('order', distinct=True), units=Sum('quantity'), revenue=Sum(line_total()),
+            )
+            add(rows, dimension, 'key', units='units')
+    return totals
+
+
+def refresh_days(days):
+    """Rebuild every SalesRollup row for `days` in one transaction."""
+    days = sorted(set(days))
+    if not days:
+        return
+    with transaction.atomic():
+        # Cleared first: a change committed while this runs marks its day again
+        SalesRollupDirtyDay.objects.filter(day__in=days).delete()
+        rows = compute_rollups(days)
+        SalesRollup.objects.filter(day__in=days).delete()
+        SalesRollup.objects.bulk_create(
+            [
+                SalesRollup(day=day, dimension=dimension, key=key, orders=orders, units=units, revenue=revenue)
+                for (day, dimension, key), (orders, units, revenue) in rows.items()
+            ],
+            batch_size=1000,
+        )
+
+
+def refresh_dirty_days(chunk=REFRESH_CHUNK_DAYS):
+    """Rebuild the days marked dirty; returns how many were rebuilt."""
+    rebuilt = 0
+    while True:
+        days = list(SalesRollupDirtyDay.objects.order_by('day').values_list('day', flat=True)[:chunk])
+        if not days:
+            return rebuilt
+        refresh_days(days)
+        rebuilt += len(days)
+
+
+def rebuild_rollups(chunk=REFRESH_CHUNK_DAYS):
+    """Rebuild every day that has orders in either table; returns the number of days."""
+    first, last = None, None
+    for model in (Order, ArchivedOrder):
+        span = model.objects.aggregate(first=Min('placed_at'), last=Max('placed_at'))
+        if span['first']:
+            first = min(filter(None, [first, timezone.localdate(span['first'])]))
+            last = max(filter(None, [last, timezone.localdate(span['last'])]))
+    if first is None:
+        SalesRollup.objects.all().delete()
+        return 0
+    SalesRollup.objects.exclude(day__range=(first, last)).delete()
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    for index in range(0, len(days), chunk):
+        refresh_days(days[index:index + chunk])
+    return len(days)
+
+
+def mark_dirty(placed_at):
+    SalesRollupDirtyDay.objects.bulk_create(
+        [SalesRollupDirtyDay(day=timezone.localdate(placed_at))], ignore_conflicts=True,
+    )
+
+
+def mark_order_dirty(order_id):
+    placed_at = Order.objects.filter(pk=order_id).values_list('placed_at', flat=True).first()
+    if placed_at:
+        mark_dirty(placed_at)
+
+
+@task(max_attempts=1)
+def refresh_sales_rollups():
+    """Periodic job: bring the rollups up to date with the dirty days."""
+    return refresh_dirty_days()
+
+
+# ---------- Reporting ---------- #
+def _names(dimension, keys):
+    ids = [int(key) for key in keys if key.isdigit()]
+    if dimension == Dimension.PRODUCT:
+        return {str(pk): name for pk, name in Product.objects.filter(pk__in=ids).values_list('pk', 'name')}
+    if dimension == Dimension.BRAND:
+        return {str(pk): name for pk, name in Brand.objects.filter(pk__in=ids).values_list('pk', 'name')}
+    if dimension == Dimension.CATEGORY:
+        return {
+            str(pk): full_path or name
+            for pk, name, full_path in Category.objects.filter(pk__in=ids).values_list('pk', 'name', 'full_path')
+        }
+    if dimension == Dimension.PAYMENT:
+        return {value: str(label) for value, label in Payment.Method.choices}
+    return {'': 'All sales'}
+
+
+def _figures(row):
+    return {
+        'orders': row['orders'] or 0,
+        'units': row['units'] or 0,
+        'revenue': str((row['revenue'] or Decimal('0')).quantize(Decimal('0.01'))),
+    }
+
+
+def sales_report(start, end, bucket='day', dimension=Dimension.TOTAL, limit=10):
+    """
+    Orders, units and revenue per `bucket` between `start` and `end`
+    (inclusive). For a catalog or payment dimension, the `limit` keys with
+    the most revenue in the range each get their own series.
+    """
+    rows = SalesRollup.objects.filter(dimension=dimension, day__gte=start, day__lte=end)
+    if dimension != Dimension.TOTAL:
+        top = (
+            rows.values('key').annotate(total=Sum('revenue')).order_by('-total', 'key')
+            .values_list('key', flat=True)[:limit]
+        )
+        rows = rows.filter(key__in=list(top))
+    truncate = BUCKETS[bucket]
+    series = (
+        rows.annotate(period=truncate('day') if truncate else F('day'))
+        .values('period', 'key')
+        .annotate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('period', 'key')
+    )
+    totals = list(
+        rows.values('key').annotate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('-revenue', 'key')
+    )
+    names = _names(dimension, [row['key'] for row in totals])
+    return {
+        'from': start,
+        'to': end,
+        'bucket': bucket,
+        'by': dimension,
+        'totals': [{'key': row['key'], 'name': names.get(row['key']), **_figures(row)} for row in totals],
+        'results': [
+            {'period': row['period'], 'key': row['key'], 'name': names.get(row['key']), **_figures(row)}
+            for row in series
+        ],
+    }
@@ -0,0 +1,224 @@
+"""
+Async versions of the hot catalog reads, mounted under /api/async/. Under
+ASGI (petstore/asgi.py) they run on the event loop and read through Django's
+async ORM; they share the catalog response cache and payload shapes with the
+sync views. /api/async/home/ gathers banner, featured products and top-level
+categories concurrently.
+
+Every view goes through @api_checks first, which runs DRF's authentication
+and the default throttles exactly as the sync views do.
+"""
+import asyncio
+import base64
+import binascii
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from .bootstrap import FEATURED_PRODUCTS, featured_products
+from .cache import (
+    anamespace_versions, build_cache_entry, catalog_cache, conditional_json_response, response_cache_key,
+)
+from .listing import CARD_FIELDS, EncoderContext, compact_rows, compile_encoder, parse_fields
+from .models import BannerImage, Brand, Category, Product
+from .query_planner import product_query_planner, readable_field_names
+from .serializers import BannerImageSerializer, BrandSerializer, CategorySerializer, ProductSerializer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class NotFound(Exception):
+    pass
+
+
+async def cached_json(request, namespaces, build, last_modified_field=None):
+    """Async counterpart of CachedResponseMixin: `build` is awaited only on a miss."""
+    versions = await anamespace_versions(namespaces)
+    key = response_cache_key(request.build_absolute_uri(), versions)
+    cache = catalog_cache()
+    entry = await cache.aget(key)
+    if entry is None:
+        try:
+            data = await build()
+        except NotFound as exc:
+            return JsonResponse({'detail': str(exc)}, status=404)
+        entry = build_cache_entry(data, versions, last_modified_field)
+        await cache.aset(key, entry)
+    return conditional_json_response(request, entry)
+
+
+# ---------- Authentication and throttling ---------- #
+class PublicReadView(APIView):
+    """Stand-in APIView whose initial() runs the DRF checks for a public async read."""
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+
+
+def check_request(request):
+    """DRF authentication, permissions and throttles for `request`; the error response, or None to go on."""
+    view = PublicReadView()
+    view.args, view.kwargs = (), {}
+    drf_request = view.initialize_request(request)
+    view.request = drf_request
+    view.headers = view.default_response_headers
+    try:
+        view.initial(drf_request)
+    except Exception as exc:
+        response = view.finalize_response(drf_request, view.handle_exception(exc))
+        return response.render()
+    return None
+
+
+def api_checks(view_func):
+    """Run check_request (in the sync thread: the user cache and throttle locks are sync) before the view."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        denied = await sync_to_async(check_request)(request)
+        if denied is not None:
+            return denied
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+# ---------- Building blocks ---------- #
+def _encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(value):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(value.encode()).decode().rsplit('|', 1)
+        created_at, pk = parse_datetime(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return (created_at, pk) if created_at else None
+
+
+def _page_size(params):
+    try:
+        return max(1, min(int(params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+
+
+async def product_cards(request, queryset, fields, limit):
+    rows = [row async for row in compact_rows(queryset, fields, ['created_at', 'id'])[:limit]]
+    return rows, compile_encoder(fields)(rows, EncoderContext(request))
+
+
+async def full_products(request, queryset, limit):
+    context = {'request': request}
+    planned = product_query_planner.plan(queryset, readable_field_names(ProductSerializer(context=context)))
+    products = [product async for product in planned[:limit]]
+    rows = [{'created_at': p.created_at, 'id': p.pk} for p in products]
+    return rows, ProductSerializer(products, many=True, context=context).data
+
+
+async def banner_data(request):
+    banner = await BannerImage.objects.afirst()
+    return BannerImageSerializer(banner, context={'request': request}).data
+
+
+async def category_data(queryset):
+    return CategorySerializer([category async for category in queryset], many=True).data
+
+
+# ---------- Views ---------- #
+@require_GET
+@api_checks
+async def product_list(request):
+    """
+    Newest products first, keyset paginated (?cursor=, ?page_size=). Takes
+    ?view=card and ?fields= like the sync list; filters stay on /api/product/.
+    """
+    try:
+        fields = parse_fields(request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    cursor = _decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    if request.GET.get('cursor') and cursor is None:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    async def build():
+        page_size = _page_size(request.GET)
+        queryset = Product.objects.order_by('-created_at', '-pk')
+        if cursor:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        if fields:
+            rows, results = await product_cards(request, queryset, fields, page_size + 1)
+        else:
+            rows, results = await full_products(request, queryset, page_size + 1)
+
+        next_url = None
+        if len(rows) > page_size:
+            params = request.GET.copy()
+            params['cursor'] = _encode_cursor(rows[page_size - 1])
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        return {'next': next_url, 'previous': None, 'results': results[:page_size]}
+
+    return await cached_json(request, ('product',), build, 'updated_at')
+
+
+@require_GET
+@api_checks
+async def product_detail(request, pk):
+    async def build():
+        context = {'request': request}
+        planned = product_query_planner.plan(
+            Product.objects.all(), readable_field_names(ProductSerializer(context=context))
+        )
+        try:
+            product = await planned.aget(pk=pk)
+        except Product.DoesNotExist:
+            raise NotFound("No Product matches the given query.")
+        return ProductSerializer(product, context=context).data
+
+    return await cached_json(request, ('product',), build, 'updated_at')
+
+
+@require_GET
+@api_checks
+async def banner(request):
+    return await cached_json(request, ('banner',), lambda: banner_data(request))
+
+
+@require_GET
+@api_checks
+async def category_list(request):
+    """Every category as one array, like /api/category/?stream=1."""
+    return await cached_json(request, ('category',), lambda: category_data(Category.objects.all()))
+
+
+@require_GET
+@api_checks
+async def brand_list(request):
+    """Every brand as one array, like /api/brand/?stream=1."""
+    async def build():
+        return BrandSerializer([brand async for brand in Brand.objects.all()], many=True).data
+
+    return await cached_json(request, ('brand',), build)
+
+
+@require_GET
+@api_checks
+async def home(request):
+    """Banner, featured products and top-level categories, fetched concurrently."""
+    async def build():
+        banner_payload, (_, products), categories = await asyncio.gather(
+            banner_data(request),
+            product_cards(request, featured_products(), CARD_FIELDS, FEATURED_PRODUCTS),
+            category_data(Category.objects.filter(parent__isnull=True)),
+        )
+        return {'banner': banner_payload, 'featured': products, 'categories': categories}
+
+    return await cached_json(request, ('banner', 'product', 'category'), build)
@@ -0,0 +1,146 @@
+"""
+JWT authentication without a user query per request. Access tokens carry the
+user's username, staff flags and roles as signed claims, stamped from the
+database when the token pair is issued or refreshed. For safe methods
+ClaimsJWTAuthentication builds request.user from those claims alone; any
+other column read from it is loaded on first access. Unsafe methods, and
+tokens issued without claims, load the user and profile through a short-TTL
+per-process cache that User and UserProfile changes clear.
+
+Claims are trusted until the access token expires, so a role change or
+deactivation reaches read-only endpoints within ACCESS_TOKEN_LIFETIME. The
+cache is per process unless USER_CACHE_BACKEND names a shared one: a save
+clears only the saving process's copy, and the others catch up within
+USER_CACHE_TIMEOUT.
+
+An expired or otherwise invalid token on a view open to everyone is ignored
+and the request served anonymously, so a stale token in a browser does not
+break public pages; views that need a user still answer 401.
+"""
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS, AllowAny
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+# Alias in settings.CACHES; keep its TIMEOUT short unless the backend is shared
+USER_CACHE = 'users'
+
+# User columns copied into access tokens
+CLAIM_FIELDS = ('username', 'is_active', 'is_staff', 'is_superuser', 'is_customer', 'is_seller')
+
+
+def user_cache():
+    return caches[USER_CACHE]
+
+
+def _user_key(user_id):
+    return f'user:{user_id}'
+
+
+# ---------- User cache ---------- #
+def load_user(user_id):
+    """The user with their profile joined, from the cache when fresh; None if there is no such user."""
+    if user_id is None:
+        return None
+    key = _user_key(user_id)
+    user = user_cache().get(key)
+    if user is None:
+        user = User.objects.select_related('userprofile').filter(pk=user_id).first()
+        if user is not None:
+            user_cache().set(key, user)
+    return user
+
+
+def forget_user(user_id):
+    transaction.on_commit(lambda: user_cache().delete(_user_key(user_id)))
+
+
+# ---------- Tokens ---------- #
+def user_claims(user):
+    return {field: getattr(user, field) for field in CLAIM_FIELDS}
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's current claims."""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = load_user(self.payload.get(api_settings.USER_ID_CLAIM))
+        if user is not None:
+            access.payload.update(user_claims(user))
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+# ---------- Authentication ---------- #
+def claims_user(validated_token):
+    """A User built from the token's claims; columns not in the token are deferred."""
+    values = {
+        'id': int(validated_token[api_settings.USER_ID_CLAIM]),
+        **{field: validated_token[field] for field in CLAIM_FIELDS},
+    }
+    # from_db takes the loaded values in model field order
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(router.db_for_read(User), field_names, [values[name] for name in field_names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Bearer-token authentication that trusts the token's claims on safe
+    methods and reads the user through the user cache otherwise.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            validated_token = self.get_validated_token(raw_token)
+        except InvalidToken:
+            if self.is_public(request):
+                return None
+            raise
+        if request.method in SAFE_METHODS and all(field in validated_token for field in CLAIM_FIELDS):
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_("Token contained no recognizable user identification"))
+            user = claims_user(validated_token)
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            return user, validated_token
+        return self.get_user(validated_token), validated_token
+
+    def is_public(self, request):
+        """Whether the view being served lets anyone in, so a bad token can be ignored."""
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        return view is not None and all(isinstance(permission, AllowAny) for permission in view.get_permissions())
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = load_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,243 @@
+"""
+Helpers shared by the benchmark management commands: a throwaway database so
+runs never touch db.sqlite3, synthetic catalog and store seeders, a
+subprocess server runner and latency stats.
+"""
+import os
+import random
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from .models import (
+    Address, BannerImage, Brand, Category, Order, OrderItem, Payment, Product,
+    ProductAttribute, ProductCategory, ProductImage, Review, User, Variant,
+)
+from .stats import percentile
+
+ADJECTIVES = [
+    "premium", "organic", "grain-free", "crunchy", "soft", "deluxe", "natural",
+    "squeaky", "durable", "gentle", "hypoallergenic", "classic", "chewy", "fluffy",
+]
+NOUNS = [
+    "kibble", "treats", "biscuits", "shampoo", "brush", "collar", "leash", "bed",
+    "scratcher", "ball", "rope", "bowl", "litter", "harness", "blanket", "feeder",
+]
+PETS = ["Dogs", "Cats", "Birds", "Fish", "Rabbits", "Hamsters"]
+DEPARTMENTS = ["Food", "Toys", "Grooming", "Health", "Beds"]
+SHELVES = ["Everyday", "Special"]
+COLORS = ["Red", "Blue", "Green", "Black", "White", "Pink"]
+SIZES = ["Small", "Medium", "Large"]
+CITIES = ["Kathmandu", "Pokhara", "Lalitpur", "Biratnagar", "Dharan"]
+BENCH_PASSWORD = "bench-pass-123"
+
+
+@contextmanager
+def throwaway_database(verbosity=0, on_disk=False):
+    """
+    Run the block against a freshly migrated test database, with throttling
+    off since benchmark traffic all comes from one client. Pass on_disk for
+    multi-threaded runs: SQLite's shared in-memory database locks whole
+    tables and does not honour the busy timeout.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if on_disk and connection.vendor == 'sqlite':
+        test_settings['NAME'] = os.path.join(tempfile.mkdtemp(prefix='petstore-bench-'), 'bench.sqlite3')
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        with override_settings(THROTTLE_ENABLED=False):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+        teardown_test_environment()
+
+
+def seed_catalog(products=1000, brands=40, batch_size=2000, seed=0):
+    """
+    Bulk-create a synthetic catalog: brands, a three-level category tree and
+    products with variants, images and attributes. bulk_create skips signals,
+    so callers rebuild derived indexes themselves.
+    """
+    rng = random.Random(seed)
+    brand_rows = Brand.objects.bulk_create(
+        [Brand(name=f"Brand {i:03d}", description="Synthetic brand") for i in range(brands)]
+    )
+
+    leaves = []
+    for pet in PETS:
+        root = Category.objects.create(name=pet)
+        for department in DEPARTMENTS:
+            middle = Category.objects.create(name=f"{pet} {department}", parent=root)
+            for shelf in SHELVES:
+                leaves.append(Category.objects.create(name=f"{pet} {department} {shelf}", parent=middle))
+
+    created = 0
+    while created < products:
+        count = min(batch_size, products - created)
+        rows = []
+        for i in range(created, created + count):
+            words = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+            rows.append(Product(
+                sku=f"SKU-{i:07d}",
+                name=f"{words.title()} {i}",
+                description=f"{words} for happy pets, {rng.choice(ADJECTIVES)} and {rng.choice(ADJECTIVES)}.",
+                brand=rng.choice(brand_rows),
+                price=Decimal(rng.randint(199, 9999)) / 100,
+                stock=rng.randint(0, 200),
+            ))
+        batch = Product.objects.bulk_create(rows)
+
+        ProductCategory.objects.bulk_create(
+            [ProductCategory(product=p, category=rng.choice(leaves)) for p in batch]
+        )
+        ProductAttribute.objects.bulk_create(
+            [ProductAttribute(product=p, name="Color", value=rng.choice(COLORS)) for p in batch]
+        )
+        ProductImage.objects.bulk_create(
+            [ProductImage(product=p, image_url="productImages/placeholder.jpg", sort_order=0) for p in batch]
+        )
+        Variant.objects.bulk_create([
+            Variant(
+                product=p, label=size, price=p.price, stock_quantity=rng.randint(0, 50),
+                weight_kg=Decimal(rng.randint(1, 20)) / 2,
+            )
+            for p in batch for size in rng.sample(SIZES, 2)
+        ])
+        created += count
+    return {"products": created, "brands": brands, "categories": Category.objects.count()}
+
+
+def seed_store(products=1000, users=200, orders=1000, reviews=2000, batch_size=2000, seed=0):
+    """
+    seed_catalog plus the rest of a store: customers with addresses (all
+    sharing BENCH_PASSWORD), orders with items and payments, reviews and a
+    banner. Like seed_catalog it bulk-creates, so derived indexes are left
+    to the caller.
+    """
+    rng = random.Random(seed)
+    counts = seed_catalog(products=products, batch_size=batch_size, seed=seed)
+
+    # One hash for everyone: hashing per user would dominate seeding time
+    password = make_password(BENCH_PASSWORD)
+    customers = User.objects.bulk_create(
+        [User(username=f"customer{i:05d}", email=f"customer{i:05d}@example.com", password=password, is_customer=True)
+         for i in range(users)],
+        batch_size=batch_size,
+    )
+    addresses = Address.objects.bulk_create(
+        [Address(user=user, line1=f"{i} Main St", city=rng.choice(CITIES), state="Bagmati", is_default=True)
+         for i, user in enumerate(customers)],
+        batch_size=batch_size,
+    )
+
+    variants = list(Variant.objects.values_list("pk", "price"))
+    created = 0
+    while created < orders:
+        count = min(batch_size, orders - created)
+        lines = []
+        for _ in range(count):
+            picked = rng.sample(variants, rng.randint(1, 3))
+            lines.append([(pk, price, rng.randint(1, 3)) for pk, price in picked])
+        owners = [rng.randrange(users) for _ in range(count)]
+        batch = Order.objects.bulk_create([
+            Order(
+                user=customers[owner], shipping_addr=addresses[owner],
+                status=rng.choice(Order.Status.values),
+                total_amount=sum((price * quantity for _, price, quantity in items), Decimal("0")),
+            )
+            for owner, items in zip(owners, lines)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, variant_id=pk, quantity=quantity, unit_price=price)
+            for order, items in zip(batch, lines) for pk, price, quantity in items
+        ])
+        Payment.objects.bulk_create(
+            [Payment(order=order, method=rng.choice(Payment.Method.values)) for order in batch]
+        )
+        created += count
+
+    product_ids = list(Product.objects.values_list("pk", flat=True))
+    pairs = set()
+    while len(pairs) < min(reviews, len(product_ids) * users):
+        pairs.add((rng.choice(product_ids), rng.randrange(users)))
+    Review.objects.bulk_create(
+        [Review(product_id=product_id, user=customers[owner], rating=rng.randint(1, 5),
+                title=f"{rng.choice(ADJECTIVES).title()}!", comment=f"My pet loves this {rng.choice(NOUNS)}.")
+         for product_id, owner in pairs],
+        batch_size=batch_size,
+    )
+    BannerImage.objects.bulk_create([BannerImage(image="banners/dog.jpg", alt_text="Benchmark banner")])
+    counts.update({"users": users, "orders": orders, "reviews": len(pairs)})
+    return counts
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_subprocess(command, env, cwd, probe_path="/api/brand/", timeout=30):
+    """
+    Run a server command ("{port}" is filled in with a free port) and yield
+    its base URL once `probe_path` answers. The process is stopped on exit.
+    """
+    port = free_port()
+    command = [part.format(port=port) for part in command]
+    env = dict(env, THROTTLE="off")
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(base_url + probe_path, timeout=5) as response:
+                    response.read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Server did not start: {' '.join(command)}")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def timed(func, *args, **kwargs):
+    """Call `func` and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def latency_summary(samples):
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<28} n={summary['count']:<6} mean={summary['mean']:8.2f}ms "
+        f"p50={summary['p50']:8.2f}ms p95={summary['p95']:8.2f}ms p99={summary['p99']:8.2f}ms"
+    )
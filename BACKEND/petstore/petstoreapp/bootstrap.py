@@ -0,0 +1,28 @@
+"""
+The storefront's first-paint document: banners, featured products, top-level
+categories and brands in one response. It costs four queries whatever the
+catalog size and is cached as a single entry under every namespace it reads,
+so a change to any part rebuilds the whole document on the next request.
+"""
+from .listing import EncoderContext, compact_rows, compile_encoder
+from .models import BannerImage, Brand, Category, Product
+from .serializers import BannerImageSerializer, BrandSerializer, CategorySerializer
+
+BOOTSTRAP_NAMESPACES = ('banner', 'product', 'category', 'brand')
+FEATURED_PRODUCTS = 8
+FEATURED_FIELDS = ('id', 'name', 'price', 'main_image_url', 'main_image_srcset')
+
+
+def featured_products():
+    return Product.objects.filter(is_active=True).order_by('-created_at', '-pk')
+
+
+def build_bootstrap(request):
+    context = {'request': request}
+    featured = list(compact_rows(featured_products(), FEATURED_FIELDS)[:FEATURED_PRODUCTS])
+    return {
+        'banners': BannerImageSerializer(BannerImage.objects.all(), many=True, context=context).data,
+        'featured': compile_encoder(FEATURED_FIELDS)(featured, EncoderContext(request)),
+        'categories': CategorySerializer(Category.objects.filter(parent__isnull=True), many=True).data,
+        'brands': BrandSerializer(Brand.objects.order_by('name'), many=True).data,
+    }
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+# Alias in settings.CACHES. The backend is pluggable (locmem, file, Redis);
+# locmem evicts least-recently-used entries once MAX_ENTRIES is reached.
+# Versions only invalidate the processes that share the backend: with
+# several workers on locmem, the others serve stale entries until TIMEOUT.
+CATALOG_CACHE = 'catalog'
+
+# Which cached namespaces a model change makes stale. Product responses nest
+# brands, images, attributes, variants and category ids.
+INVALIDATES = {
+    'Product': ('product',),
+    'Variant': ('product',),
+    'ProductImage': ('product',),
+    'ProductAttribute': ('product',),
+    'ProductCategory': ('product',),
+    'Brand': ('brand', 'product'),
+    'Category': ('category', 'product'),
+    'BannerImage': ('banner',),
+}
+
+
+def catalog_cache():
+    return caches[CATALOG_CACHE]
+
+
+def _version_key(namespace):
+    return f'catalog:version:{namespace}'
+
+
+def namespace_versions(namespaces):
+    """
+    Current version of each namespace. A version is the time it was last
+    invalidated, so it doubles as the namespace's Last-Modified. A version
+    that was evicted is simply restarted, which also drops its entries.
+    """
+    cache = catalog_cache()
+    keys = {_version_key(ns): ns for ns in namespaces}
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def anamespace_versions(namespaces):
+    """namespace_versions() for async views."""
+    cache = catalog_cache()
+    keys = {_version_key(ns): ns for ns in namespaces}
+    versions = await cache.aget_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def response_cache_key(uri, versions):
+    raw = '|'.join([uri, *map(repr, versions)])
+    return 'catalog:response:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _payload_timestamps(data, field):
+    if isinstance(data, dict) and 'results' in data:
+        rows = data['results']
+    elif isinstance(data, list):
+        rows = data
+    else:
+        rows = [data]
+    for row in rows:
+        value = row.get(field) if isinstance(row, dict) else None
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed:
+            yield parsed.timestamp()
+
+
+def build_cache_entry(data, versions, last_modified_field=None):
+    """(rendered JSON, ETag, Last-Modified) for a response payload."""
+    content = JSONRenderer().render(data)
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    last_modified = max(versions, default=time.time())
+    if last_modified_field:
+        for stamp in _payload_timestamps(data, last_modified_field):
+            last_modified = max(last_modified, stamp)
+    return content, etag, int(last_modified)
+
+
+def conditional_json_response(request, entry):
+    """Serve a cache entry as JSON, or a 304 when the client's copy is current."""
+    content, etag, last_modified = entry
+    response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def invalidate(*namespaces):
+    """
+    Bump the namespaces' versions once the current transaction commits.
+    Bumping earlier would let a concurrent read cache the old rows under
+    the new version.
+    """
+    transaction.on_commit(
+        lambda: catalog_cache().set_many({_version_key(ns): time.time() for ns in namespaces}, timeout=None)
+    )
+
+
+def invalidate_for_model(model):
+    namespaces = INVALIDATES.get(model.__name__)
+    if namespaces:
+        invalidate(*namespaces)
+
+
+class CachedResponseMixin:
+    """
+    Read-through cache for GET handlers. The rendered JSON is stored under a
+    key built from the request URL and the versions of `cache_namespaces`, and
+    is served with an ETag and Last-Modified so clients can revalidate with a
+    304. `cache_last_modified_field` names a timestamp in the payload (e.g.
+    'updated_at') that may push Last-Modified past the namespace version.
+    """
+    cache_namespaces = ()
+    cache_last_modified_field = None
+    cache_timeout = None  # the alias's TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        versions = namespace_versions(self.cache_namespaces)
+        key = self.get_cache_key(request, versions)
+        cache = catalog_cache()
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            # Streams, errors and redirects go straight through
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            entry = self.build_cache_entry(response.data, versions)
+            if self.cache_timeout is None:
+                cache.set(key, entry)
+            else:
+                cache.set(key, entry, self.cache_timeout)
+
+        if request.accepted_renderer.format == 'json':
+            return conditional_json_response(request, entry)
+        content, etag, last_modified = entry
+        response = Response(json.loads(content))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified, response=response
+        )
+
+    def get_cache_key(self, request, versions):
+        return response_cache_key(request.build_absolute_uri(), versions)
+
+    def build_cache_entry(self, data, versions):
+        return build_cache_entry(data, versions, self.cache_last_modified_field)
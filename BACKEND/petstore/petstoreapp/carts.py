@@ -0,0 +1,256 @@
+"""
+Cart service. Each Cart row carries a running item count and subtotal,
+rewritten in the same transaction as any change to its items, and the open
+cart's summary is cached per owner (user id, or cart token for anonymous
+shoppers). A cart read is one cache hit; a bulk change locks the cart once,
+writes all its lines and returns the summary it leaves in the cache.
+
+Each owner also has a version in the cache, reset on every committed change.
+A summary is stored with the version it was built under and only served
+while that is still current, so a read that raced a change cannot leave the
+old summary behind.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Cart, CartItem, StockReservation, Variant
+from .tasks import task
+
+# Alias in settings.CACHES; it must be shared across processes in production
+CART_CACHE = 'carts'
+SUMMARY_TIMEOUT = 30 * 60
+
+ADD, SET, REMOVE = 'add', 'set', 'remove'
+OPERATIONS = (ADD, SET, REMOVE)
+MAX_OPERATIONS = 100
+
+
+class CartError(Exception):
+    """A cart change that cannot be applied; nothing was written."""
+
+
+def cart_cache():
+    return caches[CART_CACHE]
+
+
+def _user_key(user_id):
+    return f'cart:user:{user_id}'
+
+
+def _token_key(token):
+    return f'cart:token:{token}'
+
+
+def _owner_key(cart):
+    return _user_key(cart.user_id) if cart.user_id else _token_key(cart.token)
+
+
+def _version_key(key):
+    return f'{key}:version'
+
+
+def new_version():
+    # Wall-clock, so a version lost to eviction is never reissued
+    return time.time_ns()
+
+
+def empty_summary():
+    return {'id': None, 'token': None, 'item_count': 0, 'subtotal': '0.00', 'updated_at': None, 'items': []}
+
+
+# ---------- Totals ---------- #
+def recalculate(cart_id):
+    """Rewrite a cart's item count and subtotal from its items."""
+    totals = CartItem.objects.filter(cart_id=cart_id).aggregate(
+        item_count=Coalesce(Sum('quantity'), 0),
+        subtotal=Coalesce(
+            Sum(F('quantity') * F('variant__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Decimal('0'),
+        ),
+    )
+    Cart.objects.filter(pk=cart_id).update(updated_at=timezone.now(), **totals)
+    return totals
+
+
+def items_changed(cart_id):
+    recalculate(cart_id)
+    forget(*Cart.objects.filter(pk=cart_id).only('user', 'token'))
+
+
+@task(max_attempts=3, retry_delay=10)
+def recalculate_for_variant(variant_id):
+    """A price change moves the subtotal of every open cart holding the variant."""
+    cart_ids = list(
+        CartItem.objects.filter(variant_id=variant_id, cart__is_active=True).values_list('cart_id', flat=True)
+    )
+    for cart_id in cart_ids:
+        recalculate(cart_id)
+    forget(*Cart.objects.filter(pk__in=cart_ids).only('user', 'token'))
+
+
+# ---------- Summaries ---------- #
+def build_summary(cart):
+    cart.refresh_from_db(fields=['item_count', 'subtotal', 'updated_at'])
+    items = (
+        CartItem.objects.filter(cart=cart)
+        .order_by('pk')
+        .values('variant_id', 'variant__product_id', 'variant__product__name', 'variant__label',
+                'variant__price', 'quantity')
+    )
+    return {
+        'id': cart.pk,
+        'token': str(cart.token) if not cart.user_id else None,
+        'item_count': cart.item_count,
+        'subtotal': str(cart.subtotal),
+        'updated_at': cart.updated_at.isoformat(),
+        'items': [
+            {
+                'variant': item['variant_id'],
+                'product': item['variant__product_id'],
+                'name': item['variant__product__name'],
+                'label': item['variant__label'],
+                'price': str(item['variant__price']),
+                'quantity': item['quantity'],
+                'line_total': str(item['variant__price'] * item['quantity']),
+            }
+            for item in items
+        ],
+    }
+
+
+def open_cart(user=None, token=None, create=False, lock=False):
+    """The owner's active cart: the user's when signed in, else the one `token` names."""
+    carts = Cart.objects.filter(is_active=True)
+    if lock:
+        carts = carts.select_for_update()
+    if user is not None:
+        cart = carts.filter(user=user).order_by('-pk').first()
+        if cart is None and create:
+            with transaction.atomic():
+                # Concurrent first adds queue on the user's row, then find the cart the first one made
+                list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+                cart = carts.filter(user=user).order_by('-pk').first() or Cart.objects.create(user=user)
+        return cart
+    cart = carts.filter(token=token, user__isnull=True).first() if token else None
+    if cart is None and create:
+        cart = Cart.objects.create()
+    return cart
+
+
+def get_summary(user=None, token=None):
+    if user is None and not token:
+        return empty_summary()
+    key = _user_key(user.pk) if user is not None else _token_key(token)
+    cached = cart_cache().get_many([key, _version_key(key)])
+    version = cached.get(_version_key(key))
+    if version is None:
+        cart_cache().add(_version_key(key), new_version(), None)
+        version = cart_cache().get(_version_key(key))
+    entry = cached.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    cart = open_cart(user, token)
+    summary = build_summary(cart) if cart else empty_summary()
+    if user is not None or cart:
+        # Built under `version`: a change committed meanwhile has moved it on
+        cart_cache().set(key, (version, summary), SUMMARY_TIMEOUT)
+    return summary
+
+
+def remember(cart, summary):
+    """Cache `summary` for the cart's owner once the transaction commits."""
+    def store():
+        key, version = _owner_key(cart), new_version()
+        cart_cache().set_many({_version_key(key): version}, None)
+        cart_cache().set(key, (version, summary), SUMMARY_TIMEOUT)
+    transaction.on_commit(store)
+
+
+def forget(*carts):
+    keys = [_owner_key(cart) for cart in carts]
+    if keys:
+        transaction.on_commit(lambda: cart_cache().set_many({_version_key(key): new_version() for key in keys}, None))
+
+
+# ---------- Changes ---------- #
+def apply_operations(cart, operations):
+    """
+    Apply [{'op': 'add'|'set'|'remove', 'variant': id, 'quantity': n}, ...]
+    to `cart` in one transaction and return its new summary. `add` adds to
+    the quantity already in the cart; `set` to 0 removes the line.
+    """
+    if len(operations) > MAX_OPERATIONS:
+        raise CartError(f"At most {MAX_OPERATIONS} operations per request.")
+    variant_ids = {op['variant'] for op in operations}
+    with transaction.atomic():
+        # One writer per cart at a time
+        Cart.objects.select_for_update().filter(pk=cart.pk).values_list('pk', flat=True).get()
+        found = set(Variant.objects.filter(pk__in=variant_ids).values_list('pk', flat=True))
+        if variant_ids - found:
+            raise CartError(f"Unknown variant(s): {', '.join(map(str, sorted(variant_ids - found)))}.")
+
+        lines = {item.variant_id: item for item in CartItem.objects.filter(cart=cart, variant_id__in=variant_ids)}
+        quantities = {variant_id: item.quantity for variant_id, item in lines.items()}
+        for op in operations:
+            current = quantities.get(op['variant'], 0)
+            quantities[op['variant']] = {
+                ADD: current + op.get('quantity', 1),
+                SET: op.get('quantity', 0),
+                REMOVE: 0,
+            }[op['op']]
+
+        created, updated, removed = [], [], []
+        for variant_id, quantity in quantities.items():
+            item = lines.get(variant_id)
+            if item is None:
+                if quantity > 0:
+                    created.append(CartItem(cart=cart, variant_id=variant_id, quantity=quantity))
+            elif quantity == 0:
+                removed.append(item.pk)
+            elif quantity != item.quantity:
+                item.quantity = quantity
+                updated.append(item)
+        # Bulk writes skip the per-row CartItem signals; the totals are redone once below
+        CartItem.objects.bulk_create(created)
+        CartItem.objects.bulk_update(updated, ['quantity'])
+        if removed:
+            CartItem.objects.filter(pk__in=removed).delete()
+        recalculate(cart.pk)
+        summary = build_summary(cart)
+        remember(cart, summary)
+    return summary
+
+
+def merge_into_user_cart(token, user):
+    """
+    On login, move an anonymous cart's lines into the user's open cart,
+    adding quantities for variants in both, and return the user's summary.
+    With no open cart the anonymous one is simply handed to the user.
+    """
+    with transaction.atomic():
+        anonymous = open_cart(token=token, lock=True)
+        if anonymous is None:
+            return get_summary(user=user)
+        target = open_cart(user=user, lock=True)
+        forget(anonymous)
+        if target is None:
+            Cart.objects.filter(pk=anonymous.pk).update(user=user, updated_at=timezone.now())
+            anonymous.user = user
+            summary = build_summary(anonymous)
+            remember(anonymous, summary)
+            return summary
+
+        operations = [
+            {'op': ADD, 'variant': variant_id, 'quantity': quantity}
+            for variant_id, quantity in anonymous.items.values_list('variant_id', 'quantity')
+        ]
+        StockReservation.objects.filter(cart=anonymous).update(cart=target)
+        Cart.objects.filter(pk=anonymous.pk).update(is_active=False, updated_at=timezone.now())
+        return apply_operations(target, operations)
@@ -0,0 +1,355 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import cache, facets, metrics
+from .models import (
+    Brand, CatalogImport, Category, Product, ProductAttribute, ProductCategory, Variant,
+)
+from .search import get_search_engine
+
+# Feeds hold one product per JSON line, or one per CSV row with list columns
+# joined by "|": categories "Dogs|Food", attributes "Color=Red|Size=L",
+# variants "label:price:stock:weight|...".
+FORMATS = ('jsonl', 'csv')
+CSV_COLUMNS = [
+    'sku', 'name', 'description', 'brand', 'price', 'stock', 'is_active',
+    'categories', 'attributes', 'variants',
+]
+PRODUCT_FIELDS = ['name', 'description', 'brand', 'price', 'stock', 'is_active', 'updated_at']
+DEFAULT_BATCH_SIZE = 1000
+
+
+class CatalogImportError(ValueError):
+    def __init__(self, row, message):
+        self.row = row
+        super().__init__(f"Row {row}: {message}")
+
+
+def format_for(filename):
+    return 'csv' if str(filename).lower().endswith('.csv') else 'jsonl'
+
+
+# ---------- Reading ---------- #
+def read_feed(lines, fmt):
+    """Yield one normalised record per product from an iterable of text lines."""
+    row = 0
+    try:
+        if fmt == 'csv':
+            for row, record in enumerate(csv.DictReader(lines), start=1):
+                yield _from_csv(record)
+        else:
+            for line in lines:
+                if not line.strip():
+                    continue
+                row += 1
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise CatalogImportError(row, "expected a JSON object.")
+                yield record
+    except (csv.Error, json.JSONDecodeError) as exc:
+        raise CatalogImportError(row + 1 if fmt == 'csv' else row, str(exc)) from exc
+
+
+def _split(value):
+    return [part for part in (value or '').split('|') if part]
+
+
+def _from_csv(row):
+    record = {key: row.get(key, '') for key in CSV_COLUMNS}
+    record['categories'] = _split(row.get('categories'))
+    record['attributes'] = [
+        dict(zip(('name', 'value'), item.split('=', 1))) for item in _split(row.get('attributes'))
+    ]
+    variants = []
+    for item in _split(row.get('variants')):
+        label, price, stock, weight = (item.split(':') + ['', '', ''])[:4]
+        variants.append({'label': label, 'price': price, 'stock_quantity': stock, 'weight_kg': weight or None})
+    record['variants'] = variants
+    return record
+
+
+def _decimal(value, row, field, model_field):
+    """`value` as a Decimal that fits `model_field`'s digits, rounded to its decimal places."""
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise CatalogImportError(row, f"{field} is not a number: {value!r}")
+    if number < 0:
+        raise CatalogImportError(row, f"{field} must not be negative: {value!r}")
+    whole_digits = model_field.max_digits - model_field.decimal_places
+    if number >= Decimal(10) ** whole_digits:
+        raise CatalogImportError(row, f"{field} is too large: {value!r}")
+    return number.quantize(Decimal(1).scaleb(-model_field.decimal_places))
+
+
+def _integer(value, row, field):
+    """A count such as stock: a whole number, not negative."""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise CatalogImportError(row, f"{field} is not a whole number: {value!r}")
+    if number < 0:
+        raise CatalogImportError(row, f"{field} must not be negative: {value!r}")
+    return number
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', '')
+
+
+# ---------- Importing ---------- #
+def update_rows(model, objs, fields):
+    """
+    Write `fields` of each object with one prepared UPDATE run through
+    executemany. bulk_update's CASE WHEN statement grows with the batch and
+    costs more to build and evaluate than it saves in round trips.
+    """
+    if not objs:
+        return
+    columns = [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    assignments = ', '.join(f"{quote(f.column)} = %s" for f in columns)
+    sql = f"UPDATE {quote(model._meta.db_table)} SET {assignments} WHERE {quote(model._meta.pk.column)} = %s"
+    params = [
+        [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in columns] + [obj.pk]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class CatalogImporter:
+    """
+    Upserts feed records keyed on sku, one transaction per batch. Memory is
+    bounded by the batch size; brand and category lookups are the only state
+    kept across batches. `job.rows_processed` is saved after every batch, so
+    a failed run resumes from the last committed row.
+    """
+
+    def __init__(self, job, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.job = job
+        self.batch_size = batch_size
+        self.progress = progress
+        self.brands = {}
+        self.categories = {}
+
+    def run(self, records):
+        records = islice(records, self.job.rows_processed, None)
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch, first_row=self.job.rows_processed + 1)
+                if self.progress:
+                    self.progress(self.job)
+        except Exception as exc:
+            self.job.status = CatalogImport.Status.FAILED
+            self.job.error = str(exc)
+            self.job.finished_at = timezone.now()
+            self.job.save()
+            exc.job = self.job  # lets callers point the user at --resume
+            raise
+        self.job.status = CatalogImport.Status.DONE
+        self.job.error = ''
+        self.job.finished_at = timezone.now()
+        self.job.save()
+        return self.job
+
+    def import_batch(self, batch, first_row):
+        records = {}
+        for offset, record in enumerate(batch):
+            row = first_row + offset
+            sku = str(record.get('sku') or '').strip()
+            if not sku or not record.get('name') or not record.get('brand'):
+                raise CatalogImportError(row, "sku, name and brand are required.")
+            records[sku] = (row, record)  # a later row for the same sku wins
+
+        with transaction.atomic():
+            existing = Product.objects.in_bulk(list(records), field_name='sku')
+            now = timezone.now()
+            to_create, to_update, unchanged = [], [], []
+            for sku, (row, record) in records.items():
+                product = existing.get(sku) or Product(sku=sku)
+                values = {
+                    'name': record['name'],
+                    'description': record.get('description') or '',
+                    'brand_id': self.brand_id(record['brand']),
+                    'price': _decimal(record.get('price') or 0, row, 'price', Product._meta.get_field('price')),
+                    'stock': _integer(record.get('stock') or 0, row, 'stock'),
+                    'is_active': _bool(record.get('is_active', True)),
+                }
+                if product.pk and all(getattr(product, field) == value for field, value in values.items()):
+                    unchanged.append(product)  # re-sent rows cost no UPDATE
+                    continue
+                for field, value in values.items():
+                    setattr(product, field, value)
+                product.updated_at = now
+                (to_update if product.pk else to_create).append(product)
+            Product.objects.bulk_create(to_create, batch_size=500)
+            update_rows(Product, to_update, PRODUCT_FIELDS)
+
+            products = {p.sku: p for p in to_create + to_update + unchanged}
+            changed = self.replace_links(records, products)
+            changed |= self.upsert_variants(records, products)
+            changed |= {p.pk for p in to_create + to_update}
+
+            self.job.rows_processed += len(batch)
+            self.job.rows_created += len(to_create)
+            self.job.rows_updated += len(changed - {p.pk for p in to_create})
+            self.job.save(update_fields=['rows_processed', 'rows_created', 'rows_updated'])
+
+        if not changed:
+            return
+        # Bulk writes skip signals, so refresh the derived indexes here
+        product_ids = sorted(changed)
+        get_search_engine().index_products(Product.objects.filter(pk__in=product_ids))
+        facets.products_changed(product_ids)
+        metrics.adjust_summary(products=len(to_create))
+        cache.invalidate('product')
+
+    def brand_id(self, name):
+        name = str(name).strip()
+        if name not in self.brands:
+            self.brands[name] = Brand.objects.get_or_create(name=name)[0].pk
+        return self.brands[name]
+
+    def category_id(self, name):
+        if name not in self.categories:
+            # Category.save() maintains the tree index, so no bulk create here
+            self.categories[name] = Category.objects.get_or_create(name=name)[0].pk
+        return self.categories[name]
+
+    def replace_links(self, records, products):
+        """Bring category links and attributes in line with the feed; returns the touched product ids."""
+        ids = [p.pk for p in products.values()]
+        wanted_links, wanted_attributes = set(), set()
+        for sku, (row, record) in records.items():
+            pk = products[sku].pk
+            for name in record.get('categories') or ():
+                wanted_links.add((pk, self.category_id(name.strip())))
+            for attribute in record.get('attributes') or ():
+                if attribute.get('name') and attribute.get('value'):
+                    wanted_attributes.add((pk, attribute['name'].strip(), attribute['value'].strip()))
+
+        touched = set()
+        for model, fields, wanted, build in (
+            (ProductCategory, ('product_id', 'category_id'), wanted_links,
+             lambda pk, category_id: ProductCategory(product_id=pk, category_id=category_id)),
+            (ProductAttribute, ('product_id', 'name', 'value'), wanted_attributes,
+             lambda pk, name, value: ProductAttribute(product_id=pk, name=name, value=value)),
+        ):
+            current = {}
+            for row_pk, *key in model.objects.filter(product_id__in=ids).values_list('pk', *fields):
+                current[tuple(key)] = row_pk
+            stale = [row_pk for key, row_pk in current.items() if key not in wanted]
+            missing = [key for key in wanted if key not in current]
+            model.objects.filter(pk__in=stale).delete()
+            model.objects.bulk_create([build(*key) for key in missing], batch_size=500)
+            touched.update(key[0] for key in current if key not in wanted)
+            touched.update(key[0] for key in missing)
+        return touched
+
+    def upsert_variants(self, records, products):
+        """Create or update variants matched on (product, label); returns the touched product ids."""
+        # Variants missing from the feed are kept: order history may still point at them.
+        existing = {
+            (v.product_id, v.label): v
+            for v in Variant.objects.filter(product_id__in=[p.pk for p in products.values()])
+        }
+        to_create, to_update = [], []
+        for sku, (row, record) in records.items():
+            pk = products[sku].pk
+            for data in record.get('variants') or ():
+                label = str(data.get('label') or '').strip()
+                if not label:
+                    raise CatalogImportError(row, "every variant needs a label.")
+                weight = data.get('weight_kg')
+                values = {
+                    'price': _decimal(data.get('price') or 0, row, 'variant price', Variant._meta.get_field('price')),
+                    'stock_quantity': _integer(data.get('stock_quantity') or 0, row, 'stock_quantity'),
+                    'weight_kg': (
+                        _decimal(weight, row, 'weight_kg', Variant._meta.get_field('weight_kg'))
+                        if weight not in (None, '') else None
+                    ),
+                }
+                variant = existing.get((pk, label)) or Variant(product_id=pk, label=label)
+                if variant.pk and all(getattr(variant, field) == value for field, value in values.items()):
+                    continue
+                for field, value in values.items():
+                    setattr(variant, field, value)
+                (to_update if variant.pk else to_create).append(variant)
+        Variant.objects.bulk_create(to_create, batch_size=500)
+        update_rows(Variant, to_update, ['price', 'stock_quantity', 'weight_kg'])
+        return {v.product_id for v in to_create + to_update}
+
+
+def import_catalog(lines, source, fmt, batch_size=DEFAULT_BATCH_SIZE, resume=None, progress=None):
+    """Import a feed; pass a failed CatalogImport as `resume` to carry on from it."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown feed format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+    if resume is not None:
+        job = resume
+        job.status = CatalogImport.Status.RUNNING
+        job.save(update_fields=['status'])
+    else:
+        job = CatalogImport.objects.create(source=str(source), format=fmt)
+    return CatalogImporter(job, batch_size=batch_size, progress=progress).run(read_feed(lines, fmt))
+
+
+# ---------- Exporting ---------- #
+def export_records(queryset=None, chunk_size=DEFAULT_BATCH_SIZE):
+    queryset = (queryset if queryset is not None else Product.objects.all()).order_by('pk')
+    queryset = queryset.select_related('brand').prefetch_related('categories', 'attributes', 'variants')
+    for product in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'sku': product.sku,
+            'name': product.name,
+            'description': product.description,
+            'brand': product.brand.name,
+            'price': product.price,
+            'stock': product.stock,
+            'is_active': product.is_active,
+            'categories': [c.name for c in product.categories.all()],
+            'attributes': [{'name': a.name, 'value': a.value} for a in product.attributes.all()],
+            'variants': [
+                {'label': v.label, 'price': v.price, 'stock_quantity': v.stock_quantity, 'weight_kg': v.weight_kg}
+                for v in product.variants.all()
+            ],
+        }
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_feed(fmt, queryset=None):
+    """Yield the catalog as text chunks in `fmt`, one product at a time."""
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        for record in export_records(queryset):
+            record['categories'] = '|'.join(record['categories'])
+            record['attributes'] = '|'.join(f"{a['name']}={a['value']}" for a in record['attributes'])
+            record['variants'] = '|'.join(
+                f"{v['label']}:{v['price']}:{v['stock_quantity']}:{v['weight_kg'] if v['weight_kg'] is not None else ''}"
+                for v in record['variants']
+            )
+            yield writer.writerow([record[column] for column in CSV_COLUMNS])
+    else:
+        encoder = JSONEncoder()
+        for record in export_records(queryset):
+            yield encoder.encode(record) + '\n'
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import cache, carts, facets, metrics
+from .models import Cart, Order, OrderItem, Payment, StockReservation, Variant
+from .tasks import task
+
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+class CheckoutError(Exception):
+    """A cart that cannot be reserved or turned into an order."""
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, variant_id, requested):
+        self.variant_id = variant_id
+        self.requested = requested
+        super().__init__(f"Not enough stock for variant {variant_id} (requested {requested}).")
+
+
+# ---------- Stock primitives ---------- #
+def take_stock(variant_id, quantity):
+    """
+    Atomically decrement stock, but only if enough is left. The condition
+    and the write are one UPDATE, so concurrent buyers can never oversell.
+    """
+    taken = Variant.objects.filter(pk=variant_id, stock_quantity__gte=quantity).update(
+        stock_quantity=F('stock_quantity') - quantity
+    )
+    if not taken:
+        raise OutOfStock(variant_id, quantity)
+
+
+def return_stock(variant_id, quantity):
+    Variant.objects.filter(pk=variant_id).update(stock_quantity=F('stock_quantity') + quantity)
+
+
+def lock_variants(variant_ids):
+    """Row-lock the variants in id order where the backend supports it."""
+    if connection.features.has_select_for_update:
+        list(Variant.objects.select_for_update().filter(pk__in=variant_ids).order_by('pk').values_list('pk'))
+
+
+def claim_reservation(reservation):
+    """
+    Delete a reservation and report whether this caller removed it. Whoever
+    deletes the row owns its stock, so checkout and the expiry sweep never
+    both act on the same hold.
+    """
+    deleted, _ = StockReservation.objects.filter(pk=reservation.pk).delete()
+    return bool(deleted)
+
+
+@task(max_attempts=1)
+def release_expired_reservations(variant_ids=None, now=None):
+    """Put stock held by expired reservations back on the shelf."""
+    expired = StockReservation.objects.filter(expires_at__lte=now or timezone.now())
+    if variant_ids is not None:
+        expired = expired.filter(variant_id__in=variant_ids)
+    released = 0
+    for reservation in expired.order_by('variant_id'):
+        with transaction.atomic():
+            if claim_reservation(reservation):
+                return_stock(reservation.variant_id, reservation.quantity)
+                released += 1
+    return released
+
+
+def _cart_lines(cart):
+    lines = {}
+    for variant_id, quantity in cart.items.values_list('variant_id', 'quantity'):
+        lines[variant_id] = lines.get(variant_id, 0) + quantity
+    if not lines:
+        raise CheckoutError("Cart is empty.")
+    return lines
+
+
+def _claim_cart_holds(cart):
+    held = {}
+    for reservation in cart.reservations.all():
+        if claim_reservation(reservation):
+            held[reservation.variant_id] = held.get(reservation.variant_id, 0) + reservation.quantity
+    return held
+
+
+def _settle(lines, held):
+    """Take or return stock so exactly `lines` is held, in variant id order."""
+    for variant_id in sorted(set(lines) | set(held)):
+        difference = lines.get(variant_id, 0) - held.get(variant_id, 0)
+        if difference > 0:
+            take_stock(variant_id, difference)
+        elif difference < 0:
+            return_stock(variant_id, -difference)
+
+
+def _stock_changed(variant_ids):
+    product_ids = list(Variant.objects.filter(pk__in=variant_ids).values_list('product_id', flat=True))
+    cache.invalidate('product')
+    facets.products_changed(product_ids)
+
+
+# ---------- Services ---------- #
+def reserve_cart(cart, ttl=RESERVATION_TTL):
+    """Hold stock for every line in `cart` until now + ttl; returns the expiry."""
+    lines = _cart_lines(cart)
+    release_expired_reservations(variant_ids=list(lines))
+    expires_at = timezone.now() + ttl
+    with transaction.atomic():
+        # A checked-out cart's holds became its order; new ones would never be claimed
+        if not Cart.objects.filter(pk=cart.pk, is_active=True).exists():
+            raise CheckoutError("Cart has already been checked out.")
+        lock_variants(list(lines))
+        _settle(lines, _claim_cart_holds(cart))
+        StockReservation.objects.bulk_create([
+            StockReservation(cart=cart, variant_id=variant_id, quantity=quantity, expires_at=expires_at)
+            for variant_id, quantity in lines.items()
+        ])
+    _stock_changed(list(lines))
+    return expires_at
+
+
+def checkout_cart(cart, shipping_addr, payment_method, user=None):
+    """
+    Turn an active cart into an Order with its OrderItems and Payment.
+    Stock already reserved for the cart is used first; the rest is taken now.
+    Everything happens in one transaction, so a failure leaves stock untouched.
+    """
+    lines = _cart_lines(cart)
+    release_expired_reservations(variant_ids=list(lines))
+    with transaction.atomic():
+        # Deactivating the cart first makes a double submit lose cleanly
+        if not Cart.objects.filter(pk=cart.pk, is_active=True).update(is_active=False):
+            raise CheckoutError("Cart has already been checked out.")
+        carts.forget(cart)
+        lock_variants(list(lines))
+        _settle(lines, _claim_cart_holds(cart))
+
+        variants = {
+            pk: (price, product_id)
+            for pk, price, product_id in Variant.objects.filter(pk__in=lines).values_list('pk', 'price', 'product_id')
+        }
+        total = sum((variants[pk][0] * quantity for pk, quantity in lines.items()), Decimal('0'))
+        order = Order.objects.create(
+            user=user, shipping_addr=shipping_addr, total_amount=total,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, variant_id=pk, quantity=quantity, unit_price=variants[pk][0])
+            for pk, quantity in lines.items()
+        ])
+        Payment.objects.create(order=order, method=payment_method)
+
+        # bulk_create skips the OrderItem signals that keep dashboard metrics current
+        for pk, quantity in lines.items():
+            price, product_id = variants[pk]
+            metrics.adjust_product_sales(product_id, sold=1, revenue=price * quantity)
+    _stock_changed(list(lines))
+    return order
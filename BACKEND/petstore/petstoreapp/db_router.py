@@ -0,0 +1,74 @@
+"""
+Read/write routing for PETSTORE_DB_REPLICAS (see settings.py). Catalog reads,
+the bulk of the traffic, go to a random replica; everything else, all writes
+and any read inside a transaction on the primary go to 'default'. That last
+rule keeps checkout consistent: it reads stock and carts in the same
+transaction that writes them, so it never sees a lagging replica.
+
+A write also pins the thread's reads to 'default' for the rest of the
+request, so a client reads its own writes back. Outside requests (jobs,
+commands) the pin lasts REPLICA_PIN_SECONDS after the last write.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models served from replicas; a little staleness is fine for all of them
+CATALOG_MODELS = {
+    'product', 'variant', 'productimage', 'productattribute', 'productcategory',
+    'category', 'brand', 'bannerimage', 'productrating', 'review',
+}
+
+
+# Per thread: monotonic time until which reads stay on 'default'
+_pin = threading.local()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def pin_to_primary():
+    _pin.until = time.monotonic() + getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def pinned_to_primary():
+    return time.monotonic() < getattr(_pin, 'until', 0)
+
+
+def unpin(**kwargs):
+    _pin.until = 0
+
+
+# Each request starts unpinned; the pin is only for the request that wrote
+request_started.connect(unpin, dispatch_uid='db-router-unpin-started')
+request_finished.connect(unpin, dispatch_uid='db-router-unpin-finished')
+
+
+class ReadReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or model._meta.app_label != 'petstoreapp':
+            return DEFAULT_DB_ALIAS
+        if model._meta.model_name not in CATALOG_MODELS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or pinned_to_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data, so any two rows may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
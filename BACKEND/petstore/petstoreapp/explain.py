@@ -0,0 +1,61 @@
+"""
+Query plan checks for the index advisor (manage.py explain_endpoints). A
+SELECT is explained with the backend's own EXPLAIN and its plan searched for
+full table scans and for sorts that no index serves, the two shapes an index
+usually fixes.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connections
+
+Finding = namedtuple("Finding", "kind table detail")
+
+FULL_SCAN = "full scan"
+SORT = "sort"
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+# Django aliases subquery tables: FROM "petstoreapp_variant" U0
+_ALIASES = re.compile(r'"(\w+)" (U\d+|T\d+)\b')
+
+
+def explain(sql, params, using="default"):
+    """The plan for one statement as a list of text lines."""
+    connection = connections[using]
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(connection.vendor)
+    if prefix is None:
+        raise NotImplementedError(f"No EXPLAIN support for {connection.vendor}.")
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL returns one text column
+    return [row[-1] for row in rows]
+
+
+def plan_findings(lines, vendor):
+    findings = []
+    for line in lines:
+        if vendor == "sqlite":
+            scan = _SQLITE_SCAN.match(line.strip())
+            if scan:
+                findings.append(Finding(FULL_SCAN, scan.group(1), line.strip()))
+            elif "USE TEMP B-TREE FOR ORDER BY" in line:
+                findings.append(Finding(SORT, None, line.strip()))
+        else:
+            scan = _POSTGRES_SCAN.search(line)
+            if scan:
+                findings.append(Finding(FULL_SCAN, scan.group(1), line.strip()))
+            elif line.strip().startswith(("Sort ", "->  Sort ")):
+                findings.append(Finding(SORT, None, line.strip()))
+    return findings
+
+
+def explain_findings(sql, params, using="default"):
+    findings = plan_findings(explain(sql, params, using), connections[using].vendor)
+    aliases = {alias: table for table, alias in _ALIASES.findall(sql)}
+    findings = [f._replace(table=aliases.get(f.table, f.table)) for f in findings]
+    if " LIMIT " in sql and " WHERE " not in sql and not any(f.kind == SORT for f in findings):
+        # An unfiltered walk in index order stops at the LIMIT: a page, not a scan
+        findings = [f for f in findings if f.kind != FULL_SCAN]
+    return findings
@@ -0,0 +1,347 @@
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .cache import catalog_cache
+from .models import Brand, Category, Product, ProductAttribute, ProductCategory, Variant
+
+# (label, lower bound, upper bound) with the upper bound exclusive
+PRICE_BUCKETS = [
+    ("0-10", Decimal("0"), Decimal("10")),
+    ("10-25", Decimal("10"), Decimal("25")),
+    ("25-50", Decimal("25"), Decimal("50")),
+    ("50-100", Decimal("50"), Decimal("100")),
+    ("100-250", Decimal("100"), Decimal("250")),
+    ("250+", Decimal("250"), None),
+]
+
+# Static facets and their query parameters. Attributes add one facet per
+# attribute name ("attr.Color"), selected with ?attr=Color:Red.
+FACET_PARAMS = {
+    "brand": "brand",
+    "categories": "categories",
+    "price": "price",
+    "weight": "weight",
+    "in_stock": "in_stock",
+}
+ATTRIBUTE_PARAM = "attr"
+ATTRIBUTE_PREFIX = "attr."
+
+# Bumped in the shared catalog cache on every catalog change. A process
+# whose index was built at another generation rebuilds before answering.
+# With a per-process catalog cache other processes never see the bump, so an
+# index is also rebuilt once it is FACET_INDEX_MAX_AGE seconds old.
+GENERATION_KEY = "facets:generation"
+
+# Weights are compared with Variant.weight_kg, a DecimalField(8, 2)
+WEIGHT_QUANTUM = Decimal("0.01")
+WEIGHT_LIMIT = Decimal("1e6")
+
+
+def price_bucket(price):
+    for label, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return label
+    return None
+
+
+def ancestor_ids(path):
+    return [int(pk) for pk in path.split("/") if pk]
+
+
+class BitmapBuilder:
+    """Collects ids into bytearrays, which are cheap to set bits in."""
+
+    def __init__(self):
+        self.bits = defaultdict(bytearray)
+
+    def add(self, facet, value, pk):
+        bits = self.bits[(facet, value)]
+        byte = pk >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte - len(bits) + 1))
+        bits[byte] |= 1 << (pk & 7)
+
+    def postings(self):
+        postings = defaultdict(dict)
+        for (facet, value), bits in self.bits.items():
+            postings[facet][value] = int.from_bytes(bits, "little")
+        return postings
+
+
+def bitmap_of(ids):
+    bitmap = 0
+    for pk in ids:
+        bitmap |= 1 << pk
+    return bitmap
+
+
+class FacetIndex:
+    """
+    Posting lists for every facet value, stored as int bitmaps keyed by
+    product id. Counting a facet value is an AND plus a popcount, so a page of
+    counts costs the same however many products match.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.all_products = 0
+        self.labels = {"brand": {}, "categories": {}}
+
+    # ---------- Building ---------- #
+    def build(self):
+        builder = BitmapBuilder()
+        ids = self._collect(builder)
+        self.postings = builder.postings()
+        self.all_products = bitmap_of(ids)
+        self._load_labels()
+
+    def update(self, product_ids):
+        """Recompute the postings of a few products in place."""
+        mask = bitmap_of(product_ids)
+        for values in self.postings.values():
+            for value in list(values):
+                values[value] &= ~mask
+        self.all_products &= ~mask
+
+        builder = BitmapBuilder()
+        ids = self._collect(builder, product_ids)
+        for facet, values in builder.postings().items():
+            for value, bitmap in values.items():
+                self.postings[facet][value] = self.postings[facet].get(value, 0) | bitmap
+        self.all_products |= bitmap_of(ids)
+
+    def _collect(self, builder, product_ids=None):
+        products = Product.objects.all()
+        related = {}
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+            related = {"product_id__in": product_ids}
+
+        ids = []
+        for pk, brand_id, price, stock in products.values_list("pk", "brand_id", "price", "stock").iterator():
+            ids.append(pk)
+            builder.add("brand", brand_id, pk)
+            builder.add("price", price_bucket(price), pk)
+            if stock > 0:
+                builder.add("in_stock", True, pk)
+
+        links = ProductCategory.objects.filter(**related)
+        for pk, path in links.values_list("product_id", "category__path").iterator():
+            # A product counts towards every ancestor of the category it is filed in
+            for category_id in ancestor_ids(path):
+                builder.add("categories", category_id, pk)
+
+        attributes = ProductAttribute.objects.filter(**related)
+        for pk, name, value in attributes.values_list("product_id", "name", "value").iterator():
+            builder.add(ATTRIBUTE_PREFIX + name, value, pk)
+
+        variants = Variant.objects.filter(**related)
+        for pk, weight, quantity in variants.values_list("product_id", "weight_kg", "stock_quantity").iterator():
+            if weight is not None:
+                builder.add("weight", str(weight), pk)
+            if quantity > 0:
+                builder.add("in_stock", True, pk)
+        return ids
+
+    def _load_labels(self):
+        self.labels = {
+            "brand": dict(Brand.objects.values_list("pk", "name")),
+            "categories": dict(Category.objects.values_list("pk", "full_path")),
+        }
+
+    # ---------- Querying ---------- #
+    def counts(self, selection, restrict=None):
+        """
+        Counts per facet value under `selection` ({facet: set of values}).
+        Each facet is counted with every other facet's selection applied but
+        not its own, so picking one brand still shows how many the rest have.
+        """
+        base = self.all_products if restrict is None else self.all_products & restrict
+        masks = {}
+        for facet, values in selection.items():
+            mask = 0
+            for value in values:
+                mask |= self.postings.get(facet, {}).get(value, 0)
+            masks[facet] = mask
+
+        facets = {}
+        for facet, values in self.postings.items():
+            scope = base
+            for other, mask in masks.items():
+                if other != facet:
+                    scope &= mask
+            labels = self.labels.get(facet, {})
+            entries = []
+            for value, bitmap in values.items():
+                count = (bitmap & scope).bit_count()
+                if count:
+                    entries.append({"value": value, "label": labels.get(value, value), "count": count})
+            entries.sort(key=lambda entry: (-entry["count"], str(entry["label"])))
+            facets[facet] = entries
+
+        total = base
+        for mask in masks.values():
+            total &= mask
+        return {"total": total.bit_count(), "facets": facets}
+
+
+# ---------- Per-process index ---------- #
+_lock = threading.Lock()
+_state = {"index": None, "generation": None, "built_at": 0.0}
+
+
+def _shared_generation():
+    cache = catalog_cache()
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _bump_generation():
+    cache = catalog_cache()
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(GENERATION_KEY, 1, timeout=None)
+        return 1
+
+
+def get_facet_index():
+    generation = _shared_generation()
+    max_age = getattr(settings, "FACET_INDEX_MAX_AGE", 300)
+    with _lock:
+        if (
+            _state["index"] is None
+            or _state["generation"] != generation
+            or time.monotonic() - _state["built_at"] > max_age
+        ):
+            index = FacetIndex()
+            index.build()
+            _state.update(index=index, generation=generation, built_at=time.monotonic())
+        return _state["index"]
+
+
+def products_changed(product_ids):
+    """Patch this process's index after a commit; other processes rebuild."""
+    def apply():
+        generation = _bump_generation()
+        with _lock:
+            index = _state["index"]
+            if index is not None and _state["generation"] == generation - 1:
+                index.update(product_ids)
+                _state["generation"] = generation
+            else:
+                _state["index"] = None
+    transaction.on_commit(apply)
+
+
+def catalog_changed():
+    """Brand or category edits relabel or regroup many products: rebuild."""
+    def apply():
+        _bump_generation()
+        with _lock:
+            _state["index"] = None
+    transaction.on_commit(apply)
+
+
+# ---------- Request parsing and SQL filters ---------- #
+def parse_selection(query_params):
+    """Read facet selections from the query string into {facet: set of values}."""
+    selection = {}
+    for facet, param in FACET_PARAMS.items():
+        raw = [v for item in query_params.getlist(param) for v in item.split(",") if v]
+        if not raw:
+            continue
+        if facet in ("brand", "categories"):
+            values = {int(v) for v in raw if v.isdigit()}
+        elif facet == "in_stock":
+            values = {True} if raw[-1] in ("1", "true") else set()
+        elif facet == "weight":
+            values = {_weight(v, param) for v in raw}
+        else:
+            values = set(raw)
+        selection[facet] = values
+    for item in query_params.getlist(ATTRIBUTE_PARAM):
+        name, _, value = item.partition(":")
+        if name and value:
+            selection.setdefault(ATTRIBUTE_PREFIX + name, set()).add(value)
+    return {facet: values for facet, values in selection.items() if values}
+
+
+def _weight(value, param):
+    """`value` as a weight_kg string ("2.50"); a 400 unless it is a finite number the column can hold."""
+    try:
+        weight = Decimal(value)
+        if not weight.is_finite() or abs(weight) >= WEIGHT_LIMIT:
+            raise InvalidOperation
+        return str(weight.quantize(WEIGHT_QUANTUM))
+    except ArithmeticError:
+        raise ValidationError({param: f"Not a weight: {value}."})
+
+
+def selection_q(selection):
+    """The same selection as a Q over Product, for fetching the result rows."""
+    q = Q()
+    for facet, values in selection.items():
+        if facet == "brand":
+            q &= Q(brand_id__in=values)
+        elif facet == "categories":
+            paths = Category.objects.filter(pk__in=values).values_list("path", flat=True)
+            subtree = Q()
+            for path in paths:
+                subtree |= Q(**{f"category__{k}": v for k, v in Category.subtree_range(path).items()})
+            q &= Q(pk__in=ProductCategory.objects.filter(subtree).values("product_id")) if paths else Q(pk__in=[])
+        elif facet == "price":
+            prices = Q(pk__in=[])
+            for label, low, high in PRICE_BUCKETS:
+                if label in values:
+                    prices |= Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+            q &= prices
+        elif facet == "weight":
+            q &= Q(pk__in=Variant.objects.filter(weight_kg__in=[Decimal(v) for v in values]).values("product_id"))
+        elif facet == "in_stock":
+            q &= Q(stock__gt=0) | Q(pk__in=Variant.objects.filter(stock_quantity__gt=0).values("product_id"))
+        elif facet.startswith(ATTRIBUTE_PREFIX):
+            name = facet[len(ATTRIBUTE_PREFIX):]
+            attributes = ProductAttribute.objects.filter(name=name, value__in=values)
+            q &= Q(pk__in=attributes.values("product_id"))
+    return q
+
+
+class FacetedListMixin:
+    """
+    Adds `facets` (counts per facet value) and `facet_total` to list
+    responses when the request carries ?facets=1. Results themselves are
+    narrowed by filters.FacetFilter; counts are restricted to what the
+    view's other filter backends (category, search, ...) let through.
+    """
+    facets_query_param = "facets"
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get(self.facets_query_param) not in ("1", "true"):
+            return response
+        if not isinstance(getattr(response, "data", None), dict):
+            return response
+        counts = get_facet_index().counts(parse_selection(request.query_params), self.facet_restriction(request))
+        response.data["facet_total"] = counts["total"]
+        response.data["facets"] = counts["facets"]
+        return response
+
+    def facet_restriction(self, request):
+        """Bitmap of the products the non-facet filters keep; None when none of them narrows the list."""
+        queryset = base = self.get_queryset()
+        for backend in self.filter_backends:
+            # The index applies the facet selection itself, leaving each facet's own selection out
+            if not getattr(backend, "facet_selection", False):
+                queryset = backend().filter_queryset(request, queryset, self)
+        if queryset is base:
+            return None
+        return bitmap_of(queryset.values_list("pk", flat=True))
@@ -0,0 +1,83 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .facets import parse_selection, selection_q
+from .models import Category, Order, ProductCategory
+from .search import SEARCH_RESULT_LIMIT, get_search_engine, ranked_queryset
+
+
+class CategorySubtreeFilter(BaseFilterBackend):
+    """
+    `?category=<id>` keeps products filed directly under that category;
+    adding `&descendants=1` also takes in every subcategory through the
+    materialized path index on Category.
+    """
+    category_param = 'category'
+    descendants_param = 'descendants'
+
+    def filter_queryset(self, request, queryset, view):
+        category_id = request.query_params.get(self.category_param)
+        if not category_id:
+            return queryset
+        try:
+            category_id = int(category_id)
+        except ValueError:
+            raise ValidationError({self.category_param: 'Expected a category id.'})
+
+        if request.query_params.get(self.descendants_param) in ('1', 'true'):
+            path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+            if path is None:
+                return queryset.none()
+            product_ids = Category.subtree_product_ids(path)
+        else:
+            product_ids = ProductCategory.objects.filter(category_id=category_id).values('product_id')
+        return queryset.filter(pk__in=product_ids)
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    `?search=<text>` narrows to the search engine's best SEARCH_RESULT_LIMIT
+    hits and orders them by relevance (see search.py); KeysetPagination pages
+    on that rank and flags responses where the engine had more hits.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        # Facet counting filters the list a second time; search once per request
+        if getattr(view, 'search_query', None) != query:
+            # One extra hit tells a capped result from one that just fits
+            ids = get_search_engine().search(query, limit=SEARCH_RESULT_LIMIT + 1)
+            view.search_query = query
+            view.search_truncated = len(ids) > SEARCH_RESULT_LIMIT
+            view.search_product_ids = ids[:SEARCH_RESULT_LIMIT]
+        return ranked_queryset(queryset, view.search_product_ids)
+
+
+class FacetFilter(BaseFilterBackend):
+    """Applies facet selections (?brand=, ?categories=, ?price=, ?attr=Name:Value, ...)."""
+    # FacetedListMixin counts without it: the facet index applies the selection itself
+    facet_selection = True
+
+    def filter_queryset(self, request, queryset, view):
+        selection = parse_selection(request.query_params)
+        if not selection:
+            return queryset
+        return queryset.filter(selection_q(selection))
+
+
+class OrderStatusFilter(BaseFilterBackend):
+    """`?status=PAI` (or several, comma separated) narrows orders to those statuses."""
+    status_param = 'status'
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get(self.status_param)
+        if not raw:
+            return queryset
+        statuses = [value for value in raw.split(',') if value]
+        unknown = [value for value in statuses if value not in Order.Status.values]
+        if unknown:
+            raise ValidationError({self.status_param: f"Unknown status: {', '.join(unknown)}."})
+        return queryset.filter(status__in=statuses)
@@ -0,0 +1,202 @@
+"""
+Responsive image derivatives. When an image field changes, a background job
+(tasks.py) hashes the upload and writes fixed-width WebP and JPEG copies
+under derivatives/<hash>/. Files are addressed by content hash, so identical
+uploads share one original and one set of derivatives. A blank `<field>_hash`
+column means the derivatives are not ready yet and the original is served.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import BannerImage, Product, ProductImage
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 320, 640, 1024)
+DERIVATIVE_FORMATS = {
+    # format: (Pillow encoder, file extension, save options)
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DERIVATIVE_ROOT = "derivatives"
+ORIENTATION_TAG = 0x0112
+
+# Every image field that gets derivatives, with its model
+IMAGE_FIELDS = [
+    (Product, "main_image"),
+    (ProductImage, "image_url"),
+    (BannerImage, "image"),
+]
+
+def hash_field(field_name):
+    return f"{field_name}_hash"
+
+
+def width_field(field_name):
+    return f"{field_name}_width"
+
+
+def content_hash(fieldfile):
+    digest = hashlib.sha256()
+    fieldfile.open("rb")
+    try:
+        for chunk in fieldfile.chunks():
+            digest.update(chunk)
+    finally:
+        fieldfile.close()
+    return digest.hexdigest()
+
+
+# ---------- Naming ---------- #
+def derivative_name(digest, width, fmt):
+    return f"{DERIVATIVE_ROOT}/{digest[:2]}/{digest}/{width}.{DERIVATIVE_FORMATS[fmt][1]}"
+
+
+def srcset_widths(source_width=None):
+    """
+    [(derivative width, actual width)] to offer. Derivatives are never
+    upscaled, so the first one at least as wide as the original holds the
+    original's width and the wider ones are copies of it: they are left out.
+    """
+    widths = []
+    for width in DERIVATIVE_WIDTHS:
+        if source_width is not None and width >= source_width:
+            widths.append((width, source_width))
+            break
+        widths.append((width, width))
+    return widths
+
+
+def srcset(digest, storage, build_url=None, source_width=None):
+    """
+    {"webp": "<url> 160w, <url> 320w, ...", "jpeg": ...} for a processed
+    image, ready for <source srcset>. Returns None until it is processed.
+    """
+    if not digest:
+        return None
+    build_url = build_url or (lambda url: url)
+    widths = srcset_widths(source_width)
+    return {
+        fmt: ", ".join(f"{build_url(storage.url(derivative_name(digest, name, fmt)))} {actual}w"
+                       for name, actual in widths)
+        for fmt in DERIVATIVE_FORMATS
+    }
+
+
+# ---------- Generation ---------- #
+def source_width(fieldfile):
+    """The original's width as displayed, after EXIF rotation; reads only the header."""
+    fieldfile.open("rb")
+    try:
+        with Image.open(fieldfile) as image:
+            width, height = image.size
+            orientation = image.getexif().get(ORIENTATION_TAG, 1)
+    finally:
+        fieldfile.close()
+    # Orientations 5-8 turn the image a quarter, swapping its sides
+    return height if orientation in (5, 6, 7, 8) else width
+
+
+def generate_derivatives(fieldfile, digest):
+    """Write every missing derivative for `digest`; returns how many were written."""
+    storage = fieldfile.storage
+    missing = [
+        (width, fmt) for width in DERIVATIVE_WIDTHS for fmt in DERIVATIVE_FORMATS
+        if not storage.exists(derivative_name(digest, width, fmt))
+    ]
+    if not missing:
+        return 0
+
+    fieldfile.open("rb")
+    try:
+        with Image.open(fieldfile) as source:
+            source = ImageOps.exif_transpose(source)
+            has_alpha = source.mode in ("RGBA", "LA") or "transparency" in source.info
+            source = source.convert("RGBA" if has_alpha else "RGB")
+            source.load()
+    finally:
+        fieldfile.close()
+
+    for width, fmt in missing:
+        encoder, _, options = DERIVATIVE_FORMATS[fmt]
+        # Narrower originals are re-encoded at their own size, never upscaled
+        copy = source.copy()
+        copy.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        if encoder == "JPEG" and copy.mode == "RGBA":
+            background = Image.new("RGB", copy.size, (255, 255, 255))
+            background.paste(copy, mask=copy.getchannel("A"))
+            copy = background
+        buffer = BytesIO()
+        copy.save(buffer, encoder, **options)
+        storage.save(derivative_name(digest, width, fmt), ContentFile(buffer.getvalue()))
+    return len(missing)
+
+
+def find_original(digest, exclude_name):
+    """Name of an already stored original with the same content, if any."""
+    for model, field_name in IMAGE_FIELDS:
+        name = (
+            model.objects.filter(**{hash_field(field_name): digest})
+            .exclude(**{field_name: exclude_name})
+            .values_list(field_name, flat=True)
+            .first()
+        )
+        if name:
+            return name
+    return None
+
+
+def is_referenced(name):
+    return any(model.objects.filter(**{field_name: name}).exists() for model, field_name in IMAGE_FIELDS)
+
+
+def process_image(model, pk, field_name):
+    """
+    Hash, deduplicate and generate derivatives for one image field. Returns
+    (derivatives written, whether the upload was merged into an existing file).
+    """
+    instance = model.objects.filter(pk=pk).first()
+    fieldfile = getattr(instance, field_name, None) if instance else None
+    if not fieldfile:
+        return 0, False
+
+    digest = content_hash(fieldfile)
+    updates = {hash_field(field_name): digest, width_field(field_name): source_width(fieldfile)}
+    merged = False
+    existing = find_original(digest, fieldfile.name)
+    if existing:
+        # Point this row at the stored copy and drop the duplicate upload
+        duplicate = fieldfile.name
+        updates[field_name] = existing
+        model.objects.filter(pk=pk).update(**updates)
+        if not is_referenced(duplicate):
+            fieldfile.storage.delete(duplicate)
+        merged = True
+        written = 0
+    else:
+        written = generate_derivatives(fieldfile, digest)
+        model.objects.filter(pk=pk).update(**updates)
+    cache.invalidate_for_model(model)
+    return written, merged
+
+
+@task(max_attempts=3, retry_delay=30)
+def build_derivatives(model_label, pk, field_name):
+    model = apps.get_model(model_label)
+    try:
+        process_image(model, pk, field_name)
+    except OSError as exc:
+        # Missing or unreadable originals are expected on dev databases; retrying will not help
+        logger.warning("Could not build derivatives for %s %s.%s: %s", model.__name__, pk, field_name, exc)
+
+
+def schedule(model, pk, field_name):
+    """Queue a derivatives build; the job is committed with the current transaction."""
+    build_derivatives.delay(model._meta.label, pk, field_name)
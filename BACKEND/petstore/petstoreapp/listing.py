@@ -0,0 +1,200 @@
+"""
+Compact product listings. `?view=card` or a sparse `?fields=id,name,price`
+reads only the needed columns with .values() and turns each row into a dict
+with an encoder compiled once per field set, skipping DRF's per-field
+serializer machinery. Output matches ProductSerializer for the same fields.
+"""
+from functools import lru_cache
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef, Subquery
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .images import DERIVATIVE_FORMATS, derivative_name, srcset
+from .models import ProductImage
+
+CARD_FIELDS = ('id', 'name', 'price', 'stock', 'thumbnail')
+THUMBNAIL_WIDTH = 320
+
+# Nested collections need the full serializer
+FULL_ONLY_FIELDS = ('images', 'attributes', 'variants', 'categories')
+
+
+def _first_image(column):
+    return Subquery(
+        ProductImage.objects.filter(product=OuterRef('pk')).order_by('sort_order').values(column)[:1]
+    )
+
+
+# Columns (or annotations) each compact field reads
+IMAGE_COLUMNS = (
+    'main_image', 'main_image_hash', 'main_image_width', 'first_image', 'first_image_hash', 'first_image_width',
+)
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'sku': ('sku',),
+    'name': ('name',),
+    'description': ('description',),
+    'price': ('price',),
+    'stock': ('stock',),
+    'is_active': ('is_active',),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+    'brand': ('brand_id', 'brand__name'),
+    'rating_avg': ('rating__rating_avg',),
+    'rating_count': ('rating__rating_count',),
+    'main_image_url': IMAGE_COLUMNS,
+    'main_image_srcset': IMAGE_COLUMNS,
+    'thumbnail': IMAGE_COLUMNS,
+}
+ANNOTATIONS = {
+    'first_image': lambda: _first_image('image_url'),
+    'first_image_hash': lambda: _first_image('image_url_hash'),
+    'first_image_width': lambda: _first_image('image_url_width'),
+}
+
+# Python expression building each field from `row` (a values() dict) and `ctx`
+FIELD_EXPRESSIONS = {
+    'price': "str(row['price'])",
+    'brand': "{'id': row['brand_id'], 'name': row['brand__name']}",
+    'rating_avg': "None if row['rating__rating_avg'] is None else str(row['rating__rating_avg'])",
+    'rating_count': "row['rating__rating_count']",
+    'main_image_url': "ctx.image_url(row)",
+    'main_image_srcset': "ctx.image_srcset(row)",
+    'thumbnail': "ctx.thumbnail(row)",
+}
+
+
+def parse_fields(params):
+    """Field names for a compact listing, None for the full one; raises ValueError on bad names."""
+    if params.get('view') == 'card':
+        return CARD_FIELDS
+    raw = params.get('fields')
+    if not raw:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    full_only = [name for name in names if name in FULL_ONLY_FIELDS]
+    if full_only:
+        raise ValueError(f"{', '.join(full_only)} need the full representation; drop ?fields= to get them.")
+    unknown = [name for name in names if name not in FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    return names
+
+
+@lru_cache(maxsize=64)
+def compile_encoder(fields):
+    """
+    Build `encode(rows, ctx)` for a field tuple as one generated function, so
+    each row costs a single dict display instead of a loop over field objects.
+    """
+    items = ', '.join(f"{name!r}: {FIELD_EXPRESSIONS.get(name, f'row[{name!r}]')}" for name in fields)
+    source = f"def encode(rows, ctx):\n    return [{{{items}}} for row in rows]\n"
+    namespace = {}
+    exec(compile(source, f"<product encoder {','.join(fields)}>", 'exec'), namespace)
+    return namespace['encode']
+
+
+def columns_for(fields):
+    return list(dict.fromkeys(column for name in fields for column in FIELD_COLUMNS[name]))
+
+
+class EncoderContext:
+    """Per-request helpers for image fields: absolute URLs built from one prefix."""
+
+    def __init__(self, request):
+        self.origin = request.build_absolute_uri('/')[:-1] if request else ''
+
+    def absolute(self, url):
+        return url if url.startswith(('http://', 'https://')) else self.origin + url
+
+    def url(self, name):
+        return self.absolute(default_storage.url(name))
+
+    def _image(self, row):
+        if row['main_image']:
+            return row['main_image'], row['main_image_hash'], row['main_image_width']
+        return row['first_image'], row['first_image_hash'], row['first_image_width']
+
+    def image_url(self, row):
+        name, _, _ = self._image(row)
+        return self.url(name) if name else None
+
+    def image_srcset(self, row):
+        name, digest, width = self._image(row)
+        return srcset(digest, default_storage, self.absolute, width) if name else None
+
+    def thumbnail(self, row):
+        name, digest, _ = self._image(row)
+        if not name:
+            return None
+        if digest:
+            return self.url(derivative_name(digest, THUMBNAIL_WIDTH, next(iter(DERIVATIVE_FORMATS))))
+        return self.url(name)
+
+
+def compact_rows(queryset, fields, extra_columns=()):
+    """values() queryset carrying the columns `fields` need, plus e.g. cursor columns."""
+    columns = columns_for(fields)
+    # values() rows cannot take the query planner's prefetches
+    queryset = queryset.prefetch_related(None)
+    annotations = {name: ANNOTATIONS[name]() for name in columns if name in ANNOTATIONS}
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset.values(*dict.fromkeys(columns + list(extra_columns)))
+
+
+class CompactListMixin:
+    """
+    ViewSet mixin adding the compact listing modes to `list`. Pagination and
+    ?stream=1 work as usual; rows come from .values() and compile_encoder.
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            fields = parse_fields(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        encode = compile_encoder(fields)
+        ctx = EncoderContext(request)
+        if request.query_params.get(getattr(self, 'stream_query_param', 'stream')) in ('1', 'true'):
+            return self.stream_compact(compact_rows(queryset, fields), encode, ctx)
+
+        paginator = self.paginator
+        extra = []
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            # Cursor pagination reads its position from the ordering columns
+            extra = [column.lstrip('-') for column in paginator.get_ordering(request, queryset, self)]
+        rows = compact_rows(queryset, fields, extra)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(encode(page, ctx))
+        return Response(encode(rows, ctx))
+
+    def stream_compact(self, rows, encode, ctx):
+        encoder = JSONEncoder()
+        chunk_size = getattr(self, 'stream_chunk_size', 500)
+
+        def chunks():
+            iterator = rows.iterator(chunk_size=chunk_size)
+            yield '['
+            first = True
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                yield ('' if first else ',') + ','.join(encoder.encode(item) for item in encode(chunk, ctx))
+                first = False
+            yield ']'
+
+        response = StreamingHttpResponse(chunks(), content_type='application/json')
+        response['X-Streamed'] = 'true'
+        return response
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from petstoreapp.order_archive import ARCHIVE_BATCH, archivable, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered and cancelled orders older than --days (default "
+        "ORDER_ARCHIVE_AFTER_DAYS) and their items into the archive tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH, help="Orders moved per transaction.")
+        parser.add_argument("--limit", type=int, help="Stop after this many orders.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would move.")
+
+    def handle(self, *args, **options):
+        if options["days"] is None:
+            raise CommandError("Pass --days or set ORDER_ARCHIVE_AFTER_DAYS.")
+        before = timezone.now() - timedelta(days=options["days"])
+        if options["dry_run"]:
+            self.stdout.write(f"{archivable(before).count()} orders placed before {before:%Y-%m-%d} would move.")
+            return
+        moved = archive_orders(before, batch_size=options["batch"], limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} orders placed before {before:%Y-%m-%d}."))
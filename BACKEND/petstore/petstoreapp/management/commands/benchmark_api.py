@@ -0,0 +1,223 @@
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from petstoreapp import metrics
+from petstoreapp.benchmarking import (
+    BENCH_PASSWORD, format_summary, latency_summary, seed_store, throwaway_database, timed,
+)
+from petstoreapp.cache import CATALOG_CACHE
+from petstoreapp.models import Product
+from petstoreapp.search import get_search_engine
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Scenario:
+    """One endpoint to measure; request() returns (method, path, JSON body or None)."""
+
+    def __init__(self, name, request, requests_cap=None):
+        self.name = name
+        self.request = request
+        self.requests_cap = requests_cap  # password hashing endpoints are slow by design
+
+    def count(self, requested):
+        return min(requested, self.requests_cap) if self.requests_cap else requested
+
+
+def build_scenarios(rng, product_ids, users):
+    signups = itertools.count()
+    return [
+        Scenario("product list", lambda: ("GET", "/api/product/", None)),
+        Scenario("product detail", lambda: ("GET", f"/api/product/{rng.choice(product_ids)}/", None)),
+        Scenario("order list", lambda: ("GET", "/api/order/", None)),
+        Scenario("admin dashboard", lambda: ("GET", "/api/admin/dashboard/", None)),
+        Scenario("banner", lambda: ("GET", "/api/images/banner", None)),
+        Scenario("signup", lambda: ("POST", "/api/users/", {
+            "username": f"bench-signup-{next(signups)}", "email": "bench@example.com", "password": BENCH_PASSWORD,
+        }), requests_cap=20),
+        Scenario("token", lambda: ("POST", "/api/token/", {
+            "username": f"customer{rng.randrange(users):05d}", "password": BENCH_PASSWORD,
+        }), requests_cap=20),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway store and measure API latency, throughput and query "
+        "counts, optionally failing when a saved baseline regresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--reviews", type=int, default=4000)
+        parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint and driver.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients for the HTTP driver.")
+        parser.add_argument("--driver", choices=["client", "http", "both"], default="both")
+        parser.add_argument("--cold", action="store_true", help="Clear the response cache before every request.")
+        parser.add_argument("--only", nargs="*", help="Endpoint names to run (default: all).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a JSON baseline.")
+        parser.add_argument("--baseline", metavar="PATH", help="Compare against a baseline written earlier.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.25,
+            help="Allowed relative regression of p95 latency and throughput (0.25 = 25%%).",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with throwaway_database(on_disk=True):
+            seeded, seed_ms = timed(
+                seed_store, products=options["products"], users=options["users"],
+                orders=options["orders"], reviews=options["reviews"], seed=options["seed"],
+            )
+            # bulk seeding skips signals; bring the derived tables up to date
+            metrics.rebuild_dashboard_metrics()
+            get_search_engine().rebuild()
+            self.stdout.write(f"Seeded {seeded} in {seed_ms / 1000:.1f}s")
+
+            scenarios = build_scenarios(rng, list(Product.objects.values_list("pk", flat=True)), options["users"])
+            if options["only"]:
+                scenarios = [s for s in scenarios if s.name in options["only"]]
+                if not scenarios:
+                    raise CommandError("--only matched no endpoints.")
+
+            results = {}
+            for scenario in scenarios:
+                results[scenario.name] = {"queries": self.count_queries(scenario)}
+            if options["driver"] in ("client", "both"):
+                for scenario in scenarios:
+                    results[scenario.name]["client"] = self.run_client(scenario, options)
+            if options["driver"] in ("http", "both"):
+                with self.live_server() as base_url:
+                    for scenario in scenarios:
+                        results[scenario.name]["http"] = self.run_http(scenario, base_url, options)
+
+        self.report(results)
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w", encoding="utf-8") as out:
+                json.dump(results, out, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["threshold"])
+
+    # ---------- Drivers ---------- #
+    def count_queries(self, scenario):
+        """Queries for one request with an empty response cache."""
+        caches[CATALOG_CACHE].clear()
+        method, path, body = scenario.request()
+        with CaptureQueriesContext(connection) as queries:
+            self.send(Client(), method, path, body)
+        return len(queries)
+
+    def send(self, client, method, path, body):
+        if method == "POST":
+            response = client.post(path, body, content_type="application/json")
+        else:
+            response = client.get(path)
+        if response.status_code >= 400:
+            raise CommandError(f"{method} {path} returned {response.status_code}.")
+        return response
+
+    def run_client(self, scenario, options):
+        client = Client()
+        samples = []
+        started = time.perf_counter()
+        for _ in range(scenario.count(options["requests"])):
+            if options["cold"]:
+                caches[CATALOG_CACHE].clear()
+            method, path, body = scenario.request()
+            samples.append(timed(self.send, client, method, path, body)[1])
+        wall = time.perf_counter() - started
+        return dict(latency_summary(samples), rps=len(samples) / wall)
+
+    def run_http(self, scenario, base_url, options):
+        def fetch(_):
+            if options["cold"]:
+                caches[CATALOG_CACHE].clear()
+            method, path, body = scenario.request()
+            data = json.dumps(body).encode() if body is not None else None
+            request = urllib.request.Request(
+                base_url + path, data=data, method=method, headers={"Content-Type": "application/json"},
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+            except urllib.error.HTTPError as exc:
+                raise CommandError(f"{method} {path} returned {exc.code} over HTTP.")
+            return (time.perf_counter() - start) * 1000
+
+        count = scenario.count(options["requests"])
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            samples = list(pool.map(fetch, range(count)))
+        wall = time.perf_counter() - started
+        return dict(latency_summary(samples), rps=count / wall)
+
+    @contextmanager
+    def live_server(self):
+        """Serve the project over real HTTP on a free local port, one thread per request."""
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietRequestHandler)
+        server.set_app(WSGIHandler())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        host, port = server.server_address
+        with override_settings(ALLOWED_HOSTS=[host]):
+            thread.start()
+            self.stdout.write(f"HTTP driver serving on http://{host}:{port}")
+            try:
+                yield f"http://{host}:{port}"
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+    # ---------- Reporting ---------- #
+    def report(self, results):
+        for name, result in results.items():
+            self.stdout.write(f"\n{name}: {result['queries']} queries (cold cache)")
+            for driver in ("client", "http"):
+                if driver in result:
+                    summary = result[driver]
+                    self.stdout.write(f"  {format_summary(driver, summary)} {summary['rps']:8.1f} req/s")
+
+    def compare(self, results, path, threshold):
+        with open(path, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            if result["queries"] > before["queries"]:
+                regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            for driver in ("client", "http"):
+                if driver not in result or driver not in before:
+                    continue
+                now, then = result[driver], before[driver]
+                if now["p95"] > then["p95"] * (1 + threshold):
+                    regressions.append(f"{name} ({driver}): p95 {then['p95']:.1f}ms -> {now['p95']:.1f}ms")
+                if now["rps"] < then["rps"] * (1 - threshold):
+                    regressions.append(f"{name} ({driver}): {then['rps']:.1f} -> {now['rps']:.1f} req/s")
+        if regressions:
+            raise CommandError("Regressed past the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions past {threshold:.0%} of {path}."))
@@ -0,0 +1,126 @@
+import importlib.util
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from petstoreapp.benchmarking import (
+    format_summary, latency_summary, seed_store, serve_subprocess, throwaway_database,
+)
+from petstoreapp.models import Product
+
+WSGI_SERVER = [sys.executable, "manage.py", "runserver", "--noreload", "127.0.0.1:{port}"]
+ASGI_SERVER = [
+    sys.executable, "-m", "uvicorn", "petstore.asgi:application", "--no-access-log",
+    "--host", "127.0.0.1", "--port", "{port}",
+]
+
+# name: (sync path, async path); the sync home page is three requests
+ENDPOINTS = {
+    "product cards": ("/api/product/?view=card", "/api/async/product/?view=card"),
+    "product detail": ("/api/product/{pk}/", "/api/async/product/{pk}/"),
+    "banner": ("/api/images/banner", "/api/async/images/banner"),
+    "categories": ("/api/category/?stream=1", "/api/async/category/"),
+    "home": (
+        ("/api/images/banner", "/api/product/?view=card&page_size=8", "/api/category/?stream=1"),
+        "/api/async/home/",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a seeded throwaway database under WSGI (runserver) and ASGI "
+        "(uvicorn) and compare latency and throughput of the sync and async "
+        "catalog endpoints at several concurrency levels."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+        parser.add_argument("--uncached", action="store_true", help="Serve with the catalog cache disabled.")
+        parser.add_argument("--only", nargs="*", choices=list(ENDPOINTS), help="Endpoints to run (default: all).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--no-profiling", action="store_true",
+            help="Serve without ProfilingMiddleware (it is part of the measured stack by default).",
+        )
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("benchmark_asgi needs uvicorn: pip install uvicorn")
+        rng = random.Random(options["seed"])
+        endpoints = {name: ENDPOINTS[name] for name in options["only"] or ENDPOINTS}
+
+        with throwaway_database(on_disk=True):
+            seed_store(products=options["products"], users=20, orders=0, reviews=0, seed=options["seed"])
+            product_ids = list(Product.objects.values_list("pk", flat=True))
+            db_path = str(connection.settings_dict["NAME"])
+            connection.close()
+
+            # Profiling records go next to the throwaway database, not into the project's perf.log
+            env = dict(
+                os.environ, PETSTORE_DB_PATH=db_path,
+                PERF_LOG_FILE=os.path.join(os.path.dirname(db_path), "perf.log"),
+            )
+            if options["no_profiling"]:
+                env["PERF_PROFILING"] = "off"
+            if options["uncached"]:
+                env["CATALOG_CACHE_BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+
+            servers = [
+                ("WSGI runserver", "sync", WSGI_SERVER),
+                ("ASGI uvicorn", "sync", ASGI_SERVER),
+                ("ASGI uvicorn", "async", ASGI_SERVER),
+            ]
+            for label, flavour, command in servers:
+                self.stdout.write(f"\n== {label}, {flavour} endpoints ==")
+                with self.server(command, env) as base_url:
+                    for name, paths in endpoints.items():
+                        path = paths[0] if flavour == "sync" else paths[1]
+                        for concurrency in options["concurrency"]:
+                            summary = self.drive(base_url, path, product_ids, rng, concurrency, options["requests"])
+                            self.stdout.write(
+                                f"{format_summary(f'{name} c={concurrency}', summary)} {summary['rps']:8.1f} req/s"
+                            )
+
+    @contextmanager
+    def server(self, command, env):
+        try:
+            with serve_subprocess(command, env, settings.BASE_DIR) as base_url:
+                yield base_url
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+    def drive(self, base_url, path, product_ids, rng, concurrency, requests):
+        paths = path if isinstance(path, tuple) else (path,)
+        urls = [
+            [base_url + p.format(pk=rng.choice(product_ids)) for p in paths]
+            for _ in range(requests)
+        ]
+
+        def fetch(group):
+            # One sample per page view, however many requests it takes
+            start = time.perf_counter()
+            for url in group:
+                try:
+                    with urllib.request.urlopen(url, timeout=60) as response:
+                        response.read()
+                except urllib.error.HTTPError as exc:
+                    raise CommandError(f"GET {url} returned {exc.code}.")
+            return (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(fetch, urls))
+        wall = time.perf_counter() - started
+        return dict(latency_summary(samples), rps=requests / wall)
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from petstoreapp.authentication import user_cache
+from petstoreapp.benchmarking import (
+    BENCH_PASSWORD, format_summary, latency_summary, seed_store, throwaway_database, timed,
+)
+from petstoreapp.models import User, UserProfile
+
+ENDPOINTS = ["/api/product/?page_size=20", "/api/category/", "/api/user/profile/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare authenticated GET latency: a user lookup per request, the "
+        "cached user, and trusting the access token's claims."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=300, help="Requests per endpoint and mode.")
+
+    def handle(self, *args, **options):
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            seed_store(products=options["products"], users=10, orders=50, reviews=100)
+            user = User.objects.order_by("pk").last()
+            UserProfile.objects.get_or_create(user=user)  # seeded users are bulk-created without one
+            client = Client()
+            response = client.post("/api/token/", {"username": user.username, "password": BENCH_PASSWORD})
+            assert response.status_code == 200, response.status_code
+            # A token without claims takes the lookup path, as tokens issued before this change do
+            modes = [
+                ("lookup per request", str(AccessToken.for_user(user)), True),
+                ("cached user", str(AccessToken.for_user(user)), False),
+                ("token claims", response.json()["access"], False),
+            ]
+            for path in ENDPOINTS:
+                self.stdout.write(path)
+                client.get(path, HTTP_AUTHORIZATION=f"Bearer {modes[-1][1]}")  # warm the catalog cache
+                for label, token, cold in modes:
+                    samples = []
+                    for _ in range(options["requests"]):
+                        if cold:
+                            user_cache().clear()
+                        response, elapsed = timed(client.get, path, HTTP_AUTHORIZATION=f"Bearer {token}")
+                        assert response.status_code == 200, response.status_code
+                        samples.append(elapsed)
+                    with CaptureQueriesContext(connection) as queries:
+                        if cold:
+                            user_cache().clear()
+                        client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+                    self.stdout.write(f"  {format_summary(label, latency_summary(samples))} queries={len(queries)}")
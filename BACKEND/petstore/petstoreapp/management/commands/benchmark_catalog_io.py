@@ -0,0 +1,74 @@
+import json
+import os
+import random
+import resource
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from petstoreapp.benchmarking import ADJECTIVES, COLORS, NOUNS, SIZES, throwaway_database, timed
+from petstoreapp.catalog_io import export_feed, import_catalog
+
+
+def write_feed(path, rows, seed):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as feed:
+        for i in range(rows):
+            words = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+            feed.write(json.dumps({
+                "sku": f"FEED-{i:07d}",
+                "name": f"{words.title()} {i}",
+                "description": f"{words} for happy pets.",
+                "brand": f"Supplier {rng.randrange(50):02d}",
+                "price": f"{rng.randint(199, 9999) / 100:.2f}",
+                "stock": rng.randint(0, 200),
+                "categories": [f"Feed {rng.choice(NOUNS).title()}"],
+                "attributes": [{"name": "Color", "value": rng.choice(COLORS)}],
+                "variants": [
+                    {"label": size, "price": "9.99", "stock_quantity": rng.randint(0, 50), "weight_kg": "1.50"}
+                    for size in rng.sample(SIZES, 2)
+                ],
+            }) + "\n")
+
+
+class Command(BaseCommand):
+    help = "Measure catalog import (insert and upsert) and export throughput in rows per second."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def report(self, label, rows, elapsed_ms):
+        self.stdout.write(f"{label:<24} {rows:>8} rows in {elapsed_ms / 1000:6.2f}s  {rows / (elapsed_ms / 1000):>10,.0f} rows/s")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        workdir = tempfile.mkdtemp(prefix="petstore-feed-")
+        path = os.path.join(workdir, "feed.jsonl")
+        changed_path = os.path.join(workdir, "feed-changed.jsonl")
+        write_feed(path, rows, options["seed"])
+        write_feed(changed_path, rows, options["seed"] + 1)  # same skus, new values
+
+        with throwaway_database():
+            passes = (
+                ("import (insert)", path), ("import (unchanged)", path), ("import (all changed)", changed_path),
+            )
+            for label, feed_path in passes:
+                with open(feed_path, encoding="utf-8") as feed:
+                    _, elapsed = timed(import_catalog, feed, path, "jsonl", options["batch_size"])
+                self.report(label, rows, elapsed)
+
+            for fmt in ("jsonl", "csv"):
+                out_path = os.path.join(workdir, f"export.{fmt}")
+
+                def export():
+                    with open(out_path, "w", newline="", encoding="utf-8") as out:
+                        for chunk in export_feed(fmt):
+                            out.write(chunk)
+
+                _, elapsed = timed(export)
+                self.report(f"export ({fmt})", rows, elapsed)
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f"Peak RSS {peak_mb:.0f} MB")
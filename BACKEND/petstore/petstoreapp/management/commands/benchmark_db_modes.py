@@ -0,0 +1,187 @@
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from petstoreapp.benchmarking import (
+    format_summary, latency_summary, seed_store, serve_subprocess, throwaway_database,
+)
+from petstoreapp.models import Address, Cart, CartItem, Product, User, Variant
+
+SERVER = [sys.executable, "manage.py", "runserver", "--noreload", "127.0.0.1:{port}"]
+READ_PATHS = [
+    "/api/product/{product}/",
+    "/api/product/?view=card",
+    "/api/product/{product}/reviews/",
+    "/api/category/?stream=1",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the database modes in settings.py (SQLite rollback journal, "
+        "SQLite WAL, WAL with read replicas, optionally pooled PostgreSQL) "
+        "under a mixed load of catalog reads and checkouts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--reads", type=int, default=400, help="Catalog GETs per mode.")
+        parser.add_argument("--checkouts", type=int, default=100, help="Checkouts per mode.")
+        parser.add_argument("--readers", type=int, default=16, help="Concurrent reading clients.")
+        parser.add_argument("--writers", type=int, default=4, help="Concurrent checkout clients.")
+        parser.add_argument("--replicas", type=int, default=2, help="Stand-in replicas for the replica mode.")
+        parser.add_argument(
+            "--postgres", action="store_true",
+            help="Also run against PETSTORE_PG_* (its tables are flushed and reloaded).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix="petstore-dbmodes-")
+        try:
+            with throwaway_database(on_disk=True):
+                seed_store(products=options["products"], users=50, orders=200, reviews=1000, seed=options["seed"])
+                product_ids = list(Product.objects.values_list("pk", flat=True))
+                checkouts = self.prepare_checkouts(options["checkouts"])
+                if options["postgres"]:
+                    fixture = os.path.join(workdir, "seed.json")
+                    self.manage(["dumpdata", "petstoreapp", "auth", "--output", fixture], self.sqlite_env(
+                        "sqlite", connection.settings_dict["NAME"]
+                    ))
+                source = str(connection.settings_dict["NAME"])
+                connection.close()
+
+                modes = self.sqlite_modes(source, workdir, options["replicas"])
+                if options["postgres"]:
+                    modes.append(("postgres (pooled)", self.postgres_env(fixture)))
+                rng = random.Random(options["seed"])
+                for label, env in modes:
+                    self.stdout.write(f"\n== {label} ==")
+                    self.run_mode(env, product_ids, checkouts, rng, options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # ---------- Setup ---------- #
+    def prepare_checkouts(self, count):
+        """One open cart per checkout, all buying well-stocked variants."""
+        variants = list(Variant.objects.order_by("pk").values_list("pk", flat=True)[:20])
+        Variant.objects.filter(pk__in=variants).update(stock_quantity=10 ** 6)
+        users = User.objects.bulk_create([User(username=f"dbmodes{i:05d}") for i in range(count)])
+        addresses = Address.objects.bulk_create([
+            Address(user=user, line1="1 Main St", city="Kathmandu", state="Bagmati") for user in users
+        ])
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in users])
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, variant_id=variants[i % len(variants)], quantity=1) for i, cart in enumerate(carts)
+        ])
+        return [(cart.pk, address.pk) for cart, address in zip(carts, addresses)]
+
+    def base_env(self):
+        return dict(
+            os.environ, PERF_PROFILING="off",
+            # Every read reaches the database
+            CATALOG_CACHE_BACKEND="django.core.cache.backends.dummy.DummyCache",
+        )
+
+    def sqlite_env(self, mode, path, replicas=()):
+        return dict(
+            self.base_env(), PETSTORE_DB_MODE=mode, PETSTORE_DB_PATH=str(path),
+            PETSTORE_DB_REPLICAS=",".join(replicas),
+        )
+
+    def sqlite_modes(self, source, workdir, replica_count):
+        """Each mode serves its own copy of the seeded file, so checkouts start from the same state."""
+        def copy(name):
+            target = os.path.join(workdir, name)
+            shutil.copyfile(source, target)
+            return target
+
+        modes = [
+            ("sqlite (rollback journal)", self.sqlite_env("sqlite", copy("journal.sqlite3"))),
+            ("sqlite-wal", self.sqlite_env("sqlite-wal", copy("wal.sqlite3"))),
+        ]
+        if replica_count:
+            # Stand-ins: snapshot copies. Catalog reads do not need the checkouts' writes.
+            replicas = [copy(f"replica{i}.sqlite3") for i in range(1, replica_count + 1)]
+            modes.append((
+                f"sqlite-wal + {replica_count} read replicas",
+                self.sqlite_env("sqlite-wal", copy("primary.sqlite3"), replicas),
+            ))
+        return modes
+
+    def postgres_env(self, fixture):
+        if "PETSTORE_PG_NAME" not in os.environ:
+            raise CommandError("--postgres needs PETSTORE_PG_NAME (and PETSTORE_PG_HOST/USER/PASSWORD) set.")
+        env = dict(self.base_env(), PETSTORE_DB_MODE="postgres")
+        self.manage(["migrate", "--noinput"], env)
+        self.manage(["flush", "--noinput"], env)
+        self.manage(["loaddata", fixture], env)
+        return env
+
+    def manage(self, arguments, env):
+        result = subprocess.run(
+            [sys.executable, "manage.py", *arguments], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"manage.py {' '.join(arguments)} failed:\n{result.stderr[-2000:]}")
+
+    # ---------- Load ---------- #
+    def run_mode(self, env, product_ids, checkouts, rng, options):
+        reads = [rng.choice(READ_PATHS).format(product=rng.choice(product_ids)) for _ in range(options["reads"])]
+        errors = []
+        lock = threading.Lock()
+
+        def request(base_url, path, body=None):
+            data = body.encode() if body else None
+            req = urllib.request.Request(
+                base_url + path, data=data, method="POST" if body else "GET",
+                headers={"Content-Type": "application/json"},
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=60) as response:
+                    response.read()
+            except urllib.error.HTTPError as exc:
+                with lock:
+                    errors.append(f"{req.method} {path}: {exc.code}")
+            return (time.perf_counter() - start) * 1000
+
+        try:
+            with serve_subprocess(SERVER, env, settings.BASE_DIR) as base_url:
+                def read(path):
+                    return request(base_url, path)
+
+                def checkout(cart_and_address):
+                    cart_id, address_id = cart_and_address
+                    body = f'{{"shipping_addr": {address_id}, "payment_method": "COD"}}'
+                    return request(base_url, f"/api/cart/{cart_id}/checkout/", body)
+
+                # Readers and writers run at the same time, as in production
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["readers"]) as readers, \
+                        ThreadPoolExecutor(max_workers=options["writers"]) as writers:
+                    read_futures = readers.map(read, reads)
+                    write_futures = writers.map(checkout, checkouts)
+                    read_ms, write_ms = list(read_futures), list(write_futures)
+                wall = time.perf_counter() - started
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        for label, samples in (("catalog reads", read_ms), ("checkouts", write_ms)):
+            summary = latency_summary(samples)
+            self.stdout.write(f"{format_summary(label, summary)} {len(samples) / wall:8.1f} req/s")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{len(errors)} failed requests, e.g. {errors[0]}"))
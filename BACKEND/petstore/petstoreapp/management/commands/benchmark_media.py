@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.views import static
+
+from petstoreapp import media
+from petstoreapp.benchmarking import ADJECTIVES, NOUNS, format_summary, latency_summary, timed
+
+
+def fetch(view, request, path, **kwargs):
+    """(status, body bytes) with the whole body read, as a client would."""
+    response = view(request, path, **kwargs)
+    body = b"".join(response) if response.streaming else response.content
+    response.close()
+    return response.status_code, len(body)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare django.views.static.serve with petstoreapp.media.serve on a full "
+        "image, a revalidation, a 64 KiB range and a pre-compressed JS bundle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--image-kib", type=int, default=2048)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory(prefix="petstore-media-") as root:
+            image = Path(root, "productImages", "bench.jpg")
+            image.parent.mkdir()
+            image.write_bytes(os.urandom(options["image_kib"] * 1024))
+            bundle = Path(root, "assets", "index-Bx3kQ9aZ.js")
+            bundle.parent.mkdir()
+            bundle.write_text("".join(
+                f"export function {rng.choice(ADJECTIVES).replace('-', '_')}{i}(pet) "
+                f"{{ return pet.{rng.choice(NOUNS)} ?? {i}; }}\n"
+                for i in range(20000)
+            ))
+            stats = media.compress_tree(Path(root, "assets"))
+            self.stdout.write(f"bundle {stats['bytes_in'] / 1024:.0f} KiB, pre-compressed {stats['bytes_out'] / 1024:.0f} KiB")
+
+            image_path, bundle_path = "productImages/bench.jpg", "index-Bx3kQ9aZ.js"
+            first = media.serve(factory.get("/"), image_path, document_root=root)
+            etag, last_modified = first["ETag"], first["Last-Modified"]
+            first.close()
+
+            cases = [
+                ("full image", image_path, root, {}, {}),
+                ("revalidate image", image_path, root,
+                 {"HTTP_IF_MODIFIED_SINCE": last_modified}, {"HTTP_IF_NONE_MATCH": etag}),
+                ("64 KiB range", image_path, root, {}, {"HTTP_RANGE": "bytes=0-65535"}),
+                ("JS bundle", bundle_path, Path(root, "assets"), {}, {"HTTP_ACCEPT_ENCODING": "gzip, br"}),
+            ]
+            for label, path, document_root, static_headers, media_headers in cases:
+                precompressed = label == "JS bundle"
+                for name, view, headers, extra in (
+                    ("static.serve", static.serve, static_headers, {}),
+                    ("media.serve", media.serve, media_headers, {"precompressed": precompressed}),
+                ):
+                    samples, sent = [], 0
+                    for _ in range(options["requests"]):
+                        request = factory.get(f"/{path}", **headers)
+                        (status, sent), elapsed = timed(
+                            fetch, view, request, path, document_root=str(document_root), **extra
+                        )
+                        samples.append(elapsed)
+                    summary = latency_summary(samples)
+                    self.stdout.write(
+                        f"{format_summary(f'{label} {name}', summary)} status={status} {sent / 1024:8.1f} KiB"
+                    )
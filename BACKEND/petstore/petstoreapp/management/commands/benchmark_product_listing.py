@@ -0,0 +1,72 @@
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, RequestFactory
+from rest_framework.request import Request
+
+from petstoreapp.benchmarking import format_summary, latency_summary, seed_catalog, throwaway_database, timed
+from petstoreapp.cache import CATALOG_CACHE
+from petstoreapp.listing import CARD_FIELDS, EncoderContext, compact_rows, compile_encoder
+from petstoreapp.models import Product
+from petstoreapp.query_planner import product_query_planner, readable_field_names
+from petstoreapp.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare rows serialized per second: ProductSerializer vs the compact card encoder."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument("--rows", type=int, default=2000, help="Rows per serialization round.")
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=100, help="Page size for the API comparison.")
+        parser.add_argument("--requests", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seed_catalog(products=options["products"])
+            request = Request(RequestFactory().get("/api/product/"))
+            context = {"request": request}
+            rows = options["rows"]
+
+            def full():
+                serializer = ProductSerializer(context=context)
+                queryset = product_query_planner.plan(Product.objects.all(), readable_field_names(serializer))
+                instances = list(queryset[:rows])
+                start = time.perf_counter()
+                ProductSerializer(instances, many=True, context=context).data
+                return time.perf_counter() - start
+
+            def card():
+                encode = compile_encoder(CARD_FIELDS)
+                values = list(compact_rows(Product.objects.all(), CARD_FIELDS)[:rows])
+                start = time.perf_counter()
+                encode(values, EncoderContext(request))
+                return time.perf_counter() - start
+
+            for label, run in (("ProductSerializer", full), ("card encoder", card)):
+                encode_s, total_ms = [], []
+                for _ in range(options["rounds"]):
+                    encoded, elapsed = timed(run)
+                    encode_s.append(encoded)
+                    total_ms.append(elapsed)
+                best_encode, best_total = min(encode_s), min(total_ms) / 1000
+                self.stdout.write(
+                    f"{label:<20} {rows / best_encode:>12,.0f} rows/s serialized  "
+                    f"{rows / best_total:>10,.0f} rows/s including queries"
+                )
+
+            client = Client()
+            for label, query in (
+                ("GET full page", {"page_size": options["page_size"]}),
+                ("GET ?view=card page", {"page_size": options["page_size"], "view": "card"}),
+            ):
+                samples = []
+                for _ in range(options["requests"]):
+                    caches[CATALOG_CACHE].clear()  # measure the uncached path
+                    response, elapsed = timed(client.get, "/api/product/", query)
+                    assert response.status_code == 200, response.status_code
+                    samples.append(elapsed)
+                summary = latency_summary(samples)
+                self.stdout.write(f"{format_summary(label, summary)} {len(response.content) / 1024:8.1f} KiB")
@@ -0,0 +1,59 @@
+import random
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from petstoreapp.benchmarking import (
+    ADJECTIVES, NOUNS, format_summary, latency_summary, seed_catalog, throwaway_database, timed,
+)
+from petstoreapp.cache import CATALOG_CACHE
+from petstoreapp.search import get_search_engine
+
+
+def make_typo(word, rng):
+    # Swap two neighbouring letters past the first, which the engine keeps fixed
+    if len(word) < 5:
+        return word
+    i = rng.randint(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway catalog and measure product search latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with throwaway_database():
+            seeded, seed_ms = timed(seed_catalog, products=options["products"], seed=options["seed"])
+            engine = get_search_engine()
+            _, index_ms = timed(engine.rebuild)
+            self.stdout.write(
+                f"Seeded {seeded['products']} products in {seed_ms / 1000:.1f}s; "
+                f"{type(engine).__name__} index built in {index_ms / 1000:.1f}s"
+            )
+
+            words = [w.split("-")[0] for w in ADJECTIVES + NOUNS]
+            query_sets = {
+                "exact": [f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}" for _ in range(options["queries"])],
+                "prefix": [rng.choice(words)[:3] for _ in range(options["queries"])],
+                "typo": [make_typo(rng.choice(words), rng) for _ in range(options["queries"])],
+                "sku": [f"sku-{rng.randrange(options['products']):07d}" for _ in range(options["queries"])],
+            }
+            for kind, queries in query_sets.items():
+                samples = [timed(engine.search, q)[1] for q in queries]
+                self.stdout.write(format_summary(f"engine {kind}", latency_summary(samples)))
+
+            client = Client()
+            samples = []
+            for query in query_sets["exact"]:
+                caches[CATALOG_CACHE].clear()  # measure the uncached path
+                response, elapsed = timed(client.get, "/api/product/", {"search": query})
+                assert response.status_code == 200, response.status_code
+                samples.append(elapsed)
+            self.stdout.write(format_summary("GET /api/product/?search=", latency_summary(samples)))
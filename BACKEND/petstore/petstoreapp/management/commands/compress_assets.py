@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from petstoreapp.media import COMPRESS_MIN_SIZE, brotli_available, compress_tree
+
+
+class Command(BaseCommand):
+    help = (
+        "Write .gz (and .br when the brotli package is installed) beside the built "
+        "frontend's text assets, for /assets/ to serve pre-compressed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", default=str(settings.FRONTEND_DIST_DIR), help="Directory to compress.")
+        parser.add_argument("--min-size", type=int, default=COMPRESS_MIN_SIZE, help="Skip smaller files.")
+        parser.add_argument("--force", action="store_true", help="Recompress files that are up to date.")
+
+    def handle(self, *args, **options):
+        root = Path(options["root"])
+        if not root.is_dir():
+            raise CommandError(f"{root} does not exist; run `npm run build` in FRONTEND first.")
+        stats = compress_tree(root, min_size=options["min_size"], force=options["force"])
+        if not brotli_available():
+            self.stdout.write("brotli is not installed; wrote gzip variants only.")
+        saved = 1 - stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['files']} files, {stats['written']} variants written, "
+            f"{stats['bytes_in'] / 1024:.1f} KiB -> {stats['bytes_out'] / 1024:.1f} KiB ({saved:.0%} smaller)."
+        ))
@@ -0,0 +1,122 @@
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from petstoreapp import metrics
+from petstoreapp.benchmarking import seed_store, throwaway_database
+from petstoreapp.cache import CATALOG_CACHE
+from petstoreapp.explain import FULL_SCAN, explain_findings
+from petstoreapp.models import Order, Product, User
+from petstoreapp.profiling import QueryRecorder, sql_template
+from petstoreapp.reviews import rebuild_product_ratings
+from petstoreapp.search import get_search_engine
+from petstoreapp.urls import router
+
+# Hot query shapes that are not plain router list/detail pages
+EXTRA_PATHS = [
+    "/api/product/?view=card",
+    "/api/product/?fields=id,name,price,rating_avg",
+    "/api/product/?view=card&in_stock=true",
+    "/api/product/{product}/reviews/?sort=helpful",
+    "/api/product/{product}/reviews/?sort=highest",
+    "/api/order/?status=" + Order.Status.PAID,
+    "/api/bootstrap/",
+    "/api/images/banner",
+    "/api/admin/dashboard/",
+    "/api/me/orders/",
+]
+
+# Tables small enough that a scan is the right plan
+DEFAULT_IGNORED = ["django_session", "petstoreapp_dashboardsummary", "petstoreapp_bannerimage"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway store, request every API list and detail page, and "
+        "EXPLAIN each SELECT they run to report full table scans and unindexed sorts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--reviews", type=int, default=4000)
+        parser.add_argument("--path", action="append", default=[], help="Extra GET path to check (repeatable).")
+        parser.add_argument("--ignore", nargs="*", default=DEFAULT_IGNORED, help="Tables whose scans are expected.")
+        parser.add_argument("--sorts", action="store_true", help="Also report sorts no index serves.")
+        parser.add_argument("--fail-on-scan", action="store_true", help="Exit non-zero when a full scan is found.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"explain_endpoints supports SQLite and PostgreSQL, not {connection.vendor}.")
+
+        # The in-memory test database is shared by table locks, so everything
+        # runs on this thread's connection: no in-process worker draining jobs
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=["testserver"], TASKS_INPROCESS_WORKER=False):
+            seed_store(products=options["products"], orders=options["orders"], reviews=options["reviews"])
+            # Logging in writes a session and the user's profile; do it before any capture starts
+            client = Client()
+            client.force_login(User.objects.create_superuser("explain-admin", password="explain-admin"))
+
+            metrics.rebuild_dashboard_metrics()
+            get_search_engine().rebuild()
+            rebuild_product_ratings()
+            with connection.cursor() as cursor:
+                # Give the planner real row counts, as production would have
+                cursor.execute("ANALYZE")
+
+            findings = defaultdict(set)  # (kind, table) -> endpoints
+            for path in self.paths(options["path"]):
+                for finding in self.inspect(client, path, options):
+                    findings[(finding.kind, finding.table)].add(path)
+
+        scans = {key: paths for key, paths in findings.items() if key[0] == FULL_SCAN}
+        self.stdout.write("")
+        if not findings:
+            self.stdout.write(self.style.SUCCESS("No full scans found."))
+            return
+        for (kind, table), paths in sorted(findings.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+            self.stdout.write(f"{kind:<9} {table or '':<32} {len(paths)} endpoint(s)")
+        if scans and options["fail_on_scan"]:
+            raise CommandError(f"{len(scans)} table(s) fully scanned.")
+
+    def paths(self, extra):
+        product = Product.objects.order_by("pk").values_list("pk", flat=True).first()
+        for prefix, viewset, _ in router.registry:
+            yield f"/api/{prefix}/"
+            pk = viewset.queryset.order_by("pk").values_list("pk", flat=True).first()
+            if pk is not None:
+                yield f"/api/{prefix}/{pk}/"
+        for path in EXTRA_PATHS + extra:
+            yield path.format(product=product)
+
+    def inspect(self, client, path, options):
+        caches[CATALOG_CACHE].clear()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = client.get(path)
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+        if response.status_code >= 400:
+            self.stdout.write(self.style.WARNING(f"GET {path} returned {response.status_code}; skipped."))
+            return []
+
+        found, seen = [], set()
+        for sql, params, _ in recorder.queries:
+            template = sql_template(sql)
+            if not sql.lstrip().upper().startswith("SELECT") or template in seen:
+                continue
+            seen.add(template)
+            for finding in explain_findings(sql, params):
+                if finding.kind != FULL_SCAN and not options["sorts"]:
+                    continue
+                if finding.table in options["ignore"]:
+                    continue
+                found.append(finding)
+                self.stdout.write(f"GET {path}\n  {finding.kind}: {finding.detail}\n  {template[:300]}")
+        if not found:
+            self.stdout.write(f"GET {path}: {len(recorder.queries)} queries, indexed")
+        return found
@@ -0,0 +1,24 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from petstoreapp.catalog_io import FORMATS, export_feed, format_for
+
+
+class Command(BaseCommand):
+    help = "Stream the catalog out as a CSV or JSONL feed that import_catalog reads back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Defaults to stdout.")
+        parser.add_argument("--format", choices=FORMATS)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or (format_for(path) if path else "jsonl")
+        out = open(path, "w", newline="", encoding="utf-8") if path else sys.stdout
+        try:
+            for chunk in export_feed(fmt):
+                out.write(chunk)
+        finally:
+            if path:
+                out.close()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from petstoreapp.images import IMAGE_FIELDS, hash_field, process_image, width_field
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill responsive WebP/JPEG derivatives for stored images and merge "
+        "uploads with identical content."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Reprocess images that already have derivatives.")
+
+    def handle(self, *args, **options):
+        processed = written = merged = failed = 0
+        for model, field_name in IMAGE_FIELDS:
+            rows = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            if not options["force"]:
+                # Rows processed before widths were recorded are measured again
+                unprocessed = Q(**{hash_field(field_name): ""}) | Q(**{f"{width_field(field_name)}__isnull": True})
+                rows = rows.filter(unprocessed)
+            elif rows.exists():
+                rows.update(**{hash_field(field_name): ""})
+            for pk in rows.order_by("pk").values_list("pk", flat=True):
+                try:
+                    count, was_merged = process_image(model, pk, field_name)
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {pk}.{field_name}: {exc}")
+                    continue
+                processed += 1
+                written += count
+                merged += was_merged
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} images: wrote {written} derivatives, merged {merged} duplicate uploads"
+            + (f", {failed} failed." if failed else ".")
+        ))
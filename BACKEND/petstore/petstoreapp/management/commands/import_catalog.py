@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from petstoreapp.catalog_io import (
+    DEFAULT_BATCH_SIZE, FORMATS, CatalogImportError, format_for, import_catalog,
+)
+from petstoreapp.models import CatalogImport
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSONL product feed into the catalog, upserting on sku."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--resume", type=int, metavar="IMPORT_ID",
+                            help="Carry on a failed import from its last committed row.")
+
+    def handle(self, *args, **options):
+        resume = None
+        if options["resume"]:
+            try:
+                resume = CatalogImport.objects.get(pk=options["resume"])
+            except CatalogImport.DoesNotExist:
+                raise CommandError(f"No catalog import with id {options['resume']}.")
+            if resume.status == CatalogImport.Status.DONE:
+                raise CommandError(f"Import {resume.pk} already finished.")
+
+        started = time.perf_counter()
+        start_rows = resume.rows_processed if resume else 0
+
+        def progress(job):
+            rate = (job.rows_processed - start_rows) / max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(f"  {job.rows_processed} rows ({rate:,.0f} rows/s)")
+
+        fmt = options["format"] or format_for(options["path"])
+        with open(options["path"], newline="", encoding="utf-8") as feed:
+            try:
+                job = import_catalog(feed, options["path"], fmt, options["batch_size"], resume, progress)
+            except CatalogImportError as exc:
+                raise CommandError(f"{exc} Fix the feed and rerun with --resume {exc.job.pk} to continue.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {job.pk} done: {job.rows_created} created, {job.rows_updated} updated."
+        ))
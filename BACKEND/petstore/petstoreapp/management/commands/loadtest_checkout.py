@@ -0,0 +1,71 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.test import Client
+
+from petstoreapp.benchmarking import (
+    format_summary, latency_summary, seed_catalog, throwaway_database, timed,
+)
+from petstoreapp.models import Address, Cart, CartItem, OrderItem, User, Variant
+
+
+class Command(BaseCommand):
+    help = (
+        "Race many parallel checkouts for one variant on a throwaway database "
+        "and verify that stock is never oversold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--stock", type=int, default=50)
+        parser.add_argument("--quantity", type=int, default=1, help="Units each buyer orders.")
+
+    def handle(self, *args, **options):
+        with throwaway_database(on_disk=True):
+            seed_catalog(products=10)
+            variant = Variant.objects.order_by("pk").first()
+            Variant.objects.filter(pk=variant.pk).update(stock_quantity=options["stock"])
+
+            carts = []
+            for i in range(options["buyers"]):
+                user = User.objects.create(username=f"buyer{i}")
+                address = Address.objects.create(user=user, line1="1 Main St", city="Kathmandu", state="Bagmati")
+                cart = Cart.objects.create(user=user)
+                CartItem.objects.create(cart=cart, variant=variant, quantity=options["quantity"])
+                carts.append((cart.pk, address.pk))
+
+            def buy(cart_and_address):
+                cart_id, address_id = cart_and_address
+                try:
+                    response, elapsed = timed(
+                        Client().post,
+                        f"/api/cart/{cart_id}/checkout/",
+                        {"shipping_addr": address_id, "payment_method": "COD"},
+                        content_type="application/json",
+                    )
+                    return response.status_code, elapsed
+                finally:
+                    connections.close_all()
+
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                results = list(pool.map(buy, carts))
+
+            outcomes = Counter(code for code, _ in results)
+            sold = OrderItem.objects.filter(variant=variant).aggregate(units=Sum("quantity"))["units"] or 0
+            remaining = Variant.objects.get(pk=variant.pk).stock_quantity
+
+            self.stdout.write(f"Outcomes by status: {dict(sorted(outcomes.items()))}")
+            self.stdout.write(f"Units sold {sold}, stock left {remaining}, started with {options['stock']}")
+            self.stdout.write(format_summary("checkout (all)", latency_summary([ms for _, ms in results])))
+            self.stdout.write(format_summary(
+                "checkout (201)", latency_summary([ms for code, ms in results if code == 201])
+            ))
+
+            expected = min(options["stock"] // options["quantity"], options["buyers"]) * options["quantity"]
+            if sold + remaining != options["stock"] or sold != expected:
+                raise CommandError(f"Stock mismatch: expected {expected} sold, got {sold}.")
+            self.stdout.write(self.style.SUCCESS("No overselling detected."))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from petstoreapp.profiling import endpoint_report, read_log
+
+
+class Command(BaseCommand):
+    help = "Summarize the request profiling log: p50/p95/p99 per endpoint and N+1 query suspects."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=settings.PERF_LOG_FILE, help="Profiling log (rotations are read too).")
+        parser.add_argument("--rotations", type=int, default=5)
+        parser.add_argument("--top", type=int, default=20, help="Show the N slowest endpoints by p95.")
+
+    def handle(self, *args, **options):
+        log = options["log"]
+        # Oldest rotation first, so the records come out in time order
+        paths = [f"{log}.{i}" for i in range(options["rotations"], 0, -1)] + [log]
+        report = endpoint_report(read_log(paths))
+        if not report:
+            self.stdout.write(f"No profiling records in {log}.")
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<48} {'reqs':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'db':>7} {'ser':>7} {'queries':>9} {'dups':>5}"
+        )
+        for row in report[:options["top"]]:
+            self.stdout.write(
+                f"{row['route'][:48]:<48} {row['requests']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {row['avg_db_ms']:>7.1f} {row['avg_serialize_ms']:>7.1f} "
+                f"{row['avg_queries']:>5.1f}/{row['max_queries']:<3} {row['duplicate_queries']:>5}"
+            )
+
+        offenders = [row for row in report if row["n_plus_one"]]
+        if offenders:
+            self.stdout.write(self.style.WARNING("\nN+1 suspects (one statement repeated per row):"))
+            for row in offenders:
+                for suspect in row["n_plus_one"]:
+                    self.stdout.write(f"  {row['route']}  x{suspect['max_repeats']}  {suspect['sql']}")
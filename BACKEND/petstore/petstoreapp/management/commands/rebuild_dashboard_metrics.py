@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from petstoreapp.metrics import rebuild_dashboard_metrics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized admin dashboard KPIs from the order tables."
+
+    def handle(self, *args, **options):
+        summary = rebuild_dashboard_metrics()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt dashboard metrics: {summary.total_orders} orders, "
+            f"{summary.total_customers} customers, {summary.total_sales} in sales."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from petstoreapp.reviews import rebuild_product_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild every product's rating average, count and star histogram from the review table."
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_product_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {rebuilt} products."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from petstoreapp.models import Product
+from petstoreapp.search import get_search_engine
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index from the catalog tables."
+
+    def handle(self, *args, **options):
+        engine = get_search_engine()
+        engine.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {type(engine).__name__} index for {Product.objects.count()} products."
+        ))
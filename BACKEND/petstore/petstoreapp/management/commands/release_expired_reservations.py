@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from petstoreapp.checkout import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Return stock held by expired cart reservations."
+
+    def handle(self, *args, **options):
+        released = release_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservations."))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from petstoreapp.analytics import rebuild_rollups, refresh_dirty_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the sales rollups up to date by rebuilding the days orders, items "
+        "or payments changed on; --rebuild recomputes every day instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Recompute every day with orders.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        days = rebuild_rollups() if options["rebuild"] else refresh_dirty_days()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {days} days in {elapsed:.2f}s."))
@@ -0,0 +1,66 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from petstoreapp.tasks import become_worker_process, queue_stats, work
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers: claim due jobs from the queue, run them and "
+        "retry failures with backoff. Also queues the TASKS_PERIODIC tasks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=1, help="Worker threads in this process.")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument("--stats", action="store_true", help="Print queue stats and exit.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.print_stats(queue_stats())
+            return
+
+        become_worker_process()
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                # Finish the jobs in hand, then exit
+                signal.signal(signum, lambda *_: stop.set())
+
+        processed = []
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        def run(index):
+            try:
+                # Only the first thread keeps the periodic schedule
+                processed.append(work(
+                    worker=f"{prefix}:{index}", burst=options["burst"], poll_interval=options["poll"],
+                    batch=options["batch"], stop=stop, periodic=index == 0,
+                ))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(options["concurrency"])]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"{len(threads)} worker(s) started as {prefix}.")
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS(f"Ran {sum(processed)} jobs."))
+
+    def print_stats(self, stats):
+        for label, count in stats["counts"].items():
+            self.stdout.write(f"{label:<10} {count}")
+        self.stdout.write(f"Oldest due job waiting {stats['oldest_due_seconds']:.1f}s")
+        for key in ("wait_ms", "run_ms"):
+            self.stdout.write(f"{key:<10} p50={stats[key]['p50']:.1f}ms p95={stats[key]['p95']:.1f}ms")
+        for name, count in stats["failed_by_task"].items():
+            self.stdout.write(self.style.WARNING(f"failed     {name}: {count}"))
@@ -0,0 +1,276 @@
+"""
+Media and frontend asset delivery. serve() answers for files under a
+document root with a strong ETag (the content's SHA-256), Last-Modified,
+conditional 304s and single-range 206s. Content-addressed names
+(derivatives/<hash>/..., Vite's name-<hash>.js) are cached as immutable for
+a year; anything else for MEDIA_CACHE_MAX_AGE and then revalidated.
+
+Bodies go out as a FileResponse over the open file, which WSGI servers with
+wsgi.file_wrapper (gunicorn) send with os.sendfile; with
+MEDIA_SENDFILE_HEADER set the front server reads the file itself
+(X-Accel-Redirect for nginx, X-Sendfile for Apache).
+
+For the built frontend, compress_tree() writes .gz (and .br when the brotli
+package is installed) next to each text asset, and serve(precompressed=True)
+picks the smallest one the client accepts.
+"""
+import gzip
+import hashlib
+import importlib
+import importlib.util
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Content-addressed names: image derivatives (images.py) and Vite's hashed build output
+HASHED_MEDIA = re.compile(r"^derivatives/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})/")
+HASHED_ASSET = re.compile(r"-[\w-]{8}\.\w+$")
+
+# Pre-compressed siblings: Content-Encoding -> suffix, best first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE = {".css", ".html", ".js", ".json", ".map", ".mjs", ".svg", ".txt", ".wasm", ".xml"}
+COMPRESS_MIN_SIZE = 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MediaFileResponse(FileResponse):
+    block_size = 64 * 1024
+
+
+class RangeFile:
+    """
+    `length` bytes of an open file from `start`. The file is left positioned
+    at `start`, so a sendfile-capable file_wrapper sends from there for the
+    response's Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+# ---------- Validators ---------- #
+@lru_cache(maxsize=4096)
+def _file_digest(path, size, mtime_ns):
+    # size and mtime are part of the key, so a rewritten file is hashed again
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(fullpath, stat, relative_path, encoding=None):
+    """Strong ETag: the digest in a content-addressed path, else the hash of the file."""
+    match = HASHED_MEDIA.match(relative_path)
+    if match and encoding is None:
+        tag = f"{match['digest'][:32]}-{posixpath.basename(relative_path)}"
+    else:
+        tag = _file_digest(str(fullpath), stat.st_size, stat.st_mtime_ns)[:32]
+    return quote_etag(f"{tag}-{encoding}" if encoding else tag)
+
+
+def cache_control(relative_path, immutable):
+    if immutable is not None and immutable.search(relative_path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+# ---------- Negotiation ---------- #
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def pick_variant(request, fullpath):
+    """(path to send, Content-Encoding or None) among the pre-compressed siblings."""
+    accepted = accepted_encodings(request)
+    for encoding, suffix in ENCODINGS.items():
+        if encoding in accepted or "*" in accepted:
+            candidate = fullpath.with_name(fullpath.name + suffix)
+            if candidate.is_file():
+                return candidate, encoding
+    return fullpath, None
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single satisfiable `bytes=` range, None to
+    send the whole file (no header, several ranges, or one we do not parse),
+    or False when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(" ", "")) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            return False
+    return (start, end) if start < size else False
+
+
+def _if_range_passes(request, etag, last_modified):
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    return parse_http_date_safe(value) == int(last_modified)
+
+
+# ---------- View ---------- #
+@require_safe
+def serve(request, path, document_root=None, immutable=None, precompressed=False):
+    """
+    Serve `path` under `document_root`. `immutable` is a pattern for names
+    that change with their content; `precompressed` serves .br/.gz siblings.
+    """
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = Path(safe_join(document_root, path))
+    except SuspiciousFileOperation:
+        # Outside document_root: a 404, as django.views.static.serve answers
+        raise Http404("Not found.")
+    if not fullpath.is_file() or (precompressed and fullpath.suffix in (".br", ".gz")):
+        raise Http404("Not found.")
+
+    encoding = None
+    if precompressed and fullpath.suffix in COMPRESSIBLE:
+        fullpath, encoding = pick_variant(request, fullpath)
+    stat = fullpath.stat()
+    etag = file_etag(fullpath, stat, path, encoding)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": cache_control(path, immutable),
+        "Accept-Ranges": "bytes",
+    }
+    if precompressed:
+        headers["Vary"] = "Accept-Encoding"
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified.setdefault(name, value)
+        return not_modified
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", None)
+    if sendfile_header:
+        # The front server streams the file and handles Range itself
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if sendfile_header == "X-Accel-Redirect":
+            # An internal nginx location aliased to / under MEDIA_SENDFILE_PREFIX
+            response[sendfile_header] = quote(f"{settings.MEDIA_SENDFILE_PREFIX.rstrip('/')}{fullpath.as_posix()}")
+        else:
+            response[sendfile_header] = str(fullpath)
+        return response
+
+    size = stat.st_size
+    byte_range = parse_range(request.headers.get("Range"), size)
+    if byte_range is not None and not _if_range_passes(request, etag, stat.st_mtime):
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = fullpath.open("rb")
+    if byte_range:
+        start, end = byte_range
+        response = MediaFileResponse(RangeFile(file, start, end - start + 1), status=206,
+                                     content_type=content_type, headers=headers)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    else:
+        response = MediaFileResponse(file, content_type=content_type, headers=headers)
+    return response
+
+
+# ---------- Pre-compression ---------- #
+def brotli_available():
+    return importlib.util.find_spec("brotli") is not None
+
+
+def compress_tree(root, min_size=COMPRESS_MIN_SIZE, force=False):
+    """
+    Write .gz (and .br when brotli is installed) beside every compressible
+    file under `root` that is at least `min_size` bytes, keeping only
+    variants smaller than the original. Returns {"files", "written",
+    "bytes_in", "bytes_out"} where bytes_out counts the smallest variant.
+    """
+    brotli = importlib.import_module("brotli") if brotli_available() else None
+    stats = {"files": 0, "written": 0, "bytes_in": 0, "bytes_out": 0}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            source = Path(dirpath) / filename
+            if source.suffix not in COMPRESSIBLE or source.stat().st_size < min_size:
+                continue
+            data = source.read_bytes()
+            stats["files"] += 1
+            stats["bytes_in"] += len(data)
+            smallest = len(data)
+            compressors = {".gz": lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)}
+            if brotli:
+                compressors[".br"] = lambda raw: brotli.compress(raw, quality=11)
+            for suffix, compress in compressors.items():
+                target = source.with_name(source.name + suffix)
+                if not force and target.exists() and target.stat().st_mtime_ns >= source.stat().st_mtime_ns:
+                    smallest = min(smallest, target.stat().st_size)
+                    continue
+                packed = compress(data)
+                if len(packed) >= len(data):
+                    target.unlink(missing_ok=True)
+                    continue
+                target.write_bytes(packed)
+                stats["written"] += 1
+                smallest = min(smallest, len(packed))
+            stats["bytes_out"] += smallest
+    return stats
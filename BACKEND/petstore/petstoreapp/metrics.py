@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, DashboardSummary, Order, OrderItem, Product, ProductSales, Variant,
+)
+
+# The summary table only ever holds this row. Until it exists nothing is
+# materialized, incremental updates are skipped and the first read rebuilds.
+SUMMARY_PK = 1
+
+
+def line_total():
+    return ExpressionWrapper(
+        F('unit_price') * F('quantity'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def rebuild_dashboard_metrics():
+    """Recompute every dashboard KPI from the live and archived order tables."""
+    with transaction.atomic():
+        orders, sales = 0, Decimal('0')
+        for model in (Order, ArchivedOrder):
+            totals = model.objects.aggregate(count=Count('id'), sales=Sum('total_amount'))
+            orders += totals['count']
+            sales += totals['sales'] or Decimal('0')
+        customers = (
+            Order.objects.filter(user__isnull=False).values('user')
+            .union(ArchivedOrder.objects.filter(user__isnull=False).values('user'))
+            .count()
+        )
+        summary, _ = DashboardSummary.objects.update_or_create(
+            pk=SUMMARY_PK,
+            defaults={
+                'total_products': Product.objects.count(),
+                'total_orders': orders,
+                'total_customers': customers,
+                'total_sales': sales,
+            },
+        )
+
+        ProductSales.objects.all().delete()
+        sold = {}
+        for model, product in ((OrderItem, 'variant__product'), (ArchivedOrderItem, 'product')):
+            rows = (
+                model.objects.values_list(product)
+                .annotate(sold_count=Count('id'), total_revenue=Sum(line_total()))
+                .order_by()
+            )
+            for product_id, count, revenue in rows.iterator():
+                prev_count, prev_revenue = sold.get(product_id, (0, Decimal('0')))
+                sold[product_id] = (prev_count + count, prev_revenue + (revenue or Decimal('0')))
+        # Archived lines may name products deleted since
+        existing = set(Product.objects.filter(pk__in=sold).values_list('pk', flat=True))
+        ProductSales.objects.bulk_create(
+            [
+                ProductSales(product_id=product_id, sold_count=count, total_revenue=revenue)
+                for product_id, (count, revenue) in sold.items() if product_id in existing
+            ],
+            batch_size=500,
+        )
+    return summary
+
+
+def get_dashboard_summary():
+    summary = DashboardSummary.objects.filter(pk=SUMMARY_PK).first()
+    return summary or rebuild_dashboard_metrics()
+
+
+def is_materialized():
+    return DashboardSummary.objects.filter(pk=SUMMARY_PK).exists()
+
+
+# ---------- Incremental updates ---------- #
+def adjust_summary(products=0, orders=0, customers=0, sales=Decimal('0')):
+    # A no-op while nothing is materialized: filter() matches no row
+    DashboardSummary.objects.filter(pk=SUMMARY_PK).update(
+        total_products=F('total_products') + products,
+        total_orders=F('total_orders') + orders,
+        total_customers=F('total_customers') + customers,
+        total_sales=F('total_sales') + sales,
+    )
+
+
+def adjust_product_sales(product_id, sold=0, revenue=Decimal('0')):
+    if product_id is None or not is_materialized():
+        return
+    changes = {'sold_count': F('sold_count') + sold, 'total_revenue': F('total_revenue') + revenue}
+    if ProductSales.objects.filter(product_id=product_id).update(**changes):
+        return
+    try:
+        # In a savepoint, so losing the insert race leaves the caller's transaction usable
+        with transaction.atomic():
+            ProductSales.objects.create(product_id=product_id, sold_count=sold, total_revenue=revenue)
+    except IntegrityError:
+        # Another writer created the row first; add to theirs
+        ProductSales.objects.filter(product_id=product_id).update(**changes)
+
+
+def has_other_orders(user_id, exclude_pk=None):
+    if user_id is None:
+        return False
+    return (
+        Order.objects.filter(user_id=user_id).exclude(pk=exclude_pk).exists()
+        or ArchivedOrder.objects.filter(user_id=user_id).exists()
+    )
+
+
+def product_id_for_variant(variant_id):
+    return Variant.objects.filter(pk=variant_id).values_list('product_id', flat=True).first()
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+def build_category_paths(apps, schema_editor):
+    Category = apps.get_model('petstoreapp', 'Category')
+    categories = {c.pk: c for c in Category.objects.all()}
+
+    def place(node):
+        if node.path:
+            return
+        parent = categories.get(node.parent_id)
+        if parent:
+            place(parent)
+        node.depth = parent.depth + 1 if parent else 0
+        node.full_path = f"{parent.full_path} -> {node.name}" if parent else node.name
+        node.path = f"{parent.path if parent else ''}{node.pk}/"
+
+    for node in categories.values():
+        place(node)
+    Category.objects.bulk_update(categories.values(), ['path', 'depth', 'full_path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petstoreapp', '0009_dashboard_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='full_path',
+            field=models.CharField(default='', editable=False, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_category_paths, migrations.RunPython.noop),
+    ]
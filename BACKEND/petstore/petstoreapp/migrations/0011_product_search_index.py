@@ -0,0 +1,65 @@
+from django.db import migrations
+
+FTS_TABLE = 'petstoreapp_product_fts'
+VOCAB_TABLE = 'petstoreapp_product_fts_vocab'
+COLUMNS = ('name', 'sku', 'brand', 'categories', 'attributes', 'description')
+
+
+def index_existing_products(apps, schema_editor):
+    # A frozen copy of search.product_documents: migrations must not follow the live module
+    Product = apps.get_model('petstoreapp', 'Product')
+    insert = (
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join(['%s'] * (len(COLUMNS) + 1))})"
+    )
+    products = Product.objects.select_related('brand').prefetch_related('attributes', 'categories')
+    rows = []
+    with schema_editor.connection.cursor() as cursor:
+        for product in products.iterator(chunk_size=1000):
+            rows.append((
+                product.pk,
+                product.name,
+                product.sku,
+                product.brand.name,
+                ' '.join(c.full_path or c.name for c in product.categories.all()),
+                ' '.join(f'{a.name} {a.value}' for a in product.attributes.all()),
+                product.description,
+            ))
+            if len(rows) == 1000:
+                cursor.executemany(insert, rows)
+                rows = []
+        if rows:
+            cursor.executemany(insert, rows)
+
+
+def create_search_index(apps, schema_editor):
+    # Only SQLite gets an FTS5 index; other backends use DatabaseSearchEngine
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, sku, brand, categories, attributes, description, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')"
+    )
+    index_existing_products(apps, schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {VOCAB_TABLE}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petstoreapp', '0010_category_tree_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
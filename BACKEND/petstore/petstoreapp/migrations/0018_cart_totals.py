@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:10
+
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+
+
+def fill_tokens_and_totals(apps, schema_editor):
+    Cart = apps.get_model('petstoreapp', 'Cart')
+    CartItem = apps.get_model('petstoreapp', 'CartItem')
+    totals = {
+        row['cart_id']: row
+        for row in CartItem.objects.values('cart_id').order_by().annotate(
+            item_count=Sum('quantity'),
+            subtotal=Sum(F('quantity') * F('variant__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+    }
+    carts = list(Cart.objects.all())
+    for cart in carts:
+        row = totals.get(cart.pk, {})
+        cart.token = uuid.uuid4()
+        cart.item_count = row.get('item_count') or 0
+        cart.subtotal = row.get('subtotal') or Decimal('0')
+    Cart.objects.bulk_update(carts, ['token', 'item_count', 'subtotal'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petstoreapp', '0017_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        # Unique tokens for existing rows: add nullable, fill, then constrain
+        migrations.AddField(
+            model_name='cart',
+            name='token',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_tokens_and_totals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cart',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:04
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petstoreapp', '0019_order_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupDirtyDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('product', 'Product'), ('brand', 'Brand'), ('category', 'Category'), ('payment', 'Payment method')], max_length=8)),
+                ('key', models.CharField(blank=True, max_length=20)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', 'day'], name='sales_rollup_dimension_day')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'day'), name='sales_rollup_unique')],
+            },
+        ),
+    ]
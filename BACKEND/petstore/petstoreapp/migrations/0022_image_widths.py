@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petstoreapp', '0021_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bannerimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_url_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser, Group, Permission,User
 from decimal import Decimal
@@ -77,18 +81,80 @@ class Category(models.Model):
     name = models.CharField(max_length=80, unique=True)
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="children")
     description = models.TextField(blank=True)
+    # Materialized path index, kept current by save(): "<root id>/<child id>/.../<own id>/"
+    path = models.CharField(max_length=255, db_index=True, editable=False, default="")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    full_path = models.CharField(max_length=512, editable=False, default="")
 
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
 
     def __str__(self):
-        full_path = [self.name]
-        k = self.parent
-        while k:
-            full_path.append(k.name)
-            k = k.parent
-        return " -> ".join(full_path[::-1])
+        return self.full_path or self.name
+
+    @staticmethod
+    def subtree_range(path):
+        # Ids are digits and "/" sorts just before "0", so every path under
+        # `path` falls in [path, path-without-slash + "0"): one index range scan.
+        return {"path__gte": path, "path__lt": path[:-1] + "0"}
+
+    @classmethod
+    def subtree_product_ids(cls, path):
+        ranged = {f"category__{lookup}": value for lookup, value in cls.subtree_range(path).items()}
+        return ProductCategory.objects.filter(**ranged).values("product_id")
+
+    def get_descendants(self, include_self=True):
+        qs = Category.objects.filter(**self.subtree_range(self.path))
+        return qs if include_self else qs.exclude(pk=self.pk)
+
+    def _place(self, parent):
+        self.depth = parent.depth + 1 if parent else 0
+        self.full_path = f"{parent.full_path} -> {self.name}" if parent else self.name
+        self.path = f"{parent.path if parent else ''}{self.pk}/" if self.pk else ""
+
+    def save(self, *args, **kwargs):
+        old = None
+        if self.pk:
+            old = Category.objects.filter(pk=self.pk).values("path", "full_path").first()
+        # Read the parent fresh: an in-memory copy may predate a subtree move
+        parent = Category.objects.filter(pk=self.parent_id).first() if self.parent_id else None
+        # The parent's path lists its ancestors' ids and its own, so a cycle
+        # shows up as our id among them (whatever our stored path is)
+        if parent and self.pk and f"/{self.pk}/" in f"/{parent.path}":
+            raise ValidationError(_("A category cannot be moved under itself or its subcategories."))
+
+        self._place(parent)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "path", "depth", "full_path"}
+        super().save(*args, **kwargs)
+
+        if not self.path:
+            # New rows only learn their id on insert
+            self._place(parent)
+            Category.objects.filter(pk=self.pk).update(path=self.path)
+        elif old and (old["path"], old["full_path"]) != (self.path, self.full_path):
+            self._rebuild_subtree(old["path"])
+
+    def _rebuild_subtree(self, old_path):
+        nodes = {self.pk: self}
+        if old_path:
+            descendants = list(
+                Category.objects.filter(**self.subtree_range(old_path)).exclude(pk=self.pk).order_by("path")
+            )
+        else:
+            # A row saved without a path has no range to scan: walk down level by level
+            descendants, level = [], [self.pk]
+            while level:
+                children = list(Category.objects.filter(parent_id__in=level).order_by("pk"))
+                descendants += children
+                level = [child.pk for child in children]
+        # Ordered by path (or level), so a parent is always placed before its children
+        for node in descendants:
+            node._place(nodes[node.parent_id])
+            nodes[node.pk] = node
+        Category.objects.bulk_update(descendants, ["path", "depth", "full_path"], batch_size=500)
 
 
 class Brand(models.Model):
@@ -106,17 +172,26 @@ class Product(models.Model):
     sku = models.CharField(max_length=40, unique=True)
     name = models.CharField(max_length=120)
     main_image = models.ImageField(upload_to="mainProductImages", null=True, blank=True)
+    main_image_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # The original's width in pixels: srcset never offers more than it has
+    main_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     description = models.TextField()
     brand = models.ForeignKey('Brand', on_delete=models.PROTECT, related_name="products")
     categories = models.ManyToManyField('Category', through="ProductCategory")
     price = models.DecimalField(max_digits=10, decimal_places=2)  # New price field
     stock = models.PositiveIntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Storefront listings (featured, bootstrap) only ever show active products
+            models.Index(
+                fields=["-created_at", "-id"], condition=models.Q(is_active=True), name="product_active_newest",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -135,6 +210,8 @@ class ProductCategory(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image_url = models.ImageField(upload_to="productImages")
+    image_url_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    image_url_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     alt_text = models.CharField(max_length=140, blank=True)
     sort_order = models.PositiveSmallIntegerField(default=0)
 
@@ -167,6 +244,10 @@ class Variant(models.Model):
 
     class Meta:
         unique_together = ("product", "label")
+        indexes = [
+            # "In stock" filters and facets only look at variants that have stock
+            models.Index(fields=["product"], condition=models.Q(stock_quantity__gt=0), name="variant_in_stock"),
+        ]
 
     def __str__(self):
         return f"{self.product.name} – {self.label}"
@@ -175,9 +256,20 @@ class Variant(models.Model):
 # ---------- Cart & Orders ---------- #
 class Cart(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    # Lets an anonymous shopper reach their cart until it is merged on login
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Running totals over the items, kept by carts.py
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # A user's open cart
+            models.Index(fields=["user"], condition=models.Q(is_active=True), name="cart_user_active"),
+        ]
 
     def __str__(self):
         return f"Cart {self.pk}"
@@ -195,6 +287,18 @@ class CartItem(models.Model):
         return f"{self.variant} x {self.quantity}"
 
 
+class StockReservation(models.Model):
+    """Stock taken off a variant for a cart until checkout or `expires_at` (see checkout.py)."""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="reservations")
+    variant = models.ForeignKey(Variant, on_delete=models.PROTECT, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.variant} held for cart {self.cart_id}"
+
+
 class Order(models.Model):
     class Status(models.TextChoices):
         PENDING = "PEN", _("Pending")
@@ -205,10 +309,17 @@ class Order(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     status = models.CharField(max_length=3, choices=Status.choices, default=Status.PENDING)
-    placed_at = models.DateTimeField(auto_now_add=True)
+    placed_at = models.DateTimeField(auto_now_add=True, db_index=True)
     shipping_addr = models.ForeignKey(Address, on_delete=models.PROTECT, related_name="order_shipping")
     total_amount = models.DecimalField(max_digits=12, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # Order history per customer and the status queues, newest first
+            models.Index(fields=["user", "-placed_at"], name="order_user_placed"),
+            models.Index(fields=["status", "-placed_at"], name="order_status_placed"),
+        ]
+
     def __str__(self):
         return f"Order {self.pk}"
 
@@ -238,25 +349,225 @@ class Payment(models.Model):
         return f"Payment for Order {self.order.id}"
 
 
+# ---------- Order Archive ---------- #
+class ArchivedOrder(models.Model):
+    """
+    A finished order moved out of the hot Order table (see order_archive.py).
+    It keeps the original order id and snapshots what the order pointed at.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
+    status = models.CharField(max_length=3, choices=Order.Status.choices)
+    placed_at = models.DateTimeField()
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    shipping_address = models.TextField(blank=True)
+    payment_method = models.CharField(max_length=3, choices=Payment.Method.choices, blank=True)
+    payment_status = models.CharField(max_length=20, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-placed_at"], name="archived_order_user_placed"),
+        ]
+
+    def __str__(self):
+        return f"Archived order {self.pk}"
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="items")
+    # Plain references: catalog rows may be deleted once nothing hot points at them
+    variant = models.ForeignKey(Variant, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    product_name = models.CharField(max_length=120)
+    variant_label = models.CharField(max_length=80)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+
 # ---------- Reviews ---------- #
 class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reviews")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    rating = models.PositiveSmallIntegerField()
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     title = models.CharField(max_length=120, blank=True)
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    helpful_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         unique_together = ("product", "user")
+        indexes = [
+            # One per feed sort in reviews.py; each ends in id for the keyset tie-break
+            models.Index(fields=["product", "created_at", "id"], name="review_product_newest"),
+            models.Index(fields=["product", "rating", "id"], name="review_product_rating"),
+            models.Index(fields=["product", "helpful_count", "id"], name="review_product_helpful"),
+        ]
 
     def __str__(self):
         return f"{self.user} review on {self.product}"
 
 
+class ReviewVote(models.Model):
+    """One "helpful" vote; Review.helpful_count is the running total."""
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="votes")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("review", "user")
+
+    def __str__(self):
+        return f"{self.user} found review {self.review_id} helpful"
+
+
+class ProductRating(models.Model):
+    """Review aggregates per product, kept current by reviews.py."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="rating")
+    rating_count = models.PositiveIntegerField(default=0, db_index=True)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal("0"), db_index=True)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def histogram(self):
+        return {str(stars): getattr(self, f"stars_{stars}") for stars in range(1, 6)}
+
+    def __str__(self):
+        return f"{self.product.name}: {self.rating_avg} from {self.rating_count} reviews"
+
+
 class BannerImage(models.Model):
     image = models.ImageField(upload_to='banners/')
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     alt_text = models.CharField(max_length=120, blank=True)
 
     def __str__(self):
         return self.alt_text or f"Banner {self.id}"
+
+
+# ---------- Dashboard Metrics ---------- #
+class DashboardSummary(models.Model):
+    """Single-row materialized KPIs for the admin dashboard (see metrics.py)."""
+    total_products = models.PositiveIntegerField(default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    total_customers = models.PositiveIntegerField(default=0)
+    total_sales = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Dashboard summary"
+
+    def __str__(self):
+        return f"Dashboard summary ({self.updated_at:%Y-%m-%d %H:%M})"
+
+
+class ProductSales(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="sales")
+    sold_count = models.PositiveIntegerField(default=0, db_index=True)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        verbose_name_plural = "Product sales"
+        ordering = ['-sold_count']
+
+    def __str__(self):
+        return f"{self.product.name}: {self.sold_count} sold"
+
+
+class SalesRollup(models.Model):
+    """
+    One day's orders, units and revenue for the whole store or one product,
+    brand, category or payment method (see analytics.py).
+    """
+    class Dimension(models.TextChoices):
+        TOTAL = "total", _("Total")
+        PRODUCT = "product", _("Product")
+        BRAND = "brand", _("Brand")
+        CATEGORY = "category", _("Category")
+        PAYMENT = "payment", _("Payment method")
+
+    day = models.DateField()
+    dimension = models.CharField(max_length=8, choices=Dimension.choices)
+    # Product/brand/category id or payment method code; blank for TOTAL
+    key = models.CharField(max_length=20, blank=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key", "day"], name="sales_rollup_unique"),
+        ]
+        indexes = [
+            # Range queries and per-dimension breakdowns
+            models.Index(fields=["dimension", "day"], name="sales_rollup_dimension_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.dimension} {self.key}".rstrip()
+
+
+class SalesRollupDirtyDay(models.Model):
+    """A day whose orders changed since its SalesRollup rows were built."""
+    day = models.DateField(primary_key=True)
+
+
+# ---------- Catalog Import ---------- #
+class CatalogImport(models.Model):
+    """Progress of one feed import; rows_processed is the resume point (see catalog_io.py)."""
+    class Status(models.TextChoices):
+        RUNNING = "RUN", _("Running")
+        FAILED = "FAI", _("Failed")
+        DONE = "DON", _("Done")
+
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.RUNNING)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.pk} of {self.source} ({self.get_status_display()})"
+
+
+# ---------- Background Jobs ---------- #
+class Job(models.Model):
+    """One queued call of a registered task (see tasks.py)."""
+    class Status(models.TextChoices):
+        QUEUED = "QUE", _("Queued")
+        RUNNING = "RUN", _("Running")
+        DONE = "DON", _("Done")
+        FAILED = "FAI", _("Failed")
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed while the job runs; a RUNNING job whose heartbeat stops is handed out again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due job; stats count by status
+            models.Index(fields=["status", "run_at"], name="job_status_due"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
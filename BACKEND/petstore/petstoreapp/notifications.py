@@ -0,0 +1,47 @@
+"""
+Customer emails. Each is a background task queued from signals.py or a view,
+so a slow or failing mail server never holds up signup or checkout; the
+queue retries delivery with backoff.
+"""
+from django.core.mail import send_mail
+
+from .models import Order, User
+from .tasks import task
+
+
+@task(max_attempts=5, retry_delay=60)
+def send_welcome_email(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if not user or not user.email:
+        return
+    send_mail(
+        "Welcome to Pet Store",
+        f"Hi {user.username},\n\nYour account is ready. Happy shopping!\n",
+        None, [user.email],
+    )
+
+
+@task(max_attempts=5, retry_delay=60)
+def send_order_confirmation(order_id):
+    order = (
+        Order.objects.select_related("user", "shipping_addr", "payment")
+        .prefetch_related("items__variant__product")
+        .filter(pk=order_id).first()
+    )
+    if not order or not order.user or not order.user.email:
+        return
+    lines = [
+        f"  {item.quantity} x {item.variant.product.name} ({item.variant.label}) @ {item.unit_price}"
+        for item in order.items.all()
+    ]
+    address = order.shipping_addr
+    send_mail(
+        f"Your Pet Store order #{order.pk}",
+        "\n".join([
+            f"Hi {order.user.username},", "",
+            f"Thanks for your order #{order.pk}:", *lines, "",
+            f"Total: {order.total_amount}",
+            f"Shipping to: {address.line1}, {address.city}, {address.state}",
+        ]) + "\n",
+        None, [order.user.email],
+    )
@@ -0,0 +1,210 @@
+"""
+Cold storage for finished orders and the per-user order timeline. Delivered
+and cancelled orders older than ORDER_ARCHIVE_AFTER_DAYS move, with their
+items and payment, into ArchivedOrder/ArchivedOrderItem under their original
+ids, which keeps the hot Order table to what is still in flight plus recent
+history. The timeline and the summary read both tables.
+"""
+import base64
+import binascii
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order
+from .tasks import task
+
+ARCHIVE_STATUSES = (Order.Status.DELIVERED, Order.Status.CANCELLED)
+ARCHIVE_BATCH = 500
+
+TIMELINE_PAGE_SIZE = 20
+TIMELINE_MAX_PAGE_SIZE = 100
+
+
+# ---------- Archival ---------- #
+def archivable(before):
+    return Order.objects.filter(status__in=ARCHIVE_STATUSES, placed_at__lt=before)
+
+
+def _snapshot(order):
+    address = order.shipping_addr
+    payment = getattr(order, "payment", None)
+    archived = ArchivedOrder(
+        id=order.pk,
+        user_id=order.user_id,
+        status=order.status,
+        placed_at=order.placed_at,
+        total_amount=order.total_amount,
+        shipping_address=", ".join(
+            part for part in (address.line1, address.line2, address.city, address.state, address.country) if part
+        ),
+        payment_method=payment.method if payment else "",
+        payment_status=payment.status if payment else "",
+    )
+    items = [
+        ArchivedOrderItem(
+            order_id=order.pk,
+            variant_id=item.variant_id,
+            product_id=item.variant.product_id,
+            product_name=item.variant.product.name,
+            variant_label=item.variant.label,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+        )
+        for item in order.items.all()
+    ]
+    return archived, items
+
+
+# Per thread: set while archive_orders deletes the orders it has just copied
+_moving = threading.local()
+
+
+def archiving():
+    """True while archive_orders deletes archived rows; the sales receivers leave those deletes alone."""
+    return getattr(_moving, "active", False)
+
+
+def archive_orders(before, batch_size=ARCHIVE_BATCH, limit=None):
+    """
+    Move finished orders placed before `before` into the archive, one
+    transaction per batch; returns how many moved.
+
+    The delete cascades to items and payments like any other, but the
+    metrics and rollup receivers check archiving() and skip it: an archived
+    sale still counts towards the dashboard and the sales rollups.
+    """
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        with transaction.atomic():
+            ids = list(archivable(before).order_by("pk").values_list("pk", flat=True)[:size])
+            if not ids:
+                break
+            orders = (
+                Order.objects.filter(pk__in=ids)
+                .select_related("shipping_addr", "payment")
+                .prefetch_related("items__variant__product")
+            )
+            archived, items = [], []
+            for order in orders:
+                row, lines = _snapshot(order)
+                archived.append(row)
+                items.extend(lines)
+            ArchivedOrder.objects.bulk_create(archived)
+            ArchivedOrderItem.objects.bulk_create(items, batch_size=1000)
+            _moving.active = True
+            try:
+                Order.objects.filter(pk__in=ids).delete()
+            finally:
+                _moving.active = False
+        moved += len(ids)
+    return moved
+
+
+@task(max_attempts=1)
+def archive_old_orders():
+    """Periodic job: archive what ORDER_ARCHIVE_AFTER_DAYS allows."""
+    days = getattr(settings, "ORDER_ARCHIVE_AFTER_DAYS", None)
+    if days is None:
+        return 0
+    return archive_orders(timezone.now() - timedelta(days=days))
+
+
+# ---------- Timeline ---------- #
+class OrderTimelinePagination:
+    """
+    Keyset pagination over one user's orders, newest first, across the hot
+    and archived tables. Each page reads at most page_size + 1 rows from
+    each table at the (placed_at, id) cursor and merges them; ids are shared
+    between the tables, so the pair is unique across both.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def encode_cursor(self, order):
+        raw = f"{order.placed_at.isoformat()}|{order.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, encoded):
+        try:
+            value, pk = base64.urlsafe_b64decode(encoded.encode()).decode().rsplit("|", 1)
+            value, pk = parse_datetime(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        return (value, pk) if value is not None else None
+
+    def page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, TIMELINE_PAGE_SIZE))
+        except ValueError:
+            return TIMELINE_PAGE_SIZE
+        return max(1, min(size, TIMELINE_MAX_PAGE_SIZE))
+
+    def paginate(self, user, request):
+        """The page of Order and ArchivedOrder rows; raises ValueError on a malformed cursor."""
+        self.request = request
+        self.size = self.page_size(request)
+        after = Q()
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            cursor = self.decode_cursor(encoded)
+            if cursor is None:
+                raise ValueError("Invalid cursor.")
+            placed_at, pk = cursor
+            after = Q(placed_at__lt=placed_at) | Q(placed_at=placed_at, pk__lt=pk)
+
+        rows = []
+        for model in (Order, ArchivedOrder):
+            rows += model.objects.filter(after, user=user).order_by("-placed_at", "-pk")[:self.size + 1]
+        rows.sort(key=lambda order: (order.placed_at, order.pk), reverse=True)
+        self.has_next = len(rows) > self.size
+        self.page = rows[:self.size]
+        # Items only for the rows that made the page
+        prefetch_related_objects([o for o in self.page if isinstance(o, Order)], "items__variant__product")
+        prefetch_related_objects([o for o in self.page if isinstance(o, ArchivedOrder)], "items")
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+def order_summary(user):
+    """Order counts by status, spend and first/last order time over live and archived orders."""
+    by_status = {status.name.lower(): 0 for status in Order.Status}
+    orders, archived, spent, placed = 0, 0, Decimal("0"), []
+    for model in (Order, ArchivedOrder):
+        rows = model.objects.filter(user=user).values("status").order_by().annotate(
+            count=Count("pk"),
+            spent=Sum("total_amount", filter=~Q(status=Order.Status.CANCELLED)),
+            first=Min("placed_at"),
+            last=Max("placed_at"),
+        )
+        for row in rows:
+            by_status[Order.Status(row["status"]).name.lower()] += row["count"]
+            orders += row["count"]
+            archived += row["count"] if model is ArchivedOrder else 0
+            spent += row["spent"] or Decimal("0")
+            placed += [row["first"], row["last"]]
+    return {
+        "orders": orders,
+        "archived": archived,
+        "spent": str(spent.quantize(Decimal("0.01"))),
+        "first_order_at": min(placed, default=None),
+        "last_order_at": max(placed, default=None),
+        "by_status": by_status,
+    }
@@ -0,0 +1,84 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+from .search import SEARCH_RANK
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over an indexed column. Views pick the column with
+    `cursor_ordering` (e.g. '-created_at'); anything else pages by primary key.
+    Pages of ?search= results carry `search_truncated`, true when the engine
+    had more hits than it ranks.
+    """
+    ordering = '-pk'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.search_truncated = getattr(view, 'search_truncated', None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.search_truncated is not None:
+            response.data['search_truncated'] = self.search_truncated
+        return response
+
+    def get_ordering(self, request, queryset, view):
+        # Search results page in relevance order rather than by the view's column
+        if SEARCH_RANK in queryset.query.annotations:
+            return (SEARCH_RANK,)
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class StreamingListMixin:
+    """
+    Opt-in `?stream=1` mode for list endpoints. The whole collection is sent
+    as one JSON array, but rows are fetched, serialized and written in chunks
+    of `stream_chunk_size` so the full result never sits in memory.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+    # Full-collection reads draw on their own budget (petstoreapp/throttling.py)
+    stream_throttle_scope = 'stream'
+
+    def wants_stream(self, request):
+        return request.query_params.get(self.stream_query_param) in ('1', 'true')
+
+    def get_throttle_scope(self, request):
+        if self.action == 'list' and self.wants_stream(request):
+            return self.stream_throttle_scope
+        return getattr(self, 'throttle_scope', None)
+
+    def list(self, request, *args, **kwargs):
+        if self.wants_stream(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            response = StreamingHttpResponse(
+                self.stream_json(queryset), content_type='application/json'
+            )
+            response['X-Streamed'] = 'true'
+            return response
+        return super().list(request, *args, **kwargs)
+
+    def stream_json(self, queryset):
+        encoder = JSONEncoder()
+        # iterator() keeps prefetch_related working when given a chunk_size
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        yield '['
+        first = True
+        while True:
+            chunk = list(islice(rows, self.stream_chunk_size))
+            if not chunk:
+                break
+            data = self.get_serializer(chunk, many=True).data
+            parts = [encoder.encode(item) for item in data]
+            yield ('' if first else ',') + ','.join(parts)
+            first = False
+        yield ']'
@@ -0,0 +1,225 @@
+"""
+Per-request profiling. ProfilingMiddleware times every request and every SQL
+query it runs, and keeps a record per request in an in-process ring buffer
+and in the rotating 'petstoreapp.perf' log. endpoint_report() turns records
+into p50/p95/p99 per route and flags N+1 query patterns.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .stats import percentile
+
+logger = logging.getLogger("petstoreapp.perf")
+
+RING_SIZE = getattr(settings, "PERF_RING_SIZE", 5000)
+# A statement template repeated this often in one request is an N+1 suspect
+N_PLUS_ONE_THRESHOLD = getattr(settings, "PERF_N_PLUS_ONE_THRESHOLD", 5)
+
+_records = deque(maxlen=RING_SIZE)
+_records_lock = threading.Lock()
+
+_NUMBERS = re.compile(r"\b\d+\b")
+_ROUTE_GROUPS = re.compile(r"\(\?P<(\w+)>[^)]*\)")
+_IN_LISTS = re.compile(r"IN \([^)]*\)")
+
+
+def sql_template(sql):
+    """Collapse literals and IN lists so repeats of one statement group together."""
+    return _IN_LISTS.sub("IN (...)", _NUMBERS.sub("?", sql))
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook that records each statement and its duration."""
+
+    def __init__(self):
+        self.queries = []  # (sql, params, milliseconds)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, (time.perf_counter() - start) * 1000))
+
+    @property
+    def db_ms(self):
+        return sum(ms for _, _, ms in self.queries)
+
+    def duplicates(self):
+        """Statements run more than once with identical parameters."""
+        counts = Counter((sql, repr(params)) for sql, params, _ in self.queries)
+        return sum(count - 1 for count in counts.values() if count > 1)
+
+    def repeated_templates(self, threshold=N_PLUS_ONE_THRESHOLD):
+        counts = Counter(sql_template(sql) for sql, _, _ in self.queries)
+        return [(template, count) for template, count in counts.most_common(3) if count >= threshold]
+
+
+def route_of(request):
+    match = getattr(request, "resolver_match", None)
+    if not match:
+        return f"{request.method} {request.path}"
+    # Router routes are regexes: "api/product/(?P<pk>[^/.]+)/$" -> "api/product/<pk>/"
+    route = _ROUTE_GROUPS.sub(r"<\1>", match.route).replace("^", "").replace("$", "")
+    return f"{request.method} /{route}"
+
+
+# ---------- Middleware ---------- #
+class ProfilingMiddleware:
+    """
+    Records query count, duplicate queries, DB time, serialization time and
+    total latency per request, and adds a Server-Timing header. Serialization
+    is the Python time inside the view outside SQL (for DRF views almost all
+    of it is serializer to_representation) plus JSON rendering.
+
+    Works under WSGI and ASGI. For async requests the query hook is installed
+    in the request's sync thread, where the ORM runs its queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_PROFILING", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, start = self.begin(request)
+        with ExitStack() as stack:
+            self.wrap_connections(stack, recorder)
+            response = self.get_response(request)
+        return self.finish(request, recorder, start, response)
+
+    async def __acall__(self, request):
+        recorder, start = self.begin(request)
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, recorder, start, response)
+
+    def begin(self, request):
+        recorder = QueryRecorder()
+        request._perf = {"recorder": recorder, "view_start": None, "view_end": None, "view_queries": 0}
+        return recorder, time.perf_counter()
+
+    def wrap_connections(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def finish(self, request, recorder, start, response):
+        end = time.perf_counter()
+        marks = request._perf
+        view_ms = render_ms = 0.0
+        view_db_ms = 0.0
+        if marks["view_start"] is not None:
+            view_end = marks["view_end"] or end
+            view_ms = (view_end - marks["view_start"]) * 1000
+            render_ms = (end - view_end) * 1000 if marks["view_end"] else 0.0
+            view_db_ms = sum(ms for _, _, ms in recorder.queries[marks["view_queries"]:])
+
+        record = {
+            "at": time.time(),
+            "route": route_of(request),
+            "status": response.status_code,
+            "total_ms": round((end - start) * 1000, 2),
+            "db_ms": round(recorder.db_ms, 2),
+            "serialize_ms": round(max(view_ms - view_db_ms, 0.0) + render_ms, 2),
+            "queries": len(recorder.queries),
+            "duplicates": recorder.duplicates(),
+            "repeated": recorder.repeated_templates(),
+        }
+        store(record)
+        response["Server-Timing"] = (
+            f"db;dur={record['db_ms']}, serialize;dur={record['serialize_ms']}, total;dur={record['total_ms']}"
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf["view_start"] = time.perf_counter()
+        request._perf["view_queries"] = len(request._perf["recorder"].queries)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        request._perf["view_end"] = time.perf_counter()
+        return response
+
+
+# ---------- Storage ---------- #
+def store(record):
+    with _records_lock:
+        _records.append(record)
+    logger.info(json.dumps(record))
+
+
+def recent_records():
+    with _records_lock:
+        return list(_records)
+
+
+def clear_records():
+    with _records_lock:
+        _records.clear()
+
+
+def read_log(paths):
+    """Records from perf log files (one JSON object per line); other lines are skipped."""
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+# ---------- Report ---------- #
+def endpoint_report(records):
+    """Latency percentiles and query stats per route, slowest p95 first."""
+    by_route = {}
+    for record in records:
+        by_route.setdefault(record["route"], []).append(record)
+
+    report = []
+    for route, rows in by_route.items():
+        totals = [r["total_ms"] for r in rows]
+        suspects = Counter()
+        for r in rows:
+            for template, count in r.get("repeated", ()):
+                suspects[template] = max(suspects[template], count)
+        report.append({
+            "route": route,
+            "requests": len(rows),
+            "p50_ms": round(percentile(totals, 50), 2),
+            "p95_ms": round(percentile(totals, 95), 2),
+            "p99_ms": round(percentile(totals, 99), 2),
+            "avg_db_ms": round(sum(r["db_ms"] for r in rows) / len(rows), 2),
+            "avg_serialize_ms": round(sum(r["serialize_ms"] for r in rows) / len(rows), 2),
+            "avg_queries": round(sum(r["queries"] for r in rows) / len(rows), 1),
+            "max_queries": max(r["queries"] for r in rows),
+            "duplicate_queries": sum(r["duplicates"] for r in rows),
+            "n_plus_one": [
+                {"sql": template[:200], "max_repeats": count} for template, count in suspects.most_common(3)
+            ],
+        })
+    report.sort(key=lambda row: row["p95_ms"], reverse=True)
+    return report
@@ -0,0 +1,96 @@
+from django.db.models import Prefetch
+
+from .models import OrderItem
+
+
+def readable_field_names(serializer):
+    """Names of the fields a serializer will actually put in its output."""
+    return [name for name, field in serializer.fields.items() if not field.write_only]
+
+
+class QueryPlanner:
+    """
+    Picks select_related/prefetch_related for a queryset from the serializer
+    fields being returned, so a list costs the same number of queries no
+    matter how many rows come back.
+
+    `select_related` and `prefetch_related` map a serializer field name to the
+    lookups (strings or Prefetch objects) that field needs.
+    """
+
+    def __init__(self, select_related=None, prefetch_related=None):
+        self.select_related = select_related or {}
+        self.prefetch_related = prefetch_related or {}
+
+    def plan(self, queryset, field_names):
+        selects = []
+        prefetches = {}
+        for name in field_names:
+            for lookup in self.select_related.get(name, ()):
+                if lookup not in selects:
+                    selects.append(lookup)
+            for lookup in self.prefetch_related.get(name, ()):
+                key = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+                prefetches.setdefault(key, lookup)
+
+        if selects:
+            queryset = queryset.select_related(*selects)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches.values())
+        return queryset
+
+
+class QueryPlannedMixin:
+    """ViewSet mixin that runs `query_planner` over the default queryset."""
+    query_planner = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.query_planner is None:
+            return queryset
+        return self.query_planner.plan(queryset, self.get_planned_fields())
+
+    def get_planned_fields(self):
+        return readable_field_names(self.get_serializer())
+
+
+# ---------- Plans ---------- #
+product_query_planner = QueryPlanner(
+    select_related={
+        'brand': ['brand'],
+        'rating_avg': ['rating'],
+        'rating_count': ['rating'],
+    },
+    prefetch_related={
+        'categories': ['categories'],
+        'images': ['images'],
+        'attributes': ['attributes'],
+        'variants': ['variants'],
+        # main_image_url/_srcset fall back to the first image when main_image is empty
+        'main_image_url': ['images'],
+        'main_image_srcset': ['images'],
+    },
+)
+
+order_query_planner = QueryPlanner(
+    select_related={
+        'user': ['user'],
+        'shipping_addr': ['shipping_addr'],
+    },
+    prefetch_related={
+        'items': [Prefetch('items', queryset=OrderItem.objects.select_related('variant'))],
+    },
+)
+
+# /api/review/ nests the whole product and user in every row
+review_query_planner = QueryPlanner(
+    select_related={
+        'user': ['user'],
+        'product': ['product__brand', 'product__rating'],
+    },
+    prefetch_related={
+        'product': [
+            'product__categories', 'product__images', 'product__attributes', 'product__variants',
+        ],
+    },
+)
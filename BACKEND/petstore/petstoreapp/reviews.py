@@ -0,0 +1,166 @@
+"""
+Review aggregates and the per-product review feed. ProductRating holds each
+product's count, sum, average and star histogram; review signals adjust it
+in place with F() updates inside the caller's transaction. The feed pages
+with a keyset cursor over (sort column, id), which the Review indexes serve
+directly, so deep pages cost the same as the first.
+"""
+import base64
+import binascii
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import cache
+from .models import ProductRating, Review
+
+STARS = range(1, 6)
+
+# ?sort= value: (column, descending)
+FEED_SORTS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'highest': ('rating', True),
+    'lowest': ('rating', False),
+    'helpful': ('helpful_count', True),
+}
+DEFAULT_SORT = 'newest'
+FEED_PAGE_SIZE = 10
+FEED_MAX_PAGE_SIZE = 50
+
+
+def average(total, count):
+    if not count:
+        return Decimal('0')
+    return (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+# ---------- Aggregates ---------- #
+def rebuild_product_ratings(product_ids=None):
+    """Recompute ProductRating from the review table, for some products or all of them."""
+    reviews = Review.objects.all()
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+    rows = reviews.values('product_id').order_by().annotate(
+        rating_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS},
+    )
+    with transaction.atomic():
+        if product_ids is None:
+            ProductRating.objects.all().delete()
+        else:
+            ProductRating.objects.filter(product_id__in=product_ids).delete()
+        ratings = [
+            ProductRating(rating_avg=average(row['rating_sum'], row['rating_count']), **row)
+            for row in rows.iterator()
+        ]
+        ProductRating.objects.bulk_create(ratings, batch_size=500)
+        # Bumped on commit, so no reader caches the old aggregates under the new version
+        cache.invalidate('product')
+    return len(ratings)
+
+
+def adjust_rating(product_id, removed=None, added=None):
+    """Move one review's rating out of (`removed`) and/or into (`added`) a product's aggregates."""
+    if removed == added:
+        return
+    changes = {'rating_count': F('rating_count'), 'rating_sum': F('rating_sum')}
+    for rating, sign in ((removed, -1), (added, 1)):
+        if rating is None:
+            continue
+        changes['rating_count'] += sign
+        changes['rating_sum'] += sign * rating
+        if rating in STARS:
+            column = f'stars_{rating}'
+            changes[column] = changes.get(column, F(column)) + sign
+
+    with transaction.atomic():
+        if not ProductRating.objects.filter(pk=product_id).update(**changes):
+            # First review, or aggregates never built: the review table is the truth
+            rebuild_product_ratings([product_id])
+            return
+        total, count = ProductRating.objects.filter(pk=product_id).values_list('rating_sum', 'rating_count').get()
+        ProductRating.objects.filter(pk=product_id).update(rating_avg=average(total, count))
+        cache.invalidate('product')
+
+
+def rating_summary(product_id):
+    rating = ProductRating.objects.filter(pk=product_id).first() or ProductRating(product_id=product_id)
+    return {
+        'average': str(rating.rating_avg),
+        'count': rating.rating_count,
+        'histogram': rating.histogram(),
+    }
+
+
+# ---------- Feed ---------- #
+class ReviewFeedPagination:
+    """
+    Keyset pagination for one product's reviews. The cursor holds the last
+    row's sort value and id; the next page is the rows strictly after that
+    pair in (column, id) order.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, sort):
+        self.column, self.descending = FEED_SORTS[sort]
+
+    def ordering(self):
+        prefix = '-' if self.descending else ''
+        return (f'{prefix}{self.column}', f'{prefix}id')
+
+    def encode_cursor(self, review):
+        value = getattr(review, self.column)
+        raw = f"{value.isoformat() if self.column == 'created_at' else value}|{review.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, encoded):
+        try:
+            value, pk = base64.urlsafe_b64decode(encoded.encode()).decode().rsplit('|', 1)
+            value = parse_datetime(value) if self.column == 'created_at' else int(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        return (value, pk) if value is not None else None
+
+    def page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, FEED_PAGE_SIZE))
+        except ValueError:
+            return FEED_PAGE_SIZE
+        return max(1, min(size, FEED_MAX_PAGE_SIZE))
+
+    def paginate_queryset(self, queryset, request):
+        """Rows for this page; raises ValueError on a malformed cursor."""
+        self.request = request
+        self.size = self.page_size(request)
+        queryset = queryset.order_by(*self.ordering())
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            cursor = self.decode_cursor(encoded)
+            if cursor is None:
+                raise ValueError("Invalid cursor.")
+            value, pk = cursor
+            after = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.column}__{after}': value}) | Q(**{self.column: value, f'pk__{after}': pk})
+            )
+        rows = list(queryset[:self.size + 1])
+        self.has_next = len(rows) > self.size
+        self.page = rows[:self.size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data, **extra):
+        return Response({'next': self.get_next_link(), **extra, 'results': data})
@@ -0,0 +1,225 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import Product
+from .tasks import task
+
+# Annotation holding a row's position in the ranked result list
+SEARCH_RANK = 'search_rank'
+# Hits ranked per query; list responses say when there were more (search_truncated)
+SEARCH_RESULT_LIMIT = getattr(settings, 'PRODUCT_SEARCH_RESULT_LIMIT', 200)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def product_documents(queryset):
+    """Flatten products into the text fields the search index stores."""
+    queryset = queryset.select_related('brand').prefetch_related('attributes', 'categories')
+    for product in queryset.iterator(chunk_size=1000):
+        yield {
+            'id': product.pk,
+            'name': product.name,
+            'sku': product.sku,
+            'brand': product.brand.name,
+            # full_path so a product under Dogs -> Food also matches "dogs"
+            'categories': ' '.join(c.full_path or c.name for c in product.categories.all()),
+            'attributes': ' '.join(f'{a.name} {a.value}' for a in product.attributes.all()),
+            'description': product.description,
+        }
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance, giving up once it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+class SearchEngine:
+    """
+    Interface for product search backends. `search` returns product ids,
+    best match first; the index_* hooks are called from signals.py.
+    """
+
+    def index_products(self, queryset):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        raise NotImplementedError
+
+
+class SQLiteFTSEngine(SearchEngine):
+    """
+    Inverted index in an FTS5 virtual table (created by migration 0011),
+    ranked with bm25. Query terms match as prefixes; a term that matches
+    nothing is swapped for close spellings from the index vocabulary.
+    """
+    table = 'petstoreapp_product_fts'
+    vocab_table = 'petstoreapp_product_fts_vocab'
+    columns = ('name', 'sku', 'brand', 'categories', 'attributes', 'description')
+    weights = (10.0, 8.0, 4.0, 3.0, 2.0, 1.0)
+    max_typo_candidates = 5
+
+    def index_products(self, queryset):
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 1))
+        insert = f"INSERT INTO {self.table} (rowid, {', '.join(self.columns)}) VALUES ({placeholders})"
+        batch = []
+        for doc in product_documents(queryset):
+            batch.append(doc)
+            if len(batch) == 1000:
+                self._write(insert, batch)
+                batch = []
+        if batch:
+            self._write(insert, batch)
+
+    def _write(self, insert, docs):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(d['id'],) for d in docs])
+            cursor.executemany(insert, [(d['id'], *(d[c] for c in self.columns)) for d in docs])
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        self.index_products(Product.objects.all())
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        match = self.build_match(tokenize(query))
+        if not match:
+            return []
+        weights = ', '.join(map(str, self.weights))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def build_match(self, tokens):
+        clauses = []
+        with connection.cursor() as cursor:
+            for token in tokens:
+                if self._has_prefix(cursor, token):
+                    clauses.append(f'{self._quote(token)}*')
+                    continue
+                alternatives = self._typo_candidates(cursor, token)
+                if alternatives:
+                    clauses.append('(' + ' OR '.join(map(self._quote, alternatives)) + ')')
+        # Tokens that match nothing at all are dropped rather than failing the query
+        return ' AND '.join(clauses)
+
+    def _quote(self, token):
+        return '"' + token.replace('"', '""') + '"'
+
+    def _has_prefix(self, cursor, token):
+        cursor.execute(
+            f"SELECT 1 FROM {self.vocab_table} WHERE term >= %s AND term < %s LIMIT 1",
+            [token, token + '\uffff'],
+        )
+        return cursor.fetchone() is not None
+
+    def _typo_candidates(self, cursor, token):
+        if len(token) < 4:
+            return []
+        limit = 1 if len(token) <= 5 else 2
+        # Assume the first letter is right; that keeps the vocabulary scan small
+        cursor.execute(
+            f"SELECT term, doc FROM {self.vocab_table} "
+            f"WHERE term >= %s AND term < %s AND length(term) BETWEEN %s AND %s",
+            [token[0], token[0] + '\uffff', len(token) - limit, len(token) + limit],
+        )
+        scored = []
+        for term, docs in cursor.fetchall():
+            distance = edit_distance(token, term, limit)
+            if distance <= limit:
+                scored.append((distance, -docs, term))
+        return [term for _, _, term in sorted(scored)[:self.max_typo_candidates]]
+
+
+class DatabaseSearchEngine(SearchEngine):
+    """
+    Portable fallback for backends without an FTS engine wired up: substring
+    matching, ranked by which field matched.
+    """
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        matches = Q()
+        for token in tokens:
+            matches &= (
+                Q(name__icontains=token) | Q(sku__icontains=token) | Q(brand__name__icontains=token)
+                | Q(description__icontains=token) | Q(attributes__value__icontains=token)
+                | Q(categories__name__icontains=token)
+            )
+        first = tokens[0]
+        rank = Case(
+            When(name__istartswith=first, then=Value(0)),
+            When(name__icontains=first, then=Value(1)),
+            When(sku__icontains=first, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        )
+        ids = (
+            Product.objects.filter(matches).annotate(match_rank=rank)
+            .order_by('match_rank', '-created_at').values_list('pk', flat=True).distinct()
+        )
+        return list(ids[:limit])
+
+
+@lru_cache(maxsize=None)
+def get_search_engine():
+    engine_path = getattr(settings, 'PRODUCT_SEARCH_ENGINE', None)
+    if engine_path:
+        return import_string(engine_path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSEngine()
+    return DatabaseSearchEngine()
+
+
+@task(max_attempts=3, retry_delay=10)
+def reindex_products(product_ids):
+    """Background job queued by signals.py whenever indexed product text changes."""
+    with transaction.atomic():
+        get_search_engine().index_products(Product.objects.filter(pk__in=product_ids))
+
+
+def ranked_queryset(queryset, ids):
+    """Narrow `queryset` to the ranked search hits `ids`, annotated with SEARCH_RANK."""
+    if not ids:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).annotate(**{SEARCH_RANK: rank})
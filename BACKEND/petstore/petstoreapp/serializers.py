@@ -3,8 +3,10 @@ from django.contrib.auth import get_user_model
 from .models import (
     PhoneNumber, Address, Category, Brand, Product, ProductCategory,
     ProductImage, ProductAttribute, Variant, Cart, CartItem,
-    Order, OrderItem, Payment, Review, BannerImage
+    Order, OrderItem, Payment, Review, BannerImage, ArchivedOrder, ArchivedOrderItem
 )
+from .carts import ADD, MAX_OPERATIONS, OPERATIONS
+from .images import srcset
 
 User = get_user_model()
 
@@ -41,7 +43,12 @@ class AddressSerializer(serializers.ModelSerializer):
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'parent', 'description']
+        fields = ['id', 'name', 'parent', 'description', 'full_path', 'depth']
+
+    def validate_parent(self, parent):
+        if parent and self.instance and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A category cannot be moved under itself or its subcategories.")
+        return parent
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -57,12 +64,21 @@ class ProductCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'category']
 
 
+def image_srcset(serializer, fieldfile, digest, width):
+    """Responsive WebP/JPEG srcset strings, or None while derivatives are pending."""
+    if not fieldfile:
+        return None
+    request = serializer.context.get('request')
+    return srcset(digest, fieldfile.storage, request.build_absolute_uri if request else None, width)
+
+
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ['id', 'product', 'image_url', 'alt_text', 'sort_order']
+        fields = ['id', 'product', 'image_url', 'srcset', 'alt_text', 'sort_order']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -70,6 +86,9 @@ class ProductImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image_url.url)
         return None
 
+    def get_srcset(self, obj):
+        return image_srcset(self, obj.image_url, obj.image_url_hash, obj.image_url_width)
+
 
 class ProductAttributeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -92,24 +111,36 @@ class ProductSerializer(serializers.ModelSerializer):
     attributes = ProductAttributeSerializer(many=True, read_only=True)
     variants = VariantSerializer(many=True, read_only=True)
     main_image_url = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
     stock = serializers.IntegerField()
+    # Null until the product's first review (see reviews.py)
+    rating_avg = serializers.DecimalField(max_digits=3, decimal_places=2, source='rating.rating_avg', read_only=True)
+    rating_count = serializers.IntegerField(source='rating.rating_count', read_only=True)
 
     class Meta:
         model = Product
         fields = [
-            'id', 'sku', 'name', 'main_image', 'main_image_url', 'description',
+            'id', 'sku', 'name', 'main_image', 'main_image_url', 'main_image_srcset', 'description',
             'brand', 'brand_id', 'categories', 'price', 'stock', 'created_at', 'updated_at', 'is_active',
-            'images', 'attributes', 'variants'
+            'rating_avg', 'rating_count', 'images', 'attributes', 'variants'
         ]
 
     def get_main_image_url(self, obj):
         request = self.context.get('request')
         if obj.main_image and hasattr(obj.main_image, 'url'):
             return request.build_absolute_uri(obj.main_image.url)
-        elif obj.images.exists():
-            first_image = obj.images.first()
-            if first_image.image_url and hasattr(first_image.image_url, 'url'):
-                return request.build_absolute_uri(first_image.image_url.url)
+        # Iterate .all() rather than .exists()/.first() so prefetched images are reused
+        first_image = next(iter(obj.images.all()), None)
+        if first_image and first_image.image_url and hasattr(first_image.image_url, 'url'):
+            return request.build_absolute_uri(first_image.image_url.url)
+        return None
+
+    def get_main_image_srcset(self, obj):
+        if obj.main_image:
+            return image_srcset(self, obj.main_image, obj.main_image_hash, obj.main_image_width)
+        first_image = next(iter(obj.images.all()), None)
+        if first_image:
+            return image_srcset(self, first_image.image_url, first_image.image_url_hash, first_image.image_url_width)
         return None
 
 
@@ -127,7 +158,8 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'created_at', 'updated_at', 'is_active', 'items']
+        fields = ['id', 'user', 'created_at', 'updated_at', 'is_active', 'item_count', 'subtotal', 'items']
+        read_only_fields = ['item_count', 'subtotal']
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -148,6 +180,71 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'status', 'placed_at', 'shipping_addr', 'total_amount', 'items']
 
 
+# /api/me/orders/ rows: live and archived orders share one shape
+class TimelineItemSerializer(serializers.ModelSerializer):
+    product = serializers.IntegerField(source='variant.product_id')
+    name = serializers.CharField(source='variant.product.name')
+    label = serializers.CharField(source='variant.label')
+
+    class Meta:
+        model = OrderItem
+        fields = ['variant', 'product', 'name', 'label', 'quantity', 'unit_price']
+
+
+class TimelineOrderSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display')
+    items = TimelineItemSerializer(many=True)
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'status_display', 'placed_at', 'total_amount', 'archived', 'items']
+
+    def get_archived(self, obj):
+        return isinstance(obj, ArchivedOrder)
+
+
+class ArchivedItemSerializer(serializers.ModelSerializer):
+    variant = serializers.IntegerField(source='variant_id')
+    product = serializers.IntegerField(source='product_id')
+    name = serializers.CharField(source='product_name')
+    label = serializers.CharField(source='variant_label')
+
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['variant', 'product', 'name', 'label', 'quantity', 'unit_price']
+
+
+class ArchivedTimelineOrderSerializer(TimelineOrderSerializer):
+    items = ArchivedItemSerializer(many=True)
+
+    class Meta:
+        model = ArchivedOrder
+        fields = TimelineOrderSerializer.Meta.fields
+
+
+def timeline_data(orders):
+    return [
+        (ArchivedTimelineOrderSerializer if isinstance(order, ArchivedOrder) else TimelineOrderSerializer)(order).data
+        for order in orders
+    ]
+
+
+class CheckoutSerializer(serializers.Serializer):
+    shipping_addr = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all())
+    payment_method = serializers.ChoiceField(choices=Payment.Method.choices)
+
+
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=OPERATIONS, default=ADD)
+    variant = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+
+class CartOperationsSerializer(serializers.Serializer):
+    items = CartOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
+
+
 # ---------- PAYMENT ---------- #
 class PaymentSerializer(serializers.ModelSerializer):
     method_display = serializers.CharField(source='get_method_display', read_only=True)
@@ -162,20 +259,36 @@ class PaymentSerializer(serializers.ModelSerializer):
 class ReviewSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     product = ProductSerializer(read_only=True)
+    product_id = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.all(), source='product', write_only=True
+    )
+
+    class Meta:
+        model = Review
+        fields = ['id', 'product', 'product_id', 'user', 'rating', 'title', 'comment', 'helpful_count', 'created_at']
+        read_only_fields = ['created_at', 'user', 'product', 'helpful_count']
+
+
+class ReviewFeedSerializer(serializers.ModelSerializer):
+    """Slim review for the per-product feed: the product is implied, the user is a name."""
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
 
     class Meta:
         model = Review
-        fields = ['id', 'product', 'user', 'rating', 'title', 'comment', 'created_at']
-        read_only_fields = ['created_at', 'user', 'product']
+        fields = ['id', 'username', 'rating', 'title', 'comment', 'helpful_count', 'created_at']
 
 
 # ---------- BANNER IMAGE ---------- #
 class BannerImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = BannerImage
-        fields = ['id', 'image_url', 'alt_text']
+        fields = ['id', 'image_url', 'srcset', 'alt_text']
+
+    def get_srcset(self, obj):
+        return image_srcset(self, obj.image, obj.image_hash, obj.image_width)
 
     def get_image_url(self, obj):
         request = self.context.get('request')
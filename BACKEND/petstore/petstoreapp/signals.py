@@ -1,10 +1,322 @@
 # petstoreapp/signals.py
-from django.db.models.signals import post_save
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from . import (
+    analytics, authentication, cache, carts, facets, images, metrics, notifications, order_archive, reviews, search,
+)
+from .models import (
+    BannerImage, Brand, Cart, CartItem, Category, Order, OrderItem, Payment, Product, ProductAttribute,
+    ProductCategory, ProductImage, Review, UserProfile, Variant,
+)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def welcome_user(sender, instance, created, **kwargs):
+    # Queued, so signup does not wait on the mail server
+    if created:
+        notifications.send_welcome_email.delay(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    authentication.forget_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile_owner(sender, instance, **kwargs):
+    authentication.forget_user(instance.user_id)
+
+
+# ---------- Dashboard metrics ---------- #
+@receiver(post_save, sender=Product)
+def count_product_created(sender, instance, created, **kwargs):
+    if created:
+        metrics.adjust_summary(products=1)
+
+
+@receiver(post_delete, sender=Product)
+def count_product_deleted(sender, instance, **kwargs):
+    metrics.adjust_summary(products=-1)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_totals(sender, instance, **kwargs):
+    instance._metrics_prev = None
+    if instance.pk:
+        instance._metrics_prev = (
+            Order.objects.filter(pk=instance.pk).values_list('user_id', 'total_amount').first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def track_order_saved(sender, instance, created, **kwargs):
+    prev = getattr(instance, '_metrics_prev', None)
+    prev_user_id, prev_total = prev if prev else (None, Decimal('0'))
+    customers = 0
+    if prev_user_id != instance.user_id:
+        if instance.user_id and not metrics.has_other_orders(instance.user_id, exclude_pk=instance.pk):
+            customers += 1
+        if prev_user_id and not metrics.has_other_orders(prev_user_id):
+            customers -= 1
+    metrics.adjust_summary(
+        orders=1 if prev is None else 0,
+        customers=customers,
+        sales=Decimal(instance.total_amount) - prev_total,
+    )
+
+
+@receiver(post_save, sender=Order)
+def confirm_order(sender, instance, created, **kwargs):
+    # Queued inside checkout's transaction, so the job sees the order's items
+    if created:
+        notifications.send_order_confirmation.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Order)
+def track_order_deleted(sender, instance, **kwargs):
+    if order_archive.archiving():
+        return
+    customers = -1 if instance.user_id and not metrics.has_other_orders(instance.user_id) else 0
+    metrics.adjust_summary(orders=-1, customers=customers, sales=-instance.total_amount)
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item_line(sender, instance, **kwargs):
+    instance._metrics_prev = None
+    if instance.pk:
+        instance._metrics_prev = (
+            OrderItem.objects.filter(pk=instance.pk)
+            .values_list('variant__product', 'quantity', 'unit_price').first()
+        )
+
+
+@receiver(post_save, sender=OrderItem)
+def track_order_item_saved(sender, instance, created, **kwargs):
+    prev = getattr(instance, '_metrics_prev', None)
+    if prev:
+        prev_product_id, quantity, unit_price = prev
+        metrics.adjust_product_sales(prev_product_id, sold=-1, revenue=-(unit_price * quantity))
+    product_id = metrics.product_id_for_variant(instance.variant_id)
+    revenue = Decimal(instance.unit_price) * instance.quantity
+    metrics.adjust_product_sales(product_id, sold=1, revenue=revenue)
+
+
+@receiver(post_delete, sender=OrderItem)
+def track_order_item_deleted(sender, instance, **kwargs):
+    if order_archive.archiving():
+        return
+    product_id = metrics.product_id_for_variant(instance.variant_id)
+    metrics.adjust_product_sales(product_id, sold=-1, revenue=-(instance.unit_price * instance.quantity))
+
+
+# ---------- Catalog response cache ---------- #
+def invalidate_catalog_cache(sender, **kwargs):
+    cache.invalidate_for_model(sender)
+
+
+for model in (Product, Variant, ProductImage, ProductAttribute, ProductCategory,
+              Brand, Category, BannerImage):
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog-cache-save-{model.__name__}')
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog-cache-delete-{model.__name__}')
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def invalidate_product_categories(sender, **kwargs):
+    cache.invalidate('product')
+
+
+# ---------- Product search index ---------- #
+def reindex_products(queryset):
+    # Indexing runs as a background job; a subtree rename can touch thousands of products
+    product_ids = list(queryset.values_list('pk', flat=True))
+    if product_ids:
+        search.reindex_products.delay(product_ids)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    reindex_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.get_search_engine().remove_products([instance.pk])
+
+
+@receiver(post_save, sender=ProductAttribute)
+@receiver(post_delete, sender=ProductAttribute)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def reindex_product_details(sender, instance, **kwargs):
+    reindex_products(Product.objects.filter(pk=instance.product_id))
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def reindex_product_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # instance is a Category; pk_set holds products (None on clear)
+        products = Product.objects.filter(pk__in=pk_set) if pk_set else Product.objects.none()
+    else:
+        products = Product.objects.filter(pk=instance.pk)
+    reindex_products(products)
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand_products(sender, instance, created, **kwargs):
+    if not created:
+        reindex_products(Product.objects.filter(brand=instance))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    # Renames and moves change the full_path indexed for the whole subtree
+    if not created:
+        reindex_products(Product.objects.filter(pk__in=Category.subtree_product_ids(instance.path)))
+
+
+@receiver(pre_delete, sender=Category)
+def reindex_deleted_category_products(sender, instance, **kwargs):
+    # Listed before the delete, while the subtree's product links still exist;
+    # the job runs after commit and indexes them without the category
+    if instance.path:
+        reindex_products(Product.objects.filter(pk__in=Category.subtree_product_ids(instance.path)))
+
+
+# ---------- Facet index ---------- #
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Variant)
+@receiver(post_delete, sender=Variant)
+@receiver(post_save, sender=ProductAttribute)
+@receiver(post_delete, sender=ProductAttribute)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def refresh_product_facets(sender, instance, **kwargs):
+    product_id = instance.pk if sender is Product else instance.product_id
+    facets.products_changed([product_id])
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def refresh_product_category_facets(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        facets.products_changed(list(pk_set or ()) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def rebuild_facets(sender, **kwargs):
+    facets.catalog_changed()
+
+
+# ---------- Image derivatives ---------- #
+def forget_replaced_images(sender, instance, **kwargs):
+    # A new upload invalidates the stored hash and with it the derivatives
+    if instance.pk is None:
+        return
+    fields = [name for model, name in images.IMAGE_FIELDS if model is sender]
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    for name in fields:
+        if stored.get(name) != (getattr(instance, name).name or None):
+            setattr(instance, images.hash_field(name), '')
+
+
+def build_image_derivatives(sender, instance, **kwargs):
+    for model, name in images.IMAGE_FIELDS:
+        if model is sender and getattr(instance, name) and not getattr(instance, images.hash_field(name)):
+            images.schedule(sender, instance.pk, name)
+
+
+for model in {model for model, _ in images.IMAGE_FIELDS}:
+    pre_save.connect(forget_replaced_images, sender=model, dispatch_uid=f'image-forget-{model.__name__}')
+    post_save.connect(build_image_derivatives, sender=model, dispatch_uid=f'image-derivatives-{model.__name__}')
+
+
+# ---------- Product ratings ---------- #
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._rating_prev = None
+    if instance.pk:
+        instance._rating_prev = Review.objects.filter(pk=instance.pk).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def track_review_saved(sender, instance, created, **kwargs):
+    prev = getattr(instance, '_rating_prev', None)
+    if prev and prev[0] != instance.product_id:
+        reviews.adjust_rating(prev[0], removed=prev[1])
+        prev = None
+    reviews.adjust_rating(instance.product_id, removed=prev[1] if prev else None, added=instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def track_review_deleted(sender, instance, **kwargs):
+    reviews.adjust_rating(instance.product_id, removed=instance.rating)
+
+
+# ---------- Cart totals ---------- #
+@receiver(pre_save, sender=Cart)
+def remember_cart_owner(sender, instance, **kwargs):
+    instance._owner_prev = Cart.objects.filter(pk=instance.pk).only('user', 'token').first() if instance.pk else None
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def forget_cart_summary(sender, instance, **kwargs):
+    prev = getattr(instance, '_owner_prev', None)
+    carts.forget(instance, *([prev] if prev else []))
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def track_cart_item(sender, instance, **kwargs):
+    # Per-row CRUD through /api/cart-item/; carts.apply_operations writes in bulk and recalculates once
+    carts.items_changed(instance.cart_id)
+
+
+@receiver(pre_save, sender=Variant)
+def remember_variant_price(sender, instance, **kwargs):
+    instance._price_prev = None
+    if instance.pk:
+        instance._price_prev = Variant.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Variant)
+def reprice_open_carts(sender, instance, created, **kwargs):
+    prev = getattr(instance, '_price_prev', None)
+    if prev is not None and prev != instance.price:
+        carts.recalculate_for_variant.delay(instance.pk)
+
+
+# ---------- Sales rollups ---------- #
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_sales_day(sender, instance, **kwargs):
+    if order_archive.archiving():
+        return
+    analytics.mark_dirty(instance.placed_at)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def mark_sales_day_for_line(sender, instance, **kwargs):
+    if order_archive.archiving():
+        return
+    # Gone already when the order itself was deleted; its own signal marks the day
+    analytics.mark_order_dirty(instance.order_id)
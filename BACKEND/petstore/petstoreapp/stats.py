@@ -0,0 +1,10 @@
+"""Small statistics helpers shared by runtime reporting and the benchmarks."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples`; 0.0 when there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
@@ -0,0 +1,247 @@
+"""
+Database-backed background jobs. `@task` gives a function `.delay(...)`,
+which inserts a Job row in the caller's transaction: a job exists exactly
+when the data it refers to was committed. Worker processes (`manage.py
+run_worker`) claim due jobs, run them and retry failures with exponential
+backoff. A running job renews its heartbeat every HEARTBEAT_EVERY, and one
+whose heartbeat stops for STALE_AFTER (its worker died) is queued again.
+
+With TASKS_INPROCESS_WORKER on, each web process also drains the queue on a
+small thread pool after commit, so a development server needs no separate
+worker. It is off by default: on SQLite those drains compete with requests
+for the database's single write lock.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job whose worker has been silent this long is handed out again
+STALE_AFTER = timedelta(minutes=10)
+HEARTBEAT_EVERY = timedelta(minutes=1)
+# Finished jobs are kept this long for the stats, then purged
+KEEP_FINISHED = timedelta(days=7)
+
+_inprocess = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tasks")
+_draining = threading.Semaphore(2)
+# Set in run_worker processes, whose own loop picks up the jobs they queue
+_worker_process = False
+
+
+def task(max_attempts=3, retry_delay=5):
+    """Register a function as a task; call it later with `func.delay(*args, **kwargs)`."""
+    def decorate(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.delay = lambda *args, **kwargs: enqueue(func, args, kwargs)
+        return func
+    return decorate
+
+
+def enqueue(func, args=(), kwargs=None, delay=None, run_at=None):
+    """Queue a call of task `func`; arguments must be JSON serializable."""
+    if run_at is None:
+        run_at = timezone.now() + (timedelta(seconds=delay) if delay else timedelta())
+    job = Job.objects.create(
+        task=func.task_name, args=list(args), kwargs=kwargs or {}, run_at=run_at, max_attempts=func.max_attempts,
+    )
+    if getattr(settings, "TASKS_EAGER", False):
+        transaction.on_commit(lambda: run_eagerly(job))
+    elif getattr(settings, "TASKS_INPROCESS_WORKER", False) and not _worker_process:
+        transaction.on_commit(wake_inprocess_worker)
+    return job
+
+
+# ---------- Running ---------- #
+def claim(worker, limit=1):
+    """Mark up to `limit` due jobs as RUNNING for `worker` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now).order_by("run_at", "pk")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        # SQLite takes the write lock at BEGIN, so no other worker can claim these in between
+        Job.objects.filter(pk__in=ids, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING, locked_by=worker, started_at=now, heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, status=Job.Status.RUNNING, locked_by=worker))
+
+
+@contextmanager
+def heartbeat(job, every=HEARTBEAT_EVERY):
+    """Renew a running job's heartbeat from a side thread until the block exits."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(every.total_seconds()):
+                Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING).update(heartbeat_at=timezone.now())
+        except Exception:
+            logger.exception("Heartbeat for job %s failed", job.pk)
+        finally:
+            connection.close()  # the heartbeat thread's own connection
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome; returns True on success."""
+    func = None
+    try:
+        func = import_string(job.task)
+        with heartbeat(job):
+            func(*job.args, **job.kwargs)
+    except Exception as exc:
+        retry = job.attempts < job.max_attempts
+        delay = getattr(func, "retry_delay", 5) * 2 ** max(job.attempts - 1, 0)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.QUEUED if retry else Job.Status.FAILED,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            last_error="".join(traceback.format_exception(exc))[-4000:],
+            finished_at=None if retry else timezone.now(),
+        )
+        log = logger.warning if retry else logger.error
+        log("Job %s (%s) failed on attempt %s/%s: %s", job.pk, job.task, job.attempts, job.max_attempts, exc)
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.Status.DONE, finished_at=timezone.now(), last_error="")
+    return True
+
+
+def run_eagerly(job):
+    """TASKS_EAGER: run a job once, inline, as soon as its row is committed."""
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.RUNNING, locked_by="eager", started_at=timezone.now(), attempts=job.max_attempts,
+    )
+    job.attempts = job.max_attempts
+    return run_job(job)
+
+
+def requeue_stale(now=None):
+    """Hand back jobs whose worker died mid-run: no heartbeat for STALE_AFTER."""
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    silent = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    return Job.objects.filter(silent, status=Job.Status.RUNNING).update(status=Job.Status.QUEUED, locked_by="")
+
+
+def purge_finished(now=None):
+    now = now or timezone.now()
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.Status.DONE, Job.Status.FAILED], finished_at__lt=now - KEEP_FINISHED,
+    ).delete()
+    return deleted
+
+
+def enqueue_periodic(schedule, last_run, now):
+    """
+    Queue each periodic task from TASKS_PERIODIC ({dotted path: seconds})
+    that is due, unless a run of it is already waiting.
+    """
+    for name, every in schedule.items():
+        if now - last_run.get(name, 0) < every:
+            continue
+        last_run[name] = now
+        func = import_string(name)
+        if not Job.objects.filter(task=func.task_name, status__in=[Job.Status.QUEUED, Job.Status.RUNNING]).exists():
+            enqueue(func)
+
+
+def work(worker=None, burst=False, poll_interval=1.0, batch=10, stop=None, periodic=True):
+    """
+    The worker loop behind `manage.py run_worker`. Returns the number of jobs
+    run when `burst` is set and the queue is empty, or when `stop` is set.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    schedule = getattr(settings, "TASKS_PERIODIC", {}) if periodic else {}
+    last_run, processed, last_housekeeping = {}, 0, 0.0
+    while not (stop and stop.is_set()):
+        now = time.monotonic()
+        if now - last_housekeeping > 60:
+            requeue_stale()
+            purge_finished()
+            last_housekeeping = now
+        enqueue_periodic(schedule, last_run, now)
+        jobs = claim(worker, batch)
+        for job in jobs:
+            run_job(job)
+        processed += len(jobs)
+        if not jobs:
+            if burst:
+                break
+            time.sleep(poll_interval)
+    return processed
+
+
+def become_worker_process():
+    global _worker_process
+    _worker_process = True
+
+
+def _drain():
+    try:
+        # Periodic tasks are left to run_worker; a drain is too short-lived to keep a schedule
+        work(worker=f"inprocess:{os.getpid()}:{threading.get_ident()}", burst=True, periodic=False)
+    except Exception:
+        logger.exception("In-process task worker failed")
+    finally:
+        connection.close()  # the pool thread's own connection
+        _draining.release()
+
+
+def wake_inprocess_worker():
+    # At most two drains at a time; a busy drain picks up new jobs anyway
+    if _draining.acquire(blocking=False):
+        _inprocess.submit(_drain)
+
+
+# ---------- Visibility ---------- #
+def queue_stats(recent=1000):
+    """Queue depth by status, the oldest due job's age and recent wait/run latencies."""
+    now = timezone.now()
+    counts = {status.name.lower(): 0 for status in Job.Status}
+    for value, count in Job.objects.values_list("status").annotate(count=Count("pk")).order_by():
+        counts[Job.Status(value).name.lower()] = count
+    oldest = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now).aggregate(oldest=Min("run_at"))["oldest"]
+
+    finished = list(
+        Job.objects.filter(status=Job.Status.DONE).order_by("-finished_at")
+        .values_list("run_at", "started_at", "finished_at")[:recent]
+    )
+    waits = [max((started - run_at).total_seconds(), 0) * 1000 for run_at, started, _ in finished]
+    runs = [(done - started).total_seconds() * 1000 for _, started, done in finished]
+    failing = (
+        Job.objects.filter(status=Job.Status.FAILED).values("task").annotate(count=Count("pk")).order_by("-count")
+    )
+    return {
+        "counts": counts,
+        "oldest_due_seconds": (now - oldest).total_seconds() if oldest else 0,
+        "wait_ms": {"p50": percentile(waits, 50), "p95": percentile(waits, 95)},
+        "run_ms": {"p50": percentile(runs, 50), "p95": percentile(runs, 95)},
+        "failed_by_task": {row["task"]: row["count"] for row in failing},
+    }
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from petstoreapp import facets, throttling
+from petstoreapp.authentication import ClaimsRefreshToken
+from petstoreapp.models import Address, Brand, Order, OrderItem, Payment, Product, User, Variant
+
+
+class StoreTestCase(TestCase):
+    """A product with one variant, a customer and an admin; caches, throttle leases and the facet index start empty."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name="Acme")
+        cls.product = Product.objects.create(
+            sku="KIB-1", name="Kibble", description="Dry food", brand=cls.brand, price=Decimal("10.00"), stock=50,
+        )
+        cls.variant = Variant.objects.create(
+            product=cls.product, label="2kg", price=Decimal("10.00"), stock_quantity=50,
+        )
+        cls.customer = User.objects.create_user("alice", "alice@example.com", "alice-pass")
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "admin-pass")
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        throttling._leases.clear()
+        # Built lazily from the rows that exist when a test first lists products
+        facets._state["index"] = None
+        self.client = APIClient()
+
+    def bearer(self, user, lifetime=None):
+        access = ClaimsRefreshToken.for_user(user).access_token
+        if lifetime is not None:
+            access.set_exp(lifetime=lifetime)
+        return {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+
+    def make_product(self, sku, name=None, price=Decimal("10.00"), **fields):
+        fields.setdefault("description", "Pet supplies")
+        return Product.objects.create(sku=sku, name=name or sku, brand=self.brand, price=price, **fields)
+
+    def address(self, user):
+        # One default shipping address per user is all the schema allows
+        defaults = {"line1": "1 Main St", "city": "Dharan", "state": "Koshi"}
+        return Address.objects.get_or_create(user=user, defaults=defaults)[0]
+
+    def place_order(self, user, quantity=2, status=Order.Status.DELIVERED):
+        order = Order.objects.create(
+            user=user, status=status, shipping_addr=self.address(user),
+            total_amount=self.variant.price * quantity,
+        )
+        OrderItem.objects.create(order=order, variant=self.variant, quantity=quantity, unit_price=self.variant.price)
+        Payment.objects.create(order=order, method=Payment.Method.COD)
+        return order
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from petstoreapp.analytics import rebuild_rollups, refresh_dirty_days, sales_report
+from petstoreapp.models import Order, OrderItem, SalesRollup
+from petstoreapp.order_archive import archive_orders
+from petstoreapp.tests.base import StoreTestCase
+
+
+class SalesRollupTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = self.place_order(self.customer)
+        Order.objects.filter(pk=self.order.pk).update(placed_at=timezone.now() - timedelta(days=400))
+        self.order.refresh_from_db()
+
+    def rollup_rows(self):
+        return set(SalesRollup.objects.values_list("day", "dimension", "key", "orders", "units", "revenue"))
+
+    def test_rollups_count_live_and_archived_orders(self):
+        day = timezone.localdate(self.order.placed_at)
+        rebuild_rollups()
+        live = sales_report(day, day)["totals"]
+        self.assertEqual(live, [{"key": "", "name": "All sales", "orders": 1, "units": 2, "revenue": "20.00"}])
+        archive_orders(timezone.now())
+        rebuild_rollups()
+        self.assertEqual(sales_report(day, day)["totals"], live)
+
+    def test_cancelling_refreshes_the_orders_day(self):
+        rebuild_rollups()
+        # Clears the mark left on the day the order was created, before it was backdated
+        refresh_dirty_days()
+        self.order.status = Order.Status.CANCELLED
+        self.order.save()
+        self.assertEqual(refresh_dirty_days(), 1)
+        self.assertFalse(SalesRollup.objects.exists())
+
+    def test_refreshed_days_match_a_rebuild_from_scratch(self):
+        older = self.place_order(self.customer, quantity=3)
+        Order.objects.filter(pk=older.pk).update(placed_at=timezone.now() - timedelta(days=30))
+        rebuild_rollups()
+        refresh_dirty_days()
+
+        # Each edit goes through the signals that mark its day dirty
+        older.refresh_from_db()
+        older.status = Order.Status.CANCELLED
+        older.save()
+        line = OrderItem.objects.get(order=self.order)
+        line.quantity = 5
+        line.save()
+        self.place_order(self.customer, quantity=1)
+        self.assertEqual(refresh_dirty_days(), 3)
+
+        refreshed = self.rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(self.rollup_rows(), refreshed)
+
+        counted = Order.objects.filter(~Q(status=Order.Status.CANCELLED))
+        totals = SalesRollup.objects.filter(dimension=SalesRollup.Dimension.TOTAL).aggregate(
+            revenue=Sum("revenue"), units=Sum("units"),
+        )
+        self.assertEqual(totals["revenue"], counted.aggregate(total=Sum("total_amount"))["total"])
+        self.assertEqual(totals["units"], OrderItem.objects.filter(order__in=counted).aggregate(n=Sum("quantity"))["n"])
+        self.assertEqual(totals["revenue"], Decimal("30.00"))
+
+
+class SalesReportViewTests(StoreTestCase):
+    def test_sales_report_is_admin_only(self):
+        self.assertEqual(self.client.get("/api/admin/sales/", **self.bearer(self.customer)).status_code, 403)
+        self.assertEqual(self.client.get("/api/admin/sales/", **self.bearer(self.admin)).status_code, 200)
+
+    def test_malformed_dates_are_rejected(self):
+        for query in ("from=garbage", "to=garbage", "from=2024-02-30", "from=2024-03-02&to=2024-03-01"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/admin/sales/?{query}", **self.bearer(self.admin))
+                self.assertEqual(response.status_code, 400)
+
+    def test_range_defaults_to_the_last_thirty_days(self):
+        body = self.client.get("/api/admin/sales/", **self.bearer(self.admin)).json()
+        today = timezone.localdate()
+        self.assertEqual((body["from"], body["to"]), (str(today - timedelta(days=29)), str(today)))
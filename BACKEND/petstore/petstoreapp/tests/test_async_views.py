@@ -0,0 +1,37 @@
+from petstoreapp.tests.base import StoreTestCase
+from petstoreapp.tests.test_throttling import THROTTLED
+
+
+class AsyncProductListTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        for n in range(2):
+            self.make_product(f"ASY-{n}")
+
+    def test_cursor_walks_every_product_once(self):
+        body = self.client.get("/api/async/product/?page_size=2").json()
+        skus = [row["sku"] for row in body["results"]]
+        self.assertIsNotNone(body["next"])
+        body = self.client.get(body["next"]).json()
+        skus += [row["sku"] for row in body["results"]]
+        self.assertIsNone(body["next"])
+        self.assertEqual(sorted(skus), ["ASY-0", "ASY-1", "KIB-1"])
+
+    def test_card_view_matches_the_sync_list(self):
+        fast = self.client.get("/api/async/product/?view=card").json()["results"]
+        sync = self.client.get("/api/product/?view=card").json()["results"]
+        self.assertEqual(fast, sync)
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        self.assertEqual(self.client.get("/api/async/product/?cursor=garbage").status_code, 400)
+
+    def test_unknown_product_is_not_found(self):
+        self.assertEqual(self.client.get("/api/async/product/999999/").status_code, 404)
+
+
+@THROTTLED
+class AsyncThrottleTests(StoreTestCase):
+    def test_async_views_share_the_limits(self):
+        codes = [self.client.get("/api/async/brand/", REMOTE_ADDR="10.0.0.3").status_code for _ in range(2)]
+        codes += [self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.3").status_code for _ in range(2)]
+        self.assertEqual(codes, [200, 200, 200, 429])
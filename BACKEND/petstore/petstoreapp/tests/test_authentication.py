@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from petstoreapp.models import User
+from petstoreapp.tests.base import StoreTestCase
+
+
+class JWTTests(StoreTestCase):
+    def test_claims_token_reads_a_protected_view(self):
+        response = self.client.get("/api/user/profile/", **self.bearer(self.customer))
+        self.assertEqual(response.status_code, 200)
+
+    def test_expired_token_is_ignored_on_public_views(self):
+        expired = self.bearer(self.customer, lifetime=-timedelta(minutes=1))
+        self.assertEqual(self.client.get("/api/product/", **expired).status_code, 200)
+        self.assertEqual(self.client.get("/api/user/profile/", **expired).status_code, 401)
+
+    def test_inactive_users_claims_are_refused(self):
+        credentials = self.bearer(self.customer)
+        inactive = User.objects.get(pk=self.customer.pk)
+        inactive.is_active = False
+        # The user cache is cleared once the save commits
+        with self.captureOnCommitCallbacks(execute=True):
+            inactive.save()
+        self.assertEqual(self.client.get("/api/user/profile/", **self.bearer(inactive)).status_code, 401)
+        # Tokens issued before the change carry is_active=True until they expire
+        self.assertEqual(self.client.get("/api/user/profile/", **credentials).status_code, 200)
+
+    def test_login_issues_tokens(self):
+        response = self.client.post(
+            "/api/token/", {"username": "alice", "password": "alice-pass"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json())
@@ -0,0 +1,47 @@
+from petstoreapp.tests.base import StoreTestCase
+
+
+class CatalogResponseCacheTests(StoreTestCase):
+    def test_repeat_read_is_served_from_the_cache(self):
+        first = self.client.get("/api/product/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/product/")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_client_revalidates_with_a_304(self):
+        response = self.client.get("/api/product/")
+        self.assertEqual(self.client.get("/api/product/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        since = self.client.get("/api/product/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+    def test_write_invalidates_the_cached_list_and_detail(self):
+        listed = self.client.get("/api/product/")
+        detail = self.client.get(f"/api/product/{self.product.pk}/")
+        # Versions are bumped once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Kibble Plus"
+            self.product.save()
+
+        response = self.client.get("/api/product/", HTTP_IF_NONE_MATCH=listed["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["name"], "Kibble Plus")
+        response = self.client.get(f"/api/product/{self.product.pk}/", HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Kibble Plus")
+
+    def test_brand_rename_reaches_the_product_list(self):
+        listed = self.client.get("/api/product/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Acme Pets"
+            self.brand.save()
+        response = self.client.get("/api/product/", HTTP_IF_NONE_MATCH=listed["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["brand"]["name"], "Acme Pets")
+
+    def test_unrelated_write_keeps_the_cache(self):
+        listed = self.client.get("/api/product/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.first_name = "Alice"
+            self.customer.save()
+        self.assertEqual(self.client.get("/api/product/", HTTP_IF_NONE_MATCH=listed["ETag"]).status_code, 304)
@@ -0,0 +1,38 @@
+from petstoreapp.models import Cart
+from petstoreapp.tests.base import StoreTestCase
+
+
+class CartMergeTests(StoreTestCase):
+    def add(self, quantity, **credentials):
+        response = self.client.post(
+            "/api/cart/current/items/",
+            {"items": [{"op": "add", "variant": self.variant.pk, "quantity": quantity}]},
+            format="json", **credentials,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def login(self, cart_token):
+        return self.client.post(
+            "/api/token/", {"username": "alice", "password": "alice-pass", "cart_token": cart_token}, format="json",
+        )
+
+    def test_anonymous_cart_is_handed_to_the_user(self):
+        anonymous = self.add(2)
+        response = self.login(anonymous["token"])
+        self.assertEqual(response.status_code, 200)
+        cart = response.json()["cart"]
+        self.assertEqual(cart["id"], anonymous["id"])
+        self.assertEqual(cart["item_count"], 2)
+        self.assertEqual(Cart.objects.get(pk=anonymous["id"]).user_id, self.customer.pk)
+
+    def test_quantities_add_up_in_the_users_cart(self):
+        mine = self.add(1, **self.bearer(self.customer))
+        anonymous = self.add(2)
+        cart = self.login(anonymous["token"]).json()["cart"]
+        self.assertEqual(cart["id"], mine["id"])
+        self.assertEqual([item["quantity"] for item in cart["items"]], [3])
+        self.assertFalse(Cart.objects.get(pk=anonymous["id"]).is_active)
+
+    def test_malformed_cart_token_is_rejected(self):
+        self.assertEqual(self.login("not-a-uuid").status_code, 400)
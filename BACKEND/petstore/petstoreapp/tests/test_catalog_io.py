@@ -0,0 +1,87 @@
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from petstoreapp.catalog_io import CatalogImportError, import_catalog
+from petstoreapp.models import CatalogImport, Product, Variant
+from petstoreapp.tests.base import StoreTestCase
+
+
+def feed(*records):
+    return [json.dumps(record) + "\n" for record in records]
+
+
+def record(sku, **fields):
+    return {"sku": sku, "name": f"Product {sku}", "brand": "Acme", "price": "5.00", "stock": 3, **fields}
+
+
+class CatalogImportTests(StoreTestCase):
+    def test_creates_and_updates_by_sku(self):
+        job = import_catalog(feed(record("NEW-1"), record("KIB-1", name="Kibble v2")), "feed.jsonl", "jsonl")
+        self.assertEqual((job.status, job.rows_created, job.rows_updated), (CatalogImport.Status.DONE, 1, 1))
+        self.assertEqual(Product.objects.get(sku="KIB-1").name, "Kibble v2")
+
+    def test_resume_starts_after_the_last_committed_batch(self):
+        rows = [record("R-1"), record("R-2"), record("R-3", stock=-3)]
+        with self.assertRaises(CatalogImportError) as caught:
+            import_catalog(feed(*rows), "feed.jsonl", "jsonl", batch_size=2)
+        job = caught.exception.job
+        self.assertEqual((job.status, job.rows_processed), (CatalogImport.Status.FAILED, 2))
+        self.assertIn("Row 3", job.error)
+
+        # Rows before rows_processed are skipped, so the renamed R-1 is not applied
+        rows = [record("R-1", name="Renamed"), record("R-2"), record("R-3")]
+        job = import_catalog(feed(*rows), "feed.jsonl", "jsonl", batch_size=2, resume=job)
+        self.assertEqual((job.status, job.rows_processed, job.rows_created), (CatalogImport.Status.DONE, 3, 3))
+        self.assertEqual(Product.objects.get(sku="R-1").name, "Product R-1")
+
+    def test_bad_values_are_reported_with_their_row(self):
+        for bad in ({"stock": -3}, {"price": "1e20"}, {"price": "NaN"}, {"price": "-1"},
+                    {"variants": [{"label": "S", "price": "1", "stock_quantity": -1}]}):
+            with self.subTest(bad=bad), self.assertRaises(CatalogImportError) as caught:
+                import_catalog(feed(record("OK-1"), record("BAD-1", **bad)), "feed.jsonl", "jsonl")
+            self.assertEqual(caught.exception.row, 2)
+
+    def test_prices_are_rounded_to_cents(self):
+        import_catalog(feed(record("P-1", price="4.999", variants=[{"label": "S", "price": "2.005"}])),
+                       "feed.jsonl", "jsonl")
+        self.assertEqual(str(Product.objects.get(sku="P-1").price), "5.00")
+        self.assertEqual(str(Variant.objects.get(label="S").price), "2.00")
+
+    def test_csv_list_columns(self):
+        lines = [
+            "sku,name,description,brand,price,stock,is_active,categories,attributes,variants\n",
+            "C-1,Collar,,Acme,9.50,4,1,Dogs|Gear,Color=Red,S:9.50:2:0.1|L:11.00:1:\n",
+        ]
+        import_catalog(lines, "feed.csv", "csv")
+        product = Product.objects.get(sku="C-1")
+        self.assertEqual(sorted(c.name for c in product.categories.all()), ["Dogs", "Gear"])
+        self.assertEqual(sorted(product.variants.values_list("label", "stock_quantity")), [("L", 1), ("S", 2)])
+
+
+class CatalogImportViewTests(StoreTestCase):
+    def upload(self, *records):
+        data = "".join(feed(*records)).encode()
+        return self.client.post(
+            "/api/catalog/import/", {"file": SimpleUploadedFile("feed.jsonl", data)},
+            format="multipart", **self.bearer(self.admin),
+        )
+
+    def test_bad_row_is_a_400_naming_the_import(self):
+        response = self.upload(record("V-1"), record("V-2", price="1e20"))
+        self.assertEqual(response.status_code, 400)
+        body = response.json()
+        self.assertIn("Row 2", body["error"])
+        self.assertEqual(CatalogImport.objects.get(pk=body["import"]).status, CatalogImport.Status.FAILED)
+
+    def test_import_and_export_are_admin_only(self):
+        self.assertEqual(self.client.get("/api/catalog/export/").status_code, 401)
+        self.assertEqual(self.client.get("/api/catalog/export/", **self.bearer(self.customer)).status_code, 403)
+        self.assertEqual(self.client.get("/api/catalog/export/", **self.bearer(self.admin)).status_code, 200)
+        response = self.client.post("/api/catalog/import/", {}, format="multipart", **self.bearer(self.customer))
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_round_trips(self):
+        response = self.client.get("/api/catalog/export/?feed_format=jsonl", **self.bearer(self.admin))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["sku"] for line in lines], ["KIB-1"])
@@ -0,0 +1,62 @@
+from django.core.exceptions import ValidationError
+
+from petstoreapp.models import Category, ProductCategory
+from petstoreapp.tests.base import StoreTestCase
+
+
+class CategoryTreeTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dogs = Category.objects.create(name="Dogs")
+        self.food = Category.objects.create(name="Food", parent=self.dogs)
+        self.dry = Category.objects.create(name="Dry", parent=self.food)
+        self.cats = Category.objects.create(name="Cats")
+        ProductCategory.objects.create(product=self.product, category=self.dry)
+
+    def reload(self, *categories):
+        for category in categories:
+            category.refresh_from_db()
+
+    def skus(self, query):
+        response = self.client.get(f"/api/product/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [row["sku"] for row in response.json()["results"]]
+
+    def test_paths_follow_the_tree(self):
+        self.reload(self.dry)
+        self.assertEqual(self.dry.path, f"{self.dogs.pk}/{self.food.pk}/{self.dry.pk}/")
+        self.assertEqual((self.dry.depth, self.dry.full_path), (2, "Dogs -> Food -> Dry"))
+        self.assertEqual(set(self.dogs.get_descendants()), {self.dogs, self.food, self.dry})
+
+    def test_moving_a_category_moves_its_subtree(self):
+        self.food.parent = self.cats
+        self.food.save()
+        self.reload(self.dry)
+        self.assertEqual(self.dry.path, f"{self.cats.pk}/{self.food.pk}/{self.dry.pk}/")
+        self.assertEqual(self.dry.full_path, "Cats -> Food -> Dry")
+        self.assertEqual(set(self.cats.get_descendants(include_self=False)), {self.food, self.dry})
+        self.assertEqual(list(self.dogs.get_descendants(include_self=False)), [])
+
+    def test_cycles_are_rejected(self):
+        for parent in (self.dogs, self.food, self.dry):
+            with self.subTest(parent=parent.name), self.assertRaises(ValidationError):
+                self.dogs.parent = parent
+                self.dogs.save()
+        self.reload(self.dogs)
+        self.assertIsNone(self.dogs.parent_id)
+
+    def test_subtree_filter_reads_the_current_tree(self):
+        self.assertEqual(self.skus(f"category={self.dogs.pk}"), [])
+        self.assertEqual(self.skus(f"category={self.dogs.pk}&descendants=1"), ["KIB-1"])
+        self.assertEqual(self.skus(f"category={self.dry.pk}"), ["KIB-1"])
+
+        self.food.parent = self.cats
+        # The move invalidates cached lists once it commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.save()
+        self.assertEqual(self.skus(f"category={self.dogs.pk}&descendants=1"), [])
+        self.assertEqual(self.skus(f"category={self.cats.pk}&descendants=1"), ["KIB-1"])
+
+    def test_unknown_and_malformed_categories(self):
+        self.assertEqual(self.skus("category=999999&descendants=1"), [])
+        self.assertEqual(self.client.get("/api/product/?category=dogs").status_code, 400)
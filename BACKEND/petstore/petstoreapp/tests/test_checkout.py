@@ -0,0 +1,89 @@
+from petstoreapp.checkout import CheckoutError, OutOfStock, checkout_cart, reserve_cart
+from petstoreapp.models import Cart, CartItem, Order, Payment, StockReservation, User
+from petstoreapp.tests.base import StoreTestCase
+
+
+class CheckoutStockTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shipping = self.address(self.customer)
+
+    def cart_for(self, quantity):
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, variant=self.variant, quantity=quantity)
+        return cart
+
+    def stock_left(self):
+        self.variant.refresh_from_db()
+        return self.variant.stock_quantity
+
+    def test_competing_checkouts_cannot_oversell(self):
+        first, second = self.cart_for(30), self.cart_for(30)
+        checkout_cart(first, self.shipping, Payment.Method.COD)
+        with self.assertRaises(OutOfStock):
+            checkout_cart(second, self.shipping, Payment.Method.COD)
+        self.assertEqual(self.stock_left(), 20)
+        self.assertEqual(Order.objects.count(), 1)
+        second.refresh_from_db()
+        self.assertTrue(second.is_active)
+
+    def test_reservation_holds_stock_against_other_carts(self):
+        held, other = self.cart_for(30), self.cart_for(30)
+        reserve_cart(held)
+        self.assertEqual(self.stock_left(), 20)
+        with self.assertRaises(OutOfStock):
+            checkout_cart(other, self.shipping, Payment.Method.COD)
+        checkout_cart(held, self.shipping, Payment.Method.COD)
+        self.assertEqual(self.stock_left(), 20)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checked_out_cart_cannot_be_reserved_again(self):
+        cart = self.cart_for(5)
+        checkout_cart(cart, self.shipping, Payment.Method.COD)
+        with self.assertRaisesMessage(CheckoutError, "Cart has already been checked out."):
+            reserve_cart(cart)
+        self.assertEqual(self.stock_left(), 45)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_second_submit_of_the_same_cart_fails(self):
+        cart = self.cart_for(5)
+        checkout_cart(cart, self.shipping, Payment.Method.COD)
+        with self.assertRaises(CheckoutError):
+            checkout_cart(cart, self.shipping, Payment.Method.COD)
+        self.assertEqual(self.stock_left(), 45)
+
+
+class CartOwnershipTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user("bob", "bob@example.com", "bob-pass")
+        self.cart = Cart.objects.create(user=self.customer)
+
+    def checkout(self, cart, address, **credentials):
+        return self.client.post(
+            f"/api/cart/{cart.pk}/checkout/",
+            {"shipping_addr": address.pk, "payment_method": Payment.Method.COD},
+            format="json", **credentials,
+        )
+
+    def test_another_users_cart_is_not_found(self):
+        response = self.checkout(self.cart, self.address(self.other), **self.bearer(self.other))
+        self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_caller_cannot_reach_a_users_cart_with_its_token(self):
+        response = self.checkout(self.cart, self.address(self.customer), HTTP_X_CART_TOKEN=str(self.cart.token))
+        self.assertEqual(response.status_code, 404)
+
+    def test_shipping_address_must_be_the_callers(self):
+        response = self.checkout(self.cart, self.address(self.other), **self.bearer(self.customer))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Shipping address does not belong to you.")
+        self.assertFalse(Order.objects.exists())
+
+    def test_reserving_a_checked_out_cart_is_rejected(self):
+        self.cart.is_active = False
+        self.cart.save(update_fields=["is_active"])
+        CartItem.objects.create(cart=self.cart, variant=self.variant, quantity=1)
+        response = self.client.post(f"/api/cart/{self.cart.pk}/reserve/", **self.bearer(self.customer))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Cart has already been checked out.")
@@ -0,0 +1,49 @@
+from petstoreapp.models import Brand, Category, Product, ProductCategory
+from petstoreapp.search import get_search_engine
+from petstoreapp.tests.base import StoreTestCase
+
+
+class FacetCountTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.zest = Brand.objects.create(name="Zest")
+        cls.dogs = Category.objects.create(name="Dogs")
+        cls.dog_toys = Category.objects.create(name="Toys", parent=cls.dogs)
+        cls.cats = Category.objects.create(name="Cats")
+        for sku, brand, category in (("D-1", cls.brand, cls.dogs), ("D-2", cls.zest, cls.dog_toys),
+                                     ("C-1", cls.zest, cls.cats)):
+            product = Product.objects.create(
+                sku=sku, name=f"Zesty collar {sku}" if sku == "D-2" else sku, description="", brand=brand,
+                price="12.00", stock=1,
+            )
+            ProductCategory.objects.create(product=product, category=category)
+        get_search_engine().index_products(Product.objects.all())
+
+    def listing(self, query):
+        body = self.client.get(f"/api/product/?facets=1&{query}").json()
+        brands = {entry["label"]: entry["count"] for entry in body["facets"]["brand"]}
+        return {row["sku"] for row in body["results"]}, body["facet_total"], brands
+
+    def test_unfiltered_counts_cover_the_catalog(self):
+        skus, total, brands = self.listing("")
+        self.assertEqual(total, len(skus))
+        self.assertEqual(brands, {"Acme": 2, "Zest": 2})
+
+    def test_counts_follow_the_category_subtree_filter(self):
+        skus, total, brands = self.listing(f"category={self.dogs.pk}&descendants=1")
+        self.assertEqual(skus, {"D-1", "D-2"})
+        self.assertEqual(total, 2)
+        self.assertEqual(brands, {"Acme": 1, "Zest": 1})
+
+    def test_own_selection_leaves_its_facet_open(self):
+        skus, total, brands = self.listing(f"category={self.dogs.pk}&descendants=1&brand={self.zest.pk}")
+        self.assertEqual(skus, {"D-2"})
+        self.assertEqual(total, 1)
+        # Picking Zest still shows how many Acme products the category has
+        self.assertEqual(brands, {"Acme": 1, "Zest": 1})
+
+    def test_counts_follow_search(self):
+        skus, total, brands = self.listing("search=collar")
+        self.assertEqual(skus, {"D-2"})
+        self.assertEqual((total, brands), (1, {"Zest": 1}))
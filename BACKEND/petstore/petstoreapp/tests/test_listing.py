@@ -0,0 +1,47 @@
+import json
+
+from petstoreapp.listing import CARD_FIELDS
+from petstoreapp.models import ProductImage
+from petstoreapp.tests.base import StoreTestCase
+
+SPARSE_FIELDS = ("id", "sku", "name", "price", "brand", "rating_avg", "main_image_url", "updated_at")
+
+
+class CompactListingTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.plain = self.make_product("BED-1", "Orthopedic bed", price="42.50")
+        ProductImage.objects.create(product=self.product, image_url="productImages/kibble.jpg")
+
+    def rows(self, query):
+        response = self.client.get(f"/api/product/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return {row["id"]: row for row in response.json()["results"]}
+
+    def test_card_view_returns_the_card_fields(self):
+        rows = self.rows("view=card")
+        for row in rows.values():
+            self.assertEqual(tuple(row), CARD_FIELDS)
+        self.assertEqual(rows[self.plain.pk]["price"], "42.50")
+        self.assertIsNone(rows[self.plain.pk]["thumbnail"])
+        self.assertIn("kibble", rows[self.product.pk]["thumbnail"])
+
+    def test_sparse_fields_match_the_full_representation(self):
+        full = self.rows("")
+        sparse = self.rows(f"fields={','.join(SPARSE_FIELDS)}")
+        self.assertEqual(set(sparse), set(full))
+        for pk, row in sparse.items():
+            self.assertEqual(tuple(row), SPARSE_FIELDS)
+            self.assertEqual(row, {name: full[pk][name] for name in SPARSE_FIELDS})
+
+    def test_streamed_cards_match_the_page(self):
+        streamed = self.client.get("/api/product/?view=card&stream=1")
+        self.assertEqual(streamed.status_code, 200)
+        rows = sorted(json.loads(b"".join(streamed.streaming_content)), key=lambda row: row["id"])
+        self.assertEqual(rows, sorted(self.rows("view=card").values(), key=lambda row: row["id"]))
+
+    def test_unknown_and_nested_fields_are_rejected(self):
+        for fields in ("nope", "id,variants"):
+            with self.subTest(fields=fields):
+                response = self.client.get(f"/api/product/?fields={fields}")
+                self.assertEqual(response.status_code, 400)
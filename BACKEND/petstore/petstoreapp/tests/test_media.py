@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase
+
+from petstoreapp import media
+
+
+class MediaServeTests(SimpleTestCase):
+    body = b"0123456789" * 10
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        Path(self.root, "notes.txt").write_bytes(self.body)
+        self.factory = RequestFactory()
+
+    def serve(self, path="notes.txt", **headers):
+        return media.serve(self.factory.get(f"/media/{path}", headers=headers), path, document_root=self.root)
+
+    def test_full_file_with_validators(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_single_range(self):
+        response = self.serve(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(b"".join(response.streaming_content), self.body[10:20])
+
+    def test_suffix_range(self):
+        response = self.serve(Range="bytes=-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.body[-5:])
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(Range="bytes=500-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.serve(Range="bytes=0-9", **{"If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.serve()["ETag"]
+        self.assertEqual(self.serve(**{"If-None-Match": etag}).status_code, 304)
+
+    def test_paths_outside_the_root_are_not_found(self):
+        with self.assertRaises(Http404):
+            self.serve("../outside.txt")
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from petstoreapp import metrics
+from petstoreapp.models import ArchivedOrder, Order, OrderItem, Payment
+from petstoreapp.order_archive import archive_orders, archiving
+from petstoreapp.tests.base import StoreTestCase
+
+
+class ArchiveTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = self.place_order(self.customer)
+        Order.objects.filter(pk=self.order.pk).update(placed_at=timezone.now() - timedelta(days=400))
+        self.order.refresh_from_db()
+
+    def test_finished_orders_move_with_their_lines(self):
+        self.assertEqual(archive_orders(timezone.now()), 1)
+        self.assertFalse(Order.objects.filter(pk=self.order.pk).exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        archived = ArchivedOrder.objects.get(pk=self.order.pk)
+        self.assertEqual(archived.total_amount, Decimal("20.00"))
+        self.assertEqual(archived.payment_method, Payment.Method.COD)
+        self.assertEqual(list(archived.items.values_list("product_id", "quantity")), [(self.product.pk, 2)])
+
+    def test_orders_in_flight_stay(self):
+        Order.objects.filter(pk=self.order.pk).update(status=Order.Status.SHIPPED)
+        self.assertEqual(archive_orders(timezone.now()), 0)
+
+    def test_dashboard_still_counts_archived_orders(self):
+        metrics.rebuild_dashboard_metrics()
+        archive_orders(timezone.now())
+        summary = metrics.get_dashboard_summary()
+        self.assertEqual((summary.total_orders, summary.total_sales), (1, Decimal("20.00")))
+        self.assertEqual(metrics.rebuild_dashboard_metrics().total_sales, Decimal("20.00"))
+
+    def test_deleting_an_order_outside_the_archive_still_adjusts_the_dashboard(self):
+        metrics.rebuild_dashboard_metrics()
+        archive_orders(timezone.now())
+        self.assertFalse(archiving())
+        order = self.place_order(self.customer)
+        order.delete()
+        summary = metrics.get_dashboard_summary()
+        self.assertEqual((summary.total_orders, summary.total_sales), (1, Decimal("20.00")))
+
+    def test_timeline_lists_archived_orders(self):
+        archive_orders(timezone.now())
+        response = self.client.get("/api/me/orders/", **self.bearer(self.customer))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row["id"], row["archived"]) for row in response.json()["results"]], [(self.order.pk, True)])
@@ -0,0 +1,35 @@
+import json
+
+from petstoreapp.tests.base import StoreTestCase
+
+
+class KeysetPaginationTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            self.make_product(f"PAG-{i}")
+
+    def test_pages_follow_the_next_link_without_overlap(self):
+        first = self.client.get("/api/product/?page_size=3").json()
+        self.assertEqual(len(first["results"]), 3)
+        self.assertNotIn("count", first)
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(len(second["results"]), 2)
+        self.assertIsNone(second["next"])
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_previous_link_returns_to_the_first_page(self):
+        first = self.client.get("/api/product/?page_size=3").json()
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual([row["id"] for row in back["results"]], [row["id"] for row in first["results"]])
+
+    def test_stream_sends_the_whole_collection(self):
+        response = self.client.get("/api/product/?stream=1")
+        self.assertEqual(response["X-Streamed"], "true")
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(rows), 5)
+
+    def test_bad_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/api/product/?cursor=garbage").status_code, 404)
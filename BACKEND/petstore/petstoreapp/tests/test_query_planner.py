@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from petstoreapp.models import Category, ProductAttribute, ProductCategory, ProductImage, Variant
+from petstoreapp.tests.base import StoreTestCase
+
+
+class ProductQueryCountTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name="Dogs")
+        self.stocked = 0
+
+    def stock(self, count, variants=1):
+        for _ in range(count):
+            self.stocked += 1
+            product = self.make_product(f"QRY-{self.stocked}")
+            for n in range(variants):
+                Variant.objects.create(product=product, label=f"{n + 1}kg", price=product.price, stock_quantity=5)
+            ProductAttribute.objects.create(product=product, name="Color", value="Red")
+            ProductImage.objects.create(product=product, image_url=f"productImages/{product.sku}.jpg")
+            ProductCategory.objects.create(product=product, category=self.category)
+        return product
+
+    def queries(self, url):
+        # Every request is a cache miss, so each one is planned and serialized
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_list_query_count_does_not_grow_with_the_page(self):
+        self.stock(2)
+        few = self.queries("/api/product/")
+        # The page, then one prefetch each for images, attributes, variants and categories
+        self.assertEqual(few, 5)
+        self.stock(8)
+        self.assertEqual(self.queries("/api/product/"), few)
+
+    def test_detail_query_count_does_not_grow_with_its_relations(self):
+        small = self.stock(1)
+        large = self.stock(1, variants=6)
+        self.assertEqual(self.queries(f"/api/product/{large.pk}/"), self.queries(f"/api/product/{small.pk}/"))
+
+    def test_sparse_fields_skip_the_unused_relations(self):
+        self.stock(3)
+        self.assertLess(self.queries("/api/product/?fields=id,name,price"), self.queries("/api/product/"))
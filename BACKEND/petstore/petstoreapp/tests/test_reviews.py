@@ -0,0 +1,68 @@
+from petstoreapp.models import ProductRating, Review, User
+from petstoreapp.reviews import rating_summary, rebuild_product_ratings
+from petstoreapp.tests.base import StoreTestCase
+
+AGGREGATES = ("rating_count", "rating_sum", "rating_avg", "stars_1", "stars_2", "stars_3", "stars_4", "stars_5")
+
+
+class ProductRatingTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bob = User.objects.create_user("bob", "bob@example.com", "bob-pass")
+        self.other = self.make_product("BED-1")
+
+    def review(self, user, rating, product=None):
+        return Review.objects.create(product=product or self.product, user=user, rating=rating, comment="Fine")
+
+    def aggregates(self):
+        # A product whose last review went keeps an all-zero row; a rebuild has none
+        rated = ProductRating.objects.filter(rating_count__gt=0).order_by("pk")
+        return list(rated.values_list("pk", *AGGREGATES))
+
+    def assertMatchesRebuild(self):
+        kept = self.aggregates()
+        rebuild_product_ratings()
+        self.assertEqual(self.aggregates(), kept)
+
+    def test_created_reviews_are_counted(self):
+        self.review(self.customer, 5)
+        self.review(self.bob, 2)
+        summary = rating_summary(self.product.pk)
+        self.assertEqual((summary["average"], summary["count"]), ("3.50", 2))
+        self.assertEqual(summary["histogram"], {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1})
+        self.assertMatchesRebuild()
+
+    def test_changed_rating_moves_between_stars(self):
+        review = self.review(self.customer, 5)
+        self.review(self.bob, 4)
+        review.rating = 1
+        review.save()
+        summary = rating_summary(self.product.pk)
+        self.assertEqual((summary["average"], summary["count"]), ("2.50", 2))
+        self.assertEqual(summary["histogram"]["5"], 0)
+        self.assertEqual(summary["histogram"]["1"], 1)
+        self.assertMatchesRebuild()
+
+    def test_review_moved_to_another_product(self):
+        review = self.review(self.customer, 4)
+        review.product = self.other
+        review.save()
+        self.assertEqual(rating_summary(self.product.pk)["count"], 0)
+        self.assertEqual(rating_summary(self.other.pk)["average"], "4.00")
+        self.assertMatchesRebuild()
+
+    def test_deleted_review_leaves_the_aggregates(self):
+        self.review(self.customer, 3)
+        self.review(self.bob, 5).delete()
+        summary = rating_summary(self.product.pk)
+        self.assertEqual((summary["average"], summary["count"]), ("3.00", 1))
+        self.assertMatchesRebuild()
+
+    def test_feed_carries_the_summary_and_sorts(self):
+        self.review(self.customer, 2)
+        self.review(self.bob, 5)
+        body = self.client.get(f"/api/product/{self.product.pk}/reviews/?sort=highest").json()
+        self.assertEqual([row["rating"] for row in body["results"]], [5, 2])
+        self.assertEqual(body["summary"]["count"], 2)
+        response = self.client.get(f"/api/product/{self.product.pk}/reviews/?sort=loudest")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,41 @@
+from petstoreapp.models import Product
+from petstoreapp.search import DatabaseSearchEngine, get_search_engine, reindex_products
+from petstoreapp.tests.base import StoreTestCase
+
+
+class ProductSearchTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_product("TOY-1", "Rubber chew toy", description="Tastes like kibble")
+        self.make_product("BED-1", "Orthopedic bed")
+        get_search_engine().index_products(Product.objects.all())
+
+    def skus(self, query):
+        response = self.client.get(f"/api/product/?search={query}")
+        self.assertEqual(response.status_code, 200)
+        return [row["sku"] for row in response.json()["results"]]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.skus("kibble"), ["KIB-1", "TOY-1"])
+
+    def test_prefix_matches(self):
+        self.assertEqual(self.skus("orthop"), ["BED-1"])
+
+    def test_typos_still_match(self):
+        self.assertEqual(self.skus("orthopedik"), ["BED-1"])
+        self.assertEqual(self.skus("kibbel")[:1], ["KIB-1"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.skus("rubber kibble"), ["TOY-1"])
+        self.assertEqual(self.skus("rubber bed"), [])
+
+    def test_reindex_follows_renames(self):
+        Product.objects.filter(sku="BED-1").update(name="Memory foam mattress")
+        reindex_products(list(Product.objects.filter(sku="BED-1").values_list("pk", flat=True)))
+        self.assertEqual(self.skus("orthopedic"), [])
+        self.assertEqual(self.skus("mattress"), ["BED-1"])
+
+    def test_database_fallback_ranks_name_matches_first(self):
+        ids = DatabaseSearchEngine().search("kibble")
+        self.assertEqual(list(Product.objects.filter(pk__in=ids[:1]).values_list("sku", flat=True)), ["KIB-1"])
+        self.assertEqual(len(ids), 2)
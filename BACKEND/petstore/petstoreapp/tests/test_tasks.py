@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from petstoreapp.models import Job
+from petstoreapp.tasks import STALE_AFTER, claim, enqueue_periodic, requeue_stale, run_job, task
+
+CALLS = []
+
+
+@task(max_attempts=2, retry_delay=10)
+def flaky(succeed=True):
+    CALLS.append(succeed)
+    if not succeed:
+        raise RuntimeError("printer on fire")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def claim_one(self):
+        jobs = claim("worker-1")
+        self.assertEqual(len(jobs), 1)
+        return jobs[0]
+
+    def run_failing(self, job):
+        with self.assertLogs("petstoreapp.tasks", "WARNING"):
+            self.assertFalse(run_job(job))
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+    def test_successful_job_is_done(self):
+        flaky.delay(True)
+        job = self.claim_one()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.Status.RUNNING, 1, "worker-1"))
+        self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(CALLS, [True])
+
+    def test_failures_back_off_then_give_up(self):
+        queued = flaky.delay(False)
+        before = timezone.now()
+        self.run_failing(self.claim_one())
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.Status.QUEUED, 1))
+        self.assertIn("printer on fire", queued.last_error)
+        self.assertGreaterEqual(queued.run_at, before + timedelta(seconds=10))
+        # Not due until the backoff has passed
+        self.assertEqual(claim("worker-1"), [])
+
+        self.make_due(queued)
+        self.run_failing(self.claim_one())
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.Status.FAILED, 2))
+        self.assertIsNotNone(queued.finished_at)
+        self.make_due(queued)
+        self.assertEqual(claim("worker-1"), [])
+        self.assertEqual(CALLS, [False, False])
+
+    def test_backoff_doubles_per_attempt(self):
+        queued = flaky.delay(False)
+        Job.objects.filter(pk=queued.pk).update(max_attempts=3, attempts=1)
+        self.run_failing(self.claim_one())
+        queued.refresh_from_db()
+        self.assertGreaterEqual(queued.run_at - timezone.now(), timedelta(seconds=15))
+
+    def test_silent_running_jobs_are_requeued(self):
+        stale, alive = flaky.delay(True), flaky.delay(True)
+        claim("worker-1", limit=2)
+        Job.objects.filter(pk=stale.pk).update(heartbeat_at=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        self.assertEqual(requeue_stale(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), (Job.Status.QUEUED, ""))
+        self.assertEqual(alive.status, Job.Status.RUNNING)
+        # The next claim hands it out again as a further attempt
+        self.assertEqual(self.claim_one().attempts, 2)
+
+    def test_periodic_task_is_not_queued_twice(self):
+        schedule = {flaky.task_name: 60}
+        enqueue_periodic(schedule, {}, now=1000)
+        enqueue_periodic(schedule, {}, now=2000)
+        self.assertEqual(Job.objects.filter(task=flaky.task_name).count(), 1)
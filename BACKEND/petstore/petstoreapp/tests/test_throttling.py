@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.test import override_settings
+
+from petstoreapp.tests.base import StoreTestCase
+
+# Daily buckets, so a test does not straddle a refill
+THROTTLED = override_settings(
+    THROTTLE_ENABLED=True,
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"anon": "3/day", "user": "5/day"}},
+)
+
+
+@THROTTLED
+class ThrottleTests(StoreTestCase):
+    def test_anonymous_client_is_limited_per_address(self):
+        codes = [self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.1").status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertEqual(self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_signed_in_users_have_their_own_limit(self):
+        credentials = self.bearer(self.customer)
+        codes = [self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.1", **credentials).status_code for _ in range(6)]
+        self.assertEqual(codes, [200] * 5 + [429])
+
+    def test_rejection_carries_retry_after(self):
+        for _ in range(3):
+            self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.1")
+        response = self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        codes = [
+            self.client.get("/api/brand/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=f"192.0.2.{i}").status_code
+            for i in range(4)
+        ]
+        self.assertEqual(codes[-1], 429)
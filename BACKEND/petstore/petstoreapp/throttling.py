@@ -0,0 +1,158 @@
+"""
+Request throttling with token buckets. Every request takes a token from its
+client's bucket: per user when signed in ('user' rate), per IP otherwise
+('anon'). Views with a throttle scope (dashboard, catalog import/export,
+?stream=1 lists, login) also take one from the client's bucket for that
+scope and one from the route's bucket shared by all clients
+('<scope>.route'), so costly routes have their own, tighter budgets.
+
+Buckets live in the 'throttle' cache: LocMem for one process, or Redis or
+Memcached so limits hold across processes (FileBasedCache will not do: its
+incr() is not atomic). A bucket refills in full once per period. To keep
+the shared store off the hot path, each process leases a slice of a
+bucket's tokens (THROTTLE_LEASE_FRACTION of its capacity) and spends it
+locally under one of LOCK_SHARDS locks.
+
+Anonymous clients are keyed by REMOTE_ADDR, or by the address
+REST_FRAMEWORK['NUM_PROXIES'] trusted proxies put in X-Forwarded-For.
+
+DRF checks throttles before the handler runs, after authentication, which
+reads nothing from the database for anonymous and token-claims requests.
+A rejected request is a 429 with Retry-After and no database work.
+"""
+import threading
+import time
+import zlib
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Alias in settings.CACHES; shared across processes for limits to be global
+THROTTLE_CACHE = 'throttle'
+LOCK_SHARDS = 64
+# Local leases kept before expired ones are dropped
+MAX_LEASES = 10000
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+_locks = [threading.Lock() for _ in range(LOCK_SHARDS)]
+# bucket key -> [tokens left, expires at]
+_leases = {}
+
+
+def throttle_cache():
+    return caches[THROTTLE_CACHE]
+
+
+def parse_rate(rate):
+    """'100/min' -> (100, 60); None for an unset rate."""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+# ---------- Token buckets ---------- #
+def _take_shared(key, capacity, period, want, now):
+    """
+    Take up to `want` of the shared bucket's tokens, refilled in full at
+    each multiple of `period`; returns (granted, when the bucket refills).
+    The count is only changed with add() and incr(), which are atomic in
+    Redis, Memcached and LocMem, so processes never share out more than
+    `capacity` between them.
+    """
+    window = int(now // period)
+    refills_at = (window + 1) * period
+    window_key = f'{key}:{window}'
+    cache = throttle_cache()
+    cache.add(window_key, 0, ceil(period) + 1)
+    try:
+        used = cache.incr(window_key, want)
+    except ValueError:
+        # Evicted between add() and incr(): count this window as spent
+        return 0, refills_at
+    return max(0, min(want, capacity - (used - want))), refills_at
+
+
+def _prune(now):
+    for key, (_, expires_at) in list(_leases.items()):
+        if now >= expires_at:
+            _leases.pop(key, None)
+
+
+def take(key, capacity, period):
+    """Take one token from bucket `key`; returns 0 when allowed, else seconds to wait."""
+    now = time.time()
+    lease_size = max(1, int(capacity * getattr(settings, 'THROTTLE_LEASE_FRACTION', 0.1)))
+    with _locks[zlib.crc32(key.encode()) % LOCK_SHARDS]:
+        lease = _leases.get(key)
+        # A lease ends with the window it was taken from
+        if lease is None or lease[0] < 1 or now >= lease[1]:
+            granted, refills_at = _take_shared(key, capacity, period, lease_size, now)
+            if not granted:
+                _leases.pop(key, None)
+                return refills_at - now
+            lease = _leases[key] = [granted, refills_at]
+        lease[0] -= 1
+    if len(_leases) > MAX_LEASES:
+        _prune(now)
+    return 0
+
+
+# ---------- DRF throttles ---------- #
+class TokenBucketThrottle(BaseThrottle):
+    """Takes a token from each bucket buckets() names; rates come from DEFAULT_THROTTLE_RATES."""
+
+    def buckets(self, request, view):
+        """[(scope, ident)] for this request."""
+        raise NotImplementedError
+
+    def client_ident(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.delay = None
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        for scope, ident in self.buckets(request, view):
+            rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+            if rate is None:
+                continue
+            delay = take(f'throttle:{scope}:{ident}', *rate)
+            if delay:
+                self.delay = delay
+                return False
+        return True
+
+    def wait(self):
+        return self.delay
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """Every request: the 'user' bucket when signed in, else the 'anon' bucket for the IP."""
+
+    def buckets(self, request, view):
+        scope = 'user' if request.user and request.user.is_authenticated else 'anon'
+        return [(scope, self.client_ident(request))]
+
+
+class RouteRateThrottle(TokenBucketThrottle):
+    """
+    Views with a throttle_scope (@throttle_scope for @api_view functions):
+    the client's bucket for the scope, then the route's bucket shared by
+    every client. A view can pick its scope per request with
+    get_throttle_scope(request).
+    """
+
+    def buckets(self, request, view):
+        get_scope = getattr(view, 'get_throttle_scope', None)
+        scope = get_scope(request) if get_scope else getattr(view, 'throttle_scope', None)
+        if not scope:
+            return []
+        return [(scope, self.client_ident(request)), (f'{scope}.route', 'all')]
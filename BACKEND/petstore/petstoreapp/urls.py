@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     index, PhoneNumberViewSet, AddressViewSet, CategoryViewSet,
     BrandViewSet, ProductCategoryViewSet, ProductImageViewSet,
     ProductAttributeViewSet, VariantViewSet, CartViewSet, CartItemViewSet,
     OrderViewSet, OrderItemViewSet, PaymentViewSet, ReviewViewSet,
     UserViewSet, ProductViewSet, BannerImageView, SignUpView,
-    UserProfileView , admin_dashboard
+    UserProfileView , admin_dashboard, CatalogImportView, CatalogExportView,
+    PerfReportView, BootstrapView, JobQueueView, MyOrdersView, MyOrderSummaryView,
+    SalesAnalyticsView
 )
 
 router = DefaultRouter()
@@ -31,8 +34,23 @@ urlpatterns = [
     path('', index, name='index'),
     path('api/', include(router.urls)),
     path('api/images/banner', BannerImageView.as_view(), name='banner-image'),
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('api/users/', SignUpView.as_view(), name='signup'),
     path('api/user/profile/', UserProfileView.as_view(), name='user-profile'), 
+    path('api/me/orders/', MyOrdersView.as_view(), name='my-orders'),
+    path('api/me/orders/summary/', MyOrderSummaryView.as_view(), name='my-order-summary'),
     path('api/admin/dashboard/', admin_dashboard, name='admin-dashboard'),
+    path('api/catalog/import/', CatalogImportView.as_view(), name='catalog-import'),
+    path('api/catalog/export/', CatalogExportView.as_view(), name='catalog-export'),
+    path('api/admin/perf/', PerfReportView.as_view(), name='perf-report'),
+    path('api/admin/jobs/', JobQueueView.as_view(), name='job-queue'),
+    path('api/admin/sales/', SalesAnalyticsView.as_view(), name='sales-analytics'),
+    # Async read path for ASGI deployments (petstoreapp/async_views.py)
+    path('api/async/product/', async_views.product_list, name='async-product-list'),
+    path('api/async/product/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('api/async/images/banner', async_views.banner, name='async-banner'),
+    path('api/async/category/', async_views.category_list, name='async-category-list'),
+    path('api/async/brand/', async_views.brand_list, name='async-brand-list'),
+    path('api/async/home/', async_views.home, name='async-home'),
      
 ]
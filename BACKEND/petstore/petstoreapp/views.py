@@ -1,18 +1,30 @@
-from django.http import HttpResponse
+import io
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from rest_framework import status, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Sum, Count
-from rest_framework.decorators import api_view
+from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework.decorators import action, api_view, throttle_scope
 
 from .models import (
     PhoneNumber, Address, Category, Brand, Product, ProductCategory,
     ProductImage, ProductAttribute, Variant, Cart, CartItem, Order,
-    OrderItem, Payment, Review, BannerImage,User
+    OrderItem, Payment, Review, ReviewVote, BannerImage, ProductSales, CatalogImport, User
 )
 from .serializers import (
     PhoneNumberSerializer, AddressSerializer, CategorySerializer,
@@ -20,8 +32,30 @@ from .serializers import (
     ProductAttributeSerializer, VariantSerializer, CartSerializer,
     CartItemSerializer, OrderSerializer, OrderItemSerializer,
     PaymentSerializer, ReviewSerializer, UserSerializer,
-    BannerImageSerializer, ProductSerializer
+    BannerImageSerializer, ProductSerializer, CheckoutSerializer, ReviewFeedSerializer,
+    CartOperationsSerializer, timeline_data
 )
+from .analytics import BUCKETS, Dimension, sales_report
+from .authentication import load_user
+from .bootstrap import BOOTSTRAP_NAMESPACES, build_bootstrap
+from .cache import CachedResponseMixin, response_cache_key
+from .catalog_io import FORMATS, CatalogImportError, export_feed, format_for, import_catalog
+from .carts import (
+    CartError, apply_operations, get_summary as get_cart_summary, merge_into_user_cart, open_cart
+)
+from .checkout import CheckoutError, OutOfStock, checkout_cart, reserve_cart
+from .facets import FacetedListMixin
+from .filters import CategorySubtreeFilter, FacetFilter, OrderStatusFilter, ProductSearchFilter
+from .listing import CompactListMixin
+from .metrics import get_dashboard_summary
+from .order_archive import OrderTimelinePagination, order_summary
+from .pagination import StreamingListMixin
+from .profiling import clear_records, endpoint_report, recent_records
+from .reviews import DEFAULT_SORT, FEED_SORTS, ReviewFeedPagination, rating_summary
+from .query_planner import (
+    QueryPlannedMixin, order_query_planner, product_query_planner, review_query_planner
+)
+from .tasks import queue_stats
 
 User = get_user_model()
 
@@ -31,6 +65,31 @@ def index(request):
     return HttpResponse("Welcome to the Pet Store API.")
 
 
+# ---------- Login ---------- #
+class CartMergingTokenView(TokenObtainPairView):
+    """
+    /api/token/ login. A `cart_token` in the body folds that anonymous cart
+    into the user's open cart, and the merged summary comes back as `cart`.
+    """
+    throttle_scope = 'login'
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0])
+        data = dict(serializer.validated_data)
+        raw = request.data.get('cart_token')
+        if raw:
+            try:
+                token = uuid.UUID(str(raw))
+            except ValueError:
+                return Response({"error": "Invalid cart token."}, status=status.HTTP_400_BAD_REQUEST)
+            data['cart'] = merge_into_user_cart(token, serializer.user)
+        return Response(data, status=status.HTTP_200_OK)
+
+
 # ---------- Signup View ---------- #
 class SignUpView(APIView):
     permission_classes = [AllowAny]
@@ -48,16 +107,17 @@ class SignUpView(APIView):
         if User.objects.filter(username=username).exists():
             return Response({"error": "Username already taken"}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = User.objects.create_user(username=username, email=email, password=password)
-        
-        # Optional: Auto-create UserProfile (if not handled by signal)
-        profile = getattr(user, "userprofile", None)
-        if profile:
-            profile.phone = phone
-            profile.address = address
-            profile.is_customer = is_customer
-            profile.is_seller = is_seller
-            profile.save()
+        with transaction.atomic():
+            user = User.objects.create_user(username=username, email=email, password=password)
+
+            # Optional: Auto-create UserProfile (if not handled by signal)
+            profile = getattr(user, "userprofile", None)
+            if profile:
+                profile.phone = phone
+                profile.address = address
+                profile.is_customer = is_customer
+                profile.is_seller = is_seller
+                profile.save()
 
         refresh = RefreshToken.for_user(user)
 
@@ -65,8 +125,8 @@ class SignUpView(APIView):
             "user": {
                 "username": user.username,
                 "email": user.email,
-                "phone": profile.phone if profile else "",
-                "address": profile.address if profile else "",
+                "phone": profile.phone if profile else None,
+                "address": profile.address if profile else None,
                 "is_customer": profile.is_customer if profile else False,
                 "is_seller": profile.is_seller if profile else False,
             },
@@ -80,23 +140,26 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        profile = user.userprofile
+        # request.user may hold only token claims; the cache has the full row and profile
+        user = load_user(request.user.pk)
+        if user is None:
+            return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        profile = getattr(user, 'userprofile', None)
         data = {
             "username": user.username,
             "email": user.email,
-            "phone": profile.phone,
-            "address": profile.address,
-            "is_customer": profile.is_customer,
-            "is_seller": profile.is_seller
+            "phone": profile.phone if profile else None,
+            "address": profile.address if profile else None,
+            "is_customer": profile.is_customer if profile else False,
+            "is_seller": profile.is_seller if profile else False
         }
         return Response(data)
 
 @api_view(['GET'])
+@throttle_scope('dashboard')
 def admin_dashboard(request):
-    total_products = Product.objects.count()
-    total_sales = Order.objects.aggregate(total=Sum('total_amount'))['total'] or 0
-    total_customers = User.objects.filter(order__isnull=False).distinct().count()
+    # KPIs come from the materialized summary kept current by signals.py
+    summary = get_dashboard_summary()
 
     # Recent 5 orders ordered by placed_at
     recent_orders = Order.objects.select_related('user').order_by('-placed_at')[:5]
@@ -111,106 +174,407 @@ def admin_dashboard(request):
     ]
 
     # Top 5 products by total sold count (through variants -> orderitems)
-    top_products = Product.objects.annotate(
-        sold_count=Count('variants__orderitem')
-    ).order_by('-sold_count')[:5]
+    top_products = [
+        (row.product, row.sold_count, row.total_revenue)
+        for row in ProductSales.objects.select_related('product')
+        .prefetch_related('product__categories')
+        .order_by('-sold_count')[:5]
+    ]
+    if len(top_products) < 5:
+        # Products that never sold have no ProductSales row; they fill the rest at zero
+        unsold = (
+            Product.objects.filter(sales__isnull=True).prefetch_related('categories')
+            .order_by('-pk')[:5 - len(top_products)]
+        )
+        top_products += [(p, 0, Decimal('0')) for p in unsold]
 
     top_products_data = []
-    for p in top_products:
-        total_revenue = OrderItem.objects.filter(
-            variant__product=p
-        ).aggregate(rev=Sum('unit_price'))['rev'] or 0
-
+    for p, sold_count, total_revenue in top_products:
+        category = next(iter(p.categories.all()), None)
         top_products_data.append({
             "id": p.id,
             "name": p.name,
-            "category": p.categories.first().name if p.categories.exists() else '',
+            "category": category.name if category else '',
             "image": p.main_image.url if p.main_image else None,
-            "sold_count": p.sold_count,
+            "sold_count": sold_count,
             "total_revenue": total_revenue,
         })
 
     return Response({
-        "total_products": total_products,
-        "total_sales": total_sales,
-        "total_customers": total_customers,
+        "total_products": summary.total_products,
+        "total_sales": summary.total_sales,
+        "total_customers": summary.total_customers,
         "analytics_score": 87,  # You can replace with real calculation
         "recent_orders": orders_data,
         "top_products": top_products_data,
     })
 
 # ---------- Generic ViewSets ---------- #
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-class PhoneNumberViewSet(viewsets.ModelViewSet):
+class PhoneNumberViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = PhoneNumber.objects.all()
     serializer_class = PhoneNumberSerializer
 
-class AddressViewSet(viewsets.ModelViewSet):
+class AddressViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespaces = ('category',)
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(CachedResponseMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
+    cache_namespaces = ('brand',)
 
-class ProductCategoryViewSet(viewsets.ModelViewSet):
+class ProductCategoryViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = ProductCategory.objects.all()
     serializer_class = ProductCategorySerializer
 
-class ProductImageViewSet(viewsets.ModelViewSet):
+class ProductImageViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = ProductImage.objects.all()
     serializer_class = ProductImageSerializer
 
-class ProductAttributeViewSet(viewsets.ModelViewSet):
+class ProductAttributeViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = ProductAttribute.objects.all()
     serializer_class = ProductAttributeSerializer
 
-class VariantViewSet(viewsets.ModelViewSet):
+class VariantViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Variant.objects.all()
     serializer_class = VariantSerializer
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(QueryPlannedMixin, CachedResponseMixin, FacetedListMixin, CompactListMixin,
+                     StreamingListMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    cursor_ordering = '-created_at'
+    query_planner = product_query_planner
+    cache_namespaces = ('product',)
+    cache_last_modified_field = 'updated_at'
+    filter_backends = [CategorySubtreeFilter, FacetFilter, ProductSearchFilter]
 
     def get_serializer_context(self):
         return {'request': self.request}
 
-class CartViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def reviews(self, request, pk=None):
+        """Slim, keyset-paginated reviews with the rating summary; ?sort= picks the order."""
+        product = get_object_or_404(Product.objects.only('pk'), pk=pk)
+        sort = request.query_params.get('sort', DEFAULT_SORT)
+        if sort not in FEED_SORTS:
+            return Response(
+                {"error": f"sort must be one of: {', '.join(FEED_SORTS)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        paginator = ReviewFeedPagination(sort)
+        queryset = Review.objects.filter(product=product).select_related('user').only(
+            'id', 'user', 'rating', 'title', 'comment', 'helpful_count', 'created_at', 'user__username'
+        )
+        try:
+            page = paginator.paginate_queryset(queryset, request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(
+            ReviewFeedSerializer(page, many=True).data, summary=rating_summary(product.pk)
+        )
+
+class CartViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
 
-class CartItemViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'])
+    def reserve(self, request, pk=None):
+        cart = self.get_owned_cart(request)
+        try:
+            expires_at = reserve_cart(cart)
+        except OutOfStock as exc:
+            return Response({"error": str(exc), "variant": exc.variant_id}, status=status.HTTP_409_CONFLICT)
+        except CheckoutError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"cart": cart.pk, "expires_at": expires_at})
+
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        cart = self.get_owned_cart(request)
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user if request.user.is_authenticated else None
+        shipping_addr = serializer.validated_data['shipping_addr']
+        if user is None or shipping_addr.user_id != user.pk:
+            return Response(
+                {"error": "Shipping address does not belong to you."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            order = checkout_cart(
+                cart,
+                shipping_addr,
+                serializer.validated_data['payment_method'],
+                user=user,
+            )
+        except OutOfStock as exc:
+            return Response({"error": str(exc), "variant": exc.variant_id}, status=status.HTTP_409_CONFLICT)
+        except CheckoutError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+    def get_owned_cart(self, request):
+        """The cart in the URL, if it is the caller's: theirs when signed in, else the one their token opens."""
+        cart = self.get_object()
+        owner = self.cart_owner(request)
+        if 'user' in owner:
+            owned = cart.user_id == owner['user'].pk
+        else:
+            owned = cart.user_id is None and owner['token'] is not None and cart.token == owner['token']
+        if not owned:
+            raise Http404
+        return cart
+
+    # The caller's own open cart, served by carts.py
+    def cart_owner(self, request):
+        """The signed-in user, or the anonymous cart token from X-Cart-Token / ?token=."""
+        if request.user.is_authenticated:
+            return {'user': request.user}
+        raw = request.headers.get('X-Cart-Token') or request.query_params.get('token')
+        try:
+            return {'token': uuid.UUID(raw) if raw else None}
+        except ValueError:
+            return {'token': None}
+
+    @action(detail=False, methods=['get'])
+    def current(self, request):
+        return Response(get_cart_summary(**self.cart_owner(request)))
+
+    @action(detail=False, methods=['post'], url_path='current/items')
+    def current_items(self, request):
+        serializer = CartOperationsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = open_cart(create=True, **self.cart_owner(request))
+        try:
+            summary = apply_operations(cart, serializer.validated_data['items'])
+        except CartError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary)
+
+class CartItemViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = CartItem.objects.all()
     serializer_class = CartItemSerializer
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(QueryPlannedMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    cursor_ordering = '-placed_at'
+    query_planner = order_query_planner
+    filter_backends = [OrderStatusFilter]
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryPlannedMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    query_planner = review_query_planner
+
+    # Rating aggregates change in the same transaction as the review (signals.py)
+    @transaction.atomic
+    def perform_create(self, serializer):
+        user = self.request.user if self.request.user.is_authenticated else None
+        serializer.save(user=user)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(detail=True, methods=['post', 'delete'], permission_classes=[IsAuthenticated])
+    def helpful(self, request, pk=None):
+        review = self.get_object()
+        with transaction.atomic():
+            if request.method == 'POST':
+                try:
+                    _, changed = ReviewVote.objects.get_or_create(review=review, user=request.user)
+                except IntegrityError:
+                    # A concurrent vote (or unvote) by the same user won the race; it is counted there
+                    changed = False
+                step = 1
+            else:
+                changed = ReviewVote.objects.filter(review=review, user=request.user).delete()[0] > 0
+                step = -1
+            if changed:
+                Review.objects.filter(pk=review.pk).update(helpful_count=F('helpful_count') + step)
+        review.refresh_from_db(fields=['helpful_count'])
+        return Response({"id": review.pk, "helpful_count": review.helpful_count})
+
+
+# ---------- Order timeline ---------- #
+class MyOrdersView(APIView):
+    """The signed-in user's orders, newest first, live and archived alike."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        paginator = OrderTimelinePagination()
+        try:
+            page = paginator.paginate(request.user, request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(timeline_data(page))
+
+
+class MyOrderSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(order_summary(request.user))
 
 
 # ---------- Banner View ---------- #
-class BannerImageView(APIView):
+class BannerImageView(CachedResponseMixin, APIView):
+    cache_namespaces = ('banner',)
+
     def get(self, request):
+        return self.cached_response(request, self.banner_response)
+
+    def banner_response(self, request):
         banner = BannerImage.objects.first()
         serializer = BannerImageSerializer(banner, context={'request': request})
         return Response(serializer.data)
+
+
+# ---------- Bootstrap View ---------- #
+class BootstrapView(CachedResponseMixin, APIView):
+    """Everything the home page needs in one cached document (petstoreapp/bootstrap.py)."""
+    cache_namespaces = BOOTSTRAP_NAMESPACES
+
+    def get(self, request):
+        return self.cached_response(request, self.bootstrap_response)
+
+    def bootstrap_response(self, request):
+        return Response(build_bootstrap(request))
+
+    def get_cache_key(self, request, versions):
+        # One document per host; query strings do not change it
+        return response_cache_key(request.build_absolute_uri(request.path), versions)
+
+
+# ---------- Catalog Import / Export ---------- #
+class CatalogImportView(APIView):
+    permission_classes = [IsAdminUser]
+    throttle_scope = 'catalog_io'
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload the feed as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get("feed_format") or format_for(upload.name)
+        if fmt not in FORMATS:
+            return Response({"error": f"Unknown format {fmt}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        resume = None
+        if request.data.get("resume"):
+            resume = CatalogImport.objects.filter(
+                pk=request.data["resume"], status=CatalogImport.Status.FAILED
+            ).first()
+            if resume is None:
+                return Response({"error": "No failed import to resume."}, status=status.HTTP_400_BAD_REQUEST)
+
+        feed = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+        try:
+            job = import_catalog(feed, upload.name, fmt, resume=resume)
+        except CatalogImportError as exc:
+            return Response({
+                "error": str(exc),
+                "import": exc.job.pk,
+                "rows_processed": exc.job.rows_processed,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "import": job.pk,
+            "rows_processed": job.rows_processed,
+            "rows_created": job.rows_created,
+            "rows_updated": job.rows_updated,
+        }, status=status.HTTP_201_CREATED)
+
+
+class CatalogExportView(APIView):
+    permission_classes = [IsAdminUser]
+    content_types = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+    throttle_scope = 'catalog_io'
+
+    def get(self, request):
+        # Not ?format=, which DRF reserves for picking a renderer
+        fmt = request.query_params.get("feed_format", "jsonl")
+        if fmt not in FORMATS:
+            return Response({"error": f"Unknown format {fmt}."}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(export_feed(fmt), content_type=self.content_types[fmt])
+        response["Content-Disposition"] = f'attachment; filename="catalog.{fmt}"'
+        return response
+
+
+# ---------- Performance Report ---------- #
+class PerfReportView(APIView):
+    """Per-endpoint latency and query stats from this process's profiling buffer."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        records = recent_records()
+        return Response({"requests": len(records), "endpoints": endpoint_report(records)})
+
+    def delete(self, request):
+        clear_records()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobQueueView(APIView):
+    """Background job queue depth, wait and run latencies, and failures by task."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(queue_stats())
+
+
+class SalesAnalyticsView(APIView):
+    """
+    Orders, units and revenue from the sales rollups:
+    ?from=&to= (dates, default the last 30 days), ?bucket=day|week|month,
+    ?by=total|product|brand|category|payment, ?limit= top keys for ?by.
+    """
+    permission_classes = [IsAdminUser]
+    default_days = 30
+    max_limit = 100
+
+    def get(self, request):
+        params = request.query_params
+        raw_start, raw_end = params.get('from', ''), params.get('to', '')
+        try:
+            start = parse_date(raw_start) if raw_start else None
+            end = parse_date(raw_end) if raw_end else timezone.localdate()
+        except ValueError:
+            start = end = None
+        # parse_date raises for impossible dates but returns None for text that is not a date at all
+        if end is None or (raw_start and start is None):
+            return Response({"error": "Dates must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        start = start or end - timedelta(days=self.default_days - 1)
+        if start > end:
+            return Response({"error": "'from' must not be after 'to'."}, status=status.HTTP_400_BAD_REQUEST)
+        bucket = params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return Response({"error": f"Unknown bucket {bucket}."}, status=status.HTTP_400_BAD_REQUEST)
+        dimension = params.get('by', Dimension.TOTAL)
+        if dimension not in Dimension.values:
+            return Response({"error": f"Unknown dimension {dimension}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(params.get('limit', 10)), self.max_limit))
+        except ValueError:
+            return Response({"error": "'limit' must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(sales_report(start, end, bucket, dimension, limit))
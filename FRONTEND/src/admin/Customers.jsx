@@ -8,8 +8,7 @@ export default function Customers() {
   const [loading, setLoading] = useState(true)
   const [searchTerm, setSearchTerm] = useState("")
 
-  // No pagination since backend returns a plain array
-  // You can implement client-side pagination if needed
+  // ?stream=1 returns every customer as one array rather than a 20-row cursor page
 
   useEffect(() => {
     fetchCustomers()
@@ -19,11 +18,11 @@ export default function Customers() {
     try {
       setLoading(true)
       // Adjust API URL and params as needed
-      const response = await fetch(`http://127.0.0.1:8000/api/users/?search=${encodeURIComponent(searchTerm)}`)
+      const response = await fetch(
+        `http://127.0.0.1:8000/api/users/?stream=1&search=${encodeURIComponent(searchTerm)}`
+      )
       const data = await response.json()
-
-      // Backend returns plain array of users
-      setCustomers(data)
+      setCustomers(Array.isArray(data) ? data : [])
     } catch (error) {
       console.error("Error fetching customers:", error)
       setCustomers([])
@@ -3,39 +3,52 @@
 import { useState, useEffect } from "react"
 import { Filter, Plus, ChevronDown, ChevronLeft, ChevronRight } from "lucide-react"
 
+const FIRST_PAGE = "http://127.0.0.1:8000/api/product/?page_size=10"
+
 export default function ProductList({ onAddProduct, onEditProduct }) {
   const [products, setProducts] = useState([])
   const [loading, setLoading] = useState(true)
-  const [currentPage, setCurrentPage] = useState(1)
-  const [totalPages, setTotalPages] = useState(1)
+  // Cursor pagination: the API hands back the next/previous page URLs
+  const [pageUrl, setPageUrl] = useState(FIRST_PAGE)
+  const [pageNumber, setPageNumber] = useState(1)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [previousUrl, setPreviousUrl] = useState(null)
 
   useEffect(() => {
     fetchProducts()
-  }, [currentPage])
+  }, [pageUrl])
 
   const fetchProducts = async () => {
     try {
       setLoading(true)
-      const res = await fetch(`http://127.0.0.1:8000/api/product/?page=${currentPage}`)
+      const res = await fetch(pageUrl)
       if (!res.ok) throw new Error("Failed to fetch products")
       const data = await res.json()
       // If data is an array, use it directly
       if (Array.isArray(data)) {
         setProducts(data)
-        setTotalPages(1) // No pagination
+        setNextUrl(null) // No pagination
+        setPreviousUrl(null)
       } else {
         setProducts(data.results || [])
-        setTotalPages(Math.ceil((data.count || 0) / 10))
+        setNextUrl(data.next || null)
+        setPreviousUrl(data.previous || null)
       }
     } catch (error) {
       console.error("Error fetching products:", error)
       setProducts([])
-      setTotalPages(1)
+      setNextUrl(null)
+      setPreviousUrl(null)
     } finally {
       setLoading(false)
     }
   }
 
+  const goToPage = (url, step) => {
+    setPageUrl(url)
+    setPageNumber((page) => page + step)
+  }
+
   const deleteProduct = async (id) => {
     if (!window.confirm("Are you sure you want to delete this product?")) return;
     try {
@@ -192,36 +205,19 @@ export default function ProductList({ onAddProduct, onEditProduct }) {
       {/* Pagination */}
       <div className="flex items-center justify-between mt-6">
         <button
-          onClick={() => setCurrentPage(Math.max(1, currentPage - 1))}
-          disabled={currentPage === 1}
+          onClick={() => goToPage(previousUrl, -1)}
+          disabled={!previousUrl}
           className="flex items-center space-x-2 px-4 py-2 border border-gray-300 rounded-lg hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
         >
           <ChevronLeft className="w-4 h-4" />
           <span>Previous</span>
         </button>
 
-        <div className="flex items-center space-x-2">
-          {[...Array(Math.min(5, totalPages))].map((_, i) => {
-            const page = i + 1
-            return (
-              <button
-                key={page}
-                onClick={() => setCurrentPage(page)}
-                className={`w-8 h-8 rounded-lg ${
-                  currentPage === page ? "bg-purple-600 text-white" : "text-gray-600 hover:bg-gray-100"
-                }`}
-              >
-                {page}
-              </button>
-            )
-          })}
-          {totalPages > 5 && <span className="text-gray-400">...</span>}
-          <span className="text-gray-600">{totalPages}</span>
-        </div>
+        <span className="text-gray-600">Page {pageNumber}</span>
 
         <button
-          onClick={() => setCurrentPage(Math.min(totalPages, currentPage + 1))}
-          disabled={currentPage === totalPages}
+          onClick={() => goToPage(nextUrl, 1)}
+          disabled={!nextUrl}
           className="flex items-center space-x-2 px-4 py-2 border border-gray-300 rounded-lg hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
         >
           <span>Next</span>
@@ -2,19 +2,26 @@
 
 import { useState, useEffect } from "react"
 
+const BUCKETS = ["day", "week", "month"]
+
 export default function Sales() {
-  const [orders, setOrders] = useState([])
+  const [report, setReport] = useState(null)
+  const [bucket, setBucket] = useState("day")
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
   useEffect(() => {
-    const fetchOrders = async () => {
+    const fetchSales = async () => {
       try {
         setLoading(true)
-        const res = await fetch("http://127.0.0.1:8000/api/order/")  // Adjust API endpoint
-        if (!res.ok) throw new Error("Failed to fetch orders")
-        const data = await res.json()
-        setOrders(data)
+        setError(null)
+        const token = localStorage.getItem("access")
+        // Daily rollups summed per bucket; the last 30 days by default
+        const res = await fetch(`http://127.0.0.1:8000/api/admin/sales/?bucket=${bucket}`, {
+          headers: token ? { Authorization: `Bearer ${token}` } : {},
+        })
+        if (!res.ok) throw new Error("Failed to fetch sales")
+        setReport(await res.json())
       } catch (err) {
         setError(err.message)
       } finally {
@@ -22,37 +29,57 @@ export default function Sales() {
       }
     }
 
-    fetchOrders()
-  }, [])
+    fetchSales()
+  }, [bucket]) // refetch when the bucket changes
 
-  if (loading) return <p>Loading orders...</p>
+  if (loading) return <p>Loading sales...</p>
   if (error) return <p>Error: {error}</p>
 
+  const rows = report?.results || []
+  const total = report?.totals?.[0]
+
   return (
     <div className="p-6">
-      <h1 className="text-2xl font-bold mb-4">Sales / Order History</h1>
+      <div className="flex items-center justify-between mb-4">
+        <h1 className="text-2xl font-bold">Sales</h1>
+        <select
+          value={bucket}
+          onChange={(e) => setBucket(e.target.value)}
+          className="border border-gray-300 rounded p-2"
+        >
+          {BUCKETS.map((name) => (
+            <option key={name} value={name}>
+              By {name}
+            </option>
+          ))}
+        </select>
+      </div>
+
+      {total && (
+        <p className="mb-4 text-gray-600">
+          {report.from} to {report.to}: {total.orders} orders, {total.units} units, ${total.revenue}
+        </p>
+      )}
 
-      {orders.length === 0 ? (
-        <p>No orders found.</p>
+      {rows.length === 0 ? (
+        <p>No sales in this period.</p>
       ) : (
         <table className="w-full border-collapse border border-gray-200">
           <thead>
             <tr>
-              <th className="border border-gray-300 p-2">Order ID</th>
-              <th className="border border-gray-300 p-2">Customer</th>
-              <th className="border border-gray-300 p-2">Total</th>
-              <th className="border border-gray-300 p-2">Status</th>
-              <th className="border border-gray-300 p-2">Date</th>
+              <th className="border border-gray-300 p-2">Period</th>
+              <th className="border border-gray-300 p-2">Orders</th>
+              <th className="border border-gray-300 p-2">Units</th>
+              <th className="border border-gray-300 p-2">Revenue</th>
             </tr>
           </thead>
           <tbody>
-            {orders.map((order) => (
-              <tr key={order.id} className="hover:bg-gray-50">
-                <td className="border border-gray-300 p-2">{order.id}</td>
-                <td className="border border-gray-300 p-2">{order.customer_name || order.customer?.username}</td>
-                <td className="border border-gray-300 p-2">${order.total}</td>
-                <td className="border border-gray-300 p-2">{order.status}</td>
-                <td className="border border-gray-300 p-2">{new Date(order.created_at).toLocaleDateString()}</td>
+            {rows.map((row) => (
+              <tr key={row.period} className="hover:bg-gray-50">
+                <td className="border border-gray-300 p-2">{new Date(row.period).toLocaleDateString()}</td>
+                <td className="border border-gray-300 p-2">{row.orders}</td>
+                <td className="border border-gray-300 p-2">{row.units}</td>
+                <td className="border border-gray-300 p-2">${row.revenue}</td>
               </tr>
             ))}
           </tbody>
@@ -18,7 +18,8 @@ export default function Categories() {
     try {
       setLoading(true)
       const token = localStorage.getItem("access")
-      const response = await fetch("http://127.0.0.1:8000/api/category/", {
+      // The full tree as one array; a plain list request would be a single cursor page
+      const response = await fetch("http://127.0.0.1:8000/api/category/?stream=1", {
         headers: token ? { Authorization: `Bearer ${token}` } : {},
       })
       const data = await response.json()
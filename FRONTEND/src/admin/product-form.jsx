@@ -25,13 +25,13 @@ const ProductForm = () => {
 
   // Fetch brands and categories on mount
   useEffect(() => {
-    fetch("http://127.0.0.1:8000/api/brand/")
+    fetch("http://127.0.0.1:8000/api/brand/?stream=1")
       .then((res) => res.json())
       .then(setBrands)
       .catch(() => setBrands([]));
 
     const token = localStorage.getItem("access");
-    fetch("http://127.0.0.1:8000/api/category/", {
+    fetch("http://127.0.0.1:8000/api/category/?stream=1", {
       headers: token ? { Authorization: `Bearer ${token}` } : {},
     })
       .then((res) => res.json())
@@ -14,12 +14,10 @@ export default function HomePage() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [bannerResponse, productsResponse] = await Promise.all([
-          axios.get("http://localhost:8000/api/images/banner"),
-          axios.get("http://localhost:8000/api/product"),
-        ]);
-        setBannerImage(bannerResponse.data.image_url);
-        setProducts(productsResponse.data);
+        // Banner, featured products, categories and brands in one cached response
+        const { data } = await axios.get("http://localhost:8000/api/bootstrap/");
+        setBannerImage(data.banners.length ? data.banners[0].image_url : "");
+        setProducts(data.featured);
       } catch (error) {
         console.error("Failed to fetch data:", error);
       }
@@ -122,11 +120,19 @@ export default function HomePage() {
                 )}
                 <div className="w-full h-48 rounded-xl mb-5 overflow-hidden flex items-center justify-center bg-gray-100">
                   {product.main_image_url ? (
-                    <img
-                      src={product.main_image_url}
-                      alt={product.name}
-                      className="object-cover w-full h-full"
-                    />
+                    <picture className="w-full h-full">
+                      {product.main_image_srcset && (
+                        <source type="image/webp" srcSet={product.main_image_srcset.webp} sizes="(min-width: 768px) 25vw, 50vw" />
+                      )}
+                      <img
+                        src={product.main_image_url}
+                        srcSet={product.main_image_srcset?.jpeg}
+                        sizes="(min-width: 768px) 25vw, 50vw"
+                        alt={product.name}
+                        loading="lazy"
+                        className="object-cover w-full h-full"
+                      />
+                    </picture>
                   ) : (
                     <span className="text-gray-400 text-sm">No image</span>
                   )}